@@ -1,234 +1,410 @@
 import sys
-import cv2
-import mediapipe as mp
-import threading
 import time
-from pynput.keyboard import Controller, Key
-import json
-import os
-import webbrowser
-import subprocess
-import queue
-from PIL import Image, ImageTk
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QVBoxLayout, QHBoxLayout,
-    QPushButton, QTabWidget, QTableWidget, QTableWidgetItem,
-    QFrame, QGridLayout, QTextEdit, QLineEdit, QMessageBox,
-    QScrollArea, QDialog, QListWidget, QAbstractItemView, QAction
+    QPushButton, QTabWidget, QTableWidget, QTableWidgetItem, QTableView, QHeaderView,
+    QTextEdit, QLineEdit, QMessageBox, QDialog, QAbstractItemView, QProgressBar,
+    QPlainTextEdit, QCheckBox
+)
+from PyQt5.QtGui import QImage, QPainter, QColor
+from PyQt5.QtCore import (
+    Qt, QTimer, QThread, pyqtSignal, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
 )
-from PyQt5.QtGui import QPixmap, QIcon, QImage, QPainter, QFont
-from PyQt5.QtCore import Qt, QTimer, QSize, pyqtSignal
-
-CONFIG_FILE = "gestures_macros_config.json"
 
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
+# OpenCV, MediaPipe и pynput здесь не импортируются: окно показывается сразу,
+# а тяжёлые компоненты загружает StartupLoader в фоне
+from hand_tracking import HandDetector
+from gesture_recognition import GestureStabilizer
+from config_manager import ConfigManager
+from app_focus import FocusWatcher, detect_focus_backend
+from gesture_learning import LearnedGestures
+from macro_runner import (
+    MacroRunner, listen_hotkey, EVENT_STARTED, EVENT_DONE, EVENT_CANCELLED, EVENT_DROPPED,
+    EVENT_EXITED
+)
+from macros import MacroCompiler, MacroCompileError, get_processes
+from process_manager import ProcessManager
+from motion_recognition import MotionMatcher, MotionTemplate, frame_features
+from stage_metrics import StageMetrics, STAGES
 
-keyboard = Controller()
 
+class StartupLoader(QThread):
+    progress = pyqtSignal(int, str)
+    loaded = pyqtSignal(object)  # открытый источник кадров или None
 
-class ConfigManager:
-    @staticmethod
-    def load():
-        try:
-            if os.path.exists(CONFIG_FILE):
-                with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except Exception as e:
-            QMessageBox.critical(None, "Config Error", f"Failed to load config: {str(e)}")
-            return {}
+    STEPS = 4
 
-    @staticmethod
-    def save(config):
+    def run(self):
+        source = None
         try:
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            QMessageBox.critical(None, "Config Error", f"Failed to save config: {str(e)}")
-
-
-class GestureRecognizer:
-    @staticmethod
-    def fingers_up(landmarks):
-        tips_ids = [4, 8, 12, 16, 20]
-        fingers = []
-
-        if landmarks:
-            thumb_tip = landmarks[tips_ids[0]]
-            thumb_ip = landmarks[tips_ids[0] - 1]
-            fingers.append(thumb_tip.x < thumb_ip.x - 0.02)
-
-            for i in range(1, 5):
-                tip = landmarks[tips_ids[i]]
-                dip = landmarks[tips_ids[i] - 2]
-                fingers.append(tip.y < dip.y + 0.03)
-
-        return fingers
+            self.progress.emit(0, "Загрузка OpenCV...")
+            import frame_pipeline  # cv2, numpy
 
-    @staticmethod
-    def get_signature(fingers):
-        return ''.join(['1' if f else '0' for f in fingers]) if fingers else ''
+            self.progress.emit(1, "Загрузка модели MediaPipe...")
+            HandDetector.shared().warm_up(crop=True)
 
+            self.progress.emit(2, "Инициализация клавиатуры...")
+            from macros import get_keystroke_engine
+            get_keystroke_engine()
 
-class MacroExecutor:
-    @staticmethod
-    def execute(actions):
-        try:
-            for action in actions:
-                action = action.strip()
-                if not action or action.startswith("#"):
-                    continue
-
-                if action.startswith("STRING:"):
-                    MacroExecutor._type_string(action[7:])
-                elif action.startswith("KEY:"):
-                    MacroExecutor._press_key(action[4:])
-                elif action.startswith("OPEN:"):
-                    MacroExecutor._open_url(action[5:])
-                elif action.startswith("WAIT:"):
-                    MacroExecutor._wait(action[5:])
-                elif action.startswith("CMD:"):
-                    MacroExecutor._run_command(action[4:])
-                else:
-                    keyboard.type(action)
-
-                time.sleep(0.05)
+            self.progress.emit(3, "Открытие камеры...")
+            from frame_sources import CameraSource
+            source = CameraSource(0, settings=CameraHandler.capture_settings)
         except Exception as e:
-            print(f"Critical error: {str(e)}")
-            raise # Перенаправляем исключение в вызывающий код
-    @staticmethod
-    def _type_string(text):
-        keyboard.type(text)
-
-    @staticmethod
-    def _press_key(keyname):
-        try:
-            key = getattr(Key, keyname)
-        except AttributeError:
-            key = keyname
-        keyboard.press(key)
-        keyboard.release(key)
-
-    @staticmethod
-    def _open_url(url):
-        if url.strip():
-            webbrowser.open(url.strip())
-
-    @staticmethod
-    def _wait(seconds):
-        try:
-            time.sleep(max(0, float(seconds.strip())))
-        except:
-            pass
+            print(f"Ошибка загрузки: {str(e)}")
+        self.progress.emit(self.STEPS, "Готово")
+        self.loaded.emit(source)
 
-    @staticmethod
-    def _run_command(cmd):
-        if cmd.strip():
-            subprocess.Popen(cmd.strip(), shell=True)
+
+class VideoView(QWidget):
+    # Показывает RGB-кадр numpy без QPixmap и повторного масштабирования:
+    # кадр уже уменьшен под размер виджета в потоке распознавания
+    def __init__(self, parent=None, metrics=None):
+        super().__init__(parent)
+        self._buffer = None
+        self._image = None
+        self.metrics = metrics  # StageMetrics: время отрисовки и наложение
+        self.show_overlay = False
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def is_showing(self):
+        return self.isVisible() and not self.window().isMinimized()
+
+    def render_size(self):
+        return (self.width(), self.height()) if self.is_showing() else None
+
+    def set_frame(self, rgb):
+        h, w = rgb.shape[:2]
+        # QImage ссылается на память массива без копирования, поэтому массив
+        # хранится вместе с изображением до следующего кадра
+        self._buffer = rgb
+        self._image = QImage(rgb.data, w, h, rgb.strides[0], QImage.Format_RGB888)
+        self.update()
+
+    def paintEvent(self, event):
+        started = time.perf_counter()
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        if self._image is not None:
+            x = (self.width() - self._image.width()) // 2
+            y = (self.height() - self._image.height()) // 2
+            painter.drawImage(x, y, self._image)
+        if self.metrics is None:
+            return
+        if self.show_overlay:
+            # FPS и задержки поверх кадра: текст с тенью читается на любом фоне
+            for i, line in enumerate(self.metrics.overlay_lines()):
+                y = 18 + i * 16
+                painter.setPen(Qt.black)
+                painter.drawText(9, y + 1, line)
+                painter.setPen(QColor("#7CFC00"))
+                painter.drawText(8, y, line)
+        if self._image is not None:
+            self.metrics.record("render", time.perf_counter() - started)
 
 
 class CameraHandler(QWidget):
-    def __init__(self, parent=None):
+    frame_ready = pyqtSignal()
+    macro_event = pyqtSignal(str, str, str)  # событие, название макроса, подробности
+
+    # Частота распознавания: max_fps пока рука в кадре, idle_fps после
+    # idle_after секунд без руки (0 - без ограничения / без режима ожидания)
+    max_fps = 30.0
+    idle_fps = 4.0
+    idle_after = 3.0
+    # Формат, размер, частота и буфер камеры (frame_sources.CaptureSettings),
+    # None - значения по умолчанию
+    capture_settings = None
+
+    def __init__(self, parent=None, detector=None):
         super().__init__(parent)
+        self.detector = detector or HandDetector.shared()
         self.cap = None
+        self.pipeline = None
+        self.scheduler = None
         self.running = False
-        self.last_action = 0
-        self.cooldown = 2
-        self.timer = QTimer(self)  # Инициализация таймера в конструкторе
-        self.label = QLabel(self)
-        self.label.setAlignment(Qt.AlignCenter)
+        self.stabilizer = GestureStabilizer(ConfigManager.trigger_settings)
+        self.motion = MotionMatcher()
+        # Жесты, выученные по образцам (вкладка "Режим обучения")
+        self.learned = LearnedGestures(LearnedGestures.path_for(ConfigManager.path)).load()
+        # Камера открывается один раз на всё окно: кадры получают подписчики
+        # (окно записи жеста, режим обучения) - [(callback, view, hold_macros)]
+        self.subscribers = []
+        # Задержки этапов от захвата кадра до нажатия макроса
+        self.metrics = StageMetrics()
+        # Макросы выполняются в потоке MacroRunner, результаты приходят сигналом
+        self.runner = MacroRunner(
+            on_event=lambda event, macro, detail: self.macro_event.emit(event, macro.name, detail),
+            metrics=self.metrics)
+        self.view = VideoView(self, self.metrics)
         layout = QVBoxLayout(self)
-        layout.addWidget(self.label)
+        layout.addWidget(self.view)
         self.setLayout(layout)
+        # Сигнал из потока распознавания доставляется в GUI-поток через очередь Qt
+        self.frame_ready.connect(self.update_frame)
+
+    def start(self, source=None):
+        self.stop()
 
-    def start(self):
-        if self.cap and self.cap.isOpened():
-            self.cap.release()
-            time.sleep(0.2)
-        
         try:
-            self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+            from frame_pipeline import FramePipeline, FrameScheduler
+            from frame_sources import CameraSource
+
+            # source - любой FrameSource (видео, папка кадров, запись ландмарок)
+            self.cap = source or CameraSource(0, settings=self.capture_settings)
             if not self.cap.isOpened():
                 print("Ошибка инициализации камеры")
                 return
-            
+            if isinstance(self.cap, CameraSource):
+                print(f"Камера: {self.cap.describe()}")
+
+            self.stabilizer.reset()
+            self.motion.reset()
+            self.scheduler = FrameScheduler(self.max_fps, self.idle_fps, self.idle_after)
+            self.pipeline = FramePipeline(
+                self.cap, self.detector, on_result=self.frame_ready.emit,
+                scheduler=self.scheduler, metrics=self.metrics)
+            self.pipeline.render_size = self.view.render_size()
+            self.pipeline.start()
             self.running = True
-            self.timer.timeout.connect(self.update_frame)
-            self.timer.start(30)  # Теперь таймер гарантированно существует
         except Exception as e:
             print(f"Ошибка камеры: {str(e)}")
 
     def stop(self):
         self.running = False
-        if hasattr(self, 'timer'):
-            self.timer.stop()
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
         if self.cap and self.cap.isOpened():
             self.cap.release()
 
+    def counters(self):
+        return self.pipeline.counters() if self.pipeline else None
+
+    def subscribe(self, callback, view=None, hold_macros=False):
+        # callback(FrameResult) в GUI-потоке на каждый кадр. view - VideoView
+        # подписчика: пока он показан, кадр рисуется под его размер вместо
+        # основного. hold_macros - жесты не запускают макросы (запись жеста, режим обучения)
+        self.subscribers.append((callback, view, hold_macros))
+
+    def unsubscribe(self, callback):
+        held = any(hold for cb, _, hold in self.subscribers if cb == callback)
+        self.subscribers = [s for s in self.subscribers if s[0] != callback]
+        if held:
+            # Жест, показанный во время записи, не должен сработать после неё
+            self.stabilizer.reset()
+            self.motion.reset()
+
+    def _render_view(self):
+        for _, view, _ in reversed(self.subscribers):
+            if view is not None and view.is_showing():
+                return view
+        return self.view
+
     def update_frame(self):
-        success, frame = self.cap.read()
-        if not success:
+        result = self.pipeline.latest() if self.pipeline else None
+        if result is None:
             return
 
-        frame = cv2.flip(frame, 1)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-        with mp_hands.Hands(
-                max_num_hands=1,
-                model_complexity=0,
-                min_detection_confidence=0.7,
-                min_tracking_confidence=0.7) as hands:
-
-            results = hands.process(rgb_frame)
-
-        if results.multi_hand_landmarks:
-            landmarks = results.multi_hand_landmarks[0].landmark
-            fingers = GestureRecognizer.fingers_up(landmarks)
-            signature = GestureRecognizer.get_signature(fingers)
-            
-            # Добавьте проверку времени cooldown
-            if time.time() - self.last_action > self.cooldown:
-                self._handle_gesture(signature, frame, results)  # Было без аргументо
-
-                mp_drawing.draw_landmarks(
-                    frame,
-                    results.multi_hand_landmarks[0],
-                    mp_hands.HAND_CONNECTIONS,
-                    mp_drawing_styles.get_default_hand_landmarks_style(),
-                    mp_drawing_styles.get_default_hand_connections_style()
-                )
-
-        h, w, ch = frame.shape
-        bytes_per_line = ch * w
-        q_img = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(q_img)
-        self.label.setPixmap(pixmap.scaled(self.label.size(), Qt.KeepAspectRatio))
-
-    def _handle_gesture(self, signature, frame, results):  # Добавьте аргументы
-        config = ConfigManager.load()
-        if signature in config:
-            self.last_action = time.time()
-            # Добавляем проверку на активный поток
-            if not hasattr(self, '_active_thread') or not self._active_thread.is_alive():
-                self._active_thread = threading.Thread(
-                    target=self.execute_macro_safe,
-                    args=(config[signature]["actions"], config[signature]['name']),
-                    daemon=True
-                )
-                self._active_thread.start()
-            
-    def execute_macro_safe(self, actions, name):
-        try:
-            MacroExecutor.execute(actions)
-            # Используем лямбду для безопасного обновления GUI
-            self.parent().status_bar.showMessage(f"Выполнено: {name}")  
-        except Exception as e:
-            self.parent().status_bar.showMessage(f"Ошибка: {str(e)}")       
+        subscribers = self.subscribers
+        for callback, _, _ in subscribers:
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"Ошибка обработки кадра: {str(e)}")
+
+        if not any(hold for _, _, hold in subscribers):
+            # Срабатывание только после устойчивого удержания жеста и его отпускания.
+            # Стабилизируется ключ конфига, на который указывают руки в кадре:
+            # выученный жест, если он узнан уверенно и к нему привязан макрос,
+            # иначе сигнатура пальцев
+            started = time.perf_counter()
+            key = None
+            if len(self.learned) and result.points is not None:
+                key, _ = self.learned.classify(result.points, result.hand_label)
+            fired = self.stabilizer.update(ConfigManager.resolve(result.hands, key),
+                                           result.timestamp)
+            if fired:
+                self._handle_gesture(fired, result.display, result.results)
+            # Жесты-движения: траектория руки сравнивается с записанными шаблонами
+            moved = self.motion.update(result.points, result.timestamp,
+                                       ConfigManager.motion_macros())
+            if moved is not None:
+                self._handle_gesture(moved.signature, result.display, result.results)
+            self.metrics.record("lookup", time.perf_counter() - started)
+
+        # Скрытое или свёрнутое окно не рендерится вовсе
+        view = self._render_view()
+        self.pipeline.render_size = view.render_size()
+        if view is self.view and result.display is not None and self.view.is_showing():
+            self.view.set_frame(result.display)
+        now = time.monotonic()
+        self.metrics.record("total", now - result.captured_at)
+        self.metrics.frame_done(now)
+
+    def _handle_gesture(self, signature, frame, results):
+        macro = ConfigManager.lookup(signature)
+        if macro is not None:
+            self.runner.submit(macro)
+
+
+class MacroTableModel(QAbstractTableModel):
+    # Таблица макросов поверх кеша ConfigManager: представление запрашивает
+    # только видимые строки, после put()/delete() меняется одна строка
+    # (update_key), полная перестройка - только когда конфиг перечитан
+    KEY_ROLE = Qt.UserRole  # ключ макроса - по нему держится выделение
+    headers = ("Жест", "Описание", "Действие")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._keys = []
+        self._rows = {}  # ключ -> строка
+        self._search = []  # "название ключ" в нижнем регистре, по строкам
+        self._texts = {}  # те же строки по ключам: сортировка их не пересчитывает
+        self._entries = {}
+        self._previews = {}  # ключ -> первое действие; из хранилища тело читается при показе
+        self._sort = (-1, Qt.AscendingOrder)  # -1 - порядок конфига
+
+    def reload(self):
+        self.beginResetModel()
+        self._entries = ConfigManager.entries()
+        self._previews = {}
+        self._texts = {key: self._search_text(key) for key in self._entries}
+        self._arrange()
+        self.endResetModel()
+
+    def update_key(self, key):
+        entry = ConfigManager.peek(key)
+        row = self._rows.get(key)
+        self._previews.pop(key, None)
+        if entry is None:
+            if row is None:
+                return
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._keys[row]
+            del self._search[row]
+            del self._entries[key]
+            del self._texts[key]
+            del self._rows[key]
+            for shifted in self._keys[row:]:
+                self._rows[shifted] -= 1
+            self.endRemoveRows()
+            return
+        self._entries[key] = entry
+        self._texts[key] = self._search_text(key)
+        if row is None:
+            # Новый макрос - в конец, до следующей сортировки
+            row = len(self._keys)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._keys.append(key)
+            self._search.append(self._texts[key])
+            self._rows[key] = row
+            self.endInsertRows()
+        else:
+            self._search[row] = self._texts[key]
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
+
+    def row_of(self, key):
+        return self._rows.get(key)
+
+    def matches(self, row, needle):
+        return needle in self._search[row]
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Один sorted() по ключам вместо сравнения строк через data()
+        self._sort = (column, order)
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        marks = [(self._keys[index.row()], index.column()) for index in persistent]
+        self._arrange()
+        self.changePersistentIndexList(
+            persistent, [self.index(self._rows[key], column) for key, column in marks])
+        self.layoutChanged.emit()
+
+    def _arrange(self):
+        column, order = self._sort
+        keys = list(self._entries)
+        sort_keys = {
+            0: lambda key: str(self._entries[key].get('name', key)).casefold(),
+            1: str.casefold,
+            2: lambda key: self._preview(key).casefold(),
+        }
+        if column in sort_keys:
+            keys.sort(key=sort_keys[column], reverse=order == Qt.DescendingOrder)
+        self._keys = keys
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._search = [self._texts[key] for key in keys]
+
+    def _search_text(self, key):
+        return f"{self._entries[key].get('name', key)} {key}".casefold()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._keys)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self._keys[index.row()]
+        if role == self.KEY_ROLE:
+            return key
+        if role != Qt.DisplayRole:
+            return None
+        column = index.column()
+        if column == 0:
+            return self._entries[key].get('name', key)
+        if column == 1:
+            return key
+        return self._preview(key)
+
+    def _preview(self, key):
+        preview = self._previews.get(key)
+        if preview is None:
+            entry = self._entries[key]
+            if "actions" not in entry:
+                entry = ConfigManager.entry(key) or entry
+            # Защита от пустых действий
+            actions = entry.get('actions', ['Нет действий'])
+            preview = actions[0][:50] + "..." if actions else "Нет действий"
+            self._previews[key] = preview
+        return preview
+
+
+class MacroFilterProxy(QSortFilterProxyModel):
+    # Поиск по подстроке в названии и ключе: строки для поиска модель
+    # готовит заранее, data() на каждую строку не вызывается. Сортировку
+    # выполняет сама модель - lessThan из Python на десятках тысяч строк
+    # занимает секунды
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._needle = ""
+
+    def set_search(self, text):
+        self._needle = text.strip().casefold()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, row, parent):
+        return not self._needle or self.sourceModel().matches(row, self._needle)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
 
 
 class GestureMacroApp(QMainWindow):
+    command_output = pyqtSignal(str)  # строка вывода команды CMD: из потока чтения
+    profile_changed = pyqtSignal(str)  # профиль жестов сменился вместе с активным окном
+    config_changed = pyqtSignal(object)  # ключ изменённого макроса, None - весь конфиг
+    config_error = pyqtSignal(str, str)  # заголовок, текст ошибки конфига из любого потока
+    samples_per_capture = 40  # образцов за одну запись в режиме обучения
+    command_log_lines = 2000  # сколько строк вывода команд держать на вкладке
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("GestureMacro")
@@ -239,9 +415,58 @@ class GestureMacroApp(QMainWindow):
             font-family: Arial;
         """)
 
+        # Конфиг перечитывается и из потока FocusWatcher (switch_app): окно с ошибкой
+        # показывается в GUI-потоке
+        self.config_error.connect(lambda title, message: QMessageBox.critical(None, title, message))
+        ConfigManager.on_error = self.config_error.emit
+        # Таблица макросов обновляется по изменениям конфига, в том числе из потока камеры.
+        # Через очередь: перечитывание внутри reload() модели не перестраивает её повторно
+        self.config_changed.connect(self._on_config_changed, Qt.QueuedConnection)
+        ConfigManager.on_change = self.config_changed.emit
+
         self.camera = CameraHandler(self)
+        self.camera.macro_event.connect(self._on_macro_event)
+        self.cancel_hotkey = None
+        # Вывод команд CMD: пишется в журнал рядом с конфигом и на вкладку "Команды"
+        self.processes = get_processes()
+        self.processes.log_path = ProcessManager.path_for(ConfigManager.path)
+        self.processes.on_output = lambda job, line: self.command_output.emit(f"[{job.pid}] {line}")
         self.init_ui()
-        self.camera.start()
+        self.command_output.connect(self._append_command_output)
+        # Профиль жестов выбирается по активному приложению (gesture_profiles.json)
+        self.profile_changed.connect(self._on_profile_changed)
+        self.focus = FocusWatcher(detect_focus_backend(), self._on_focus_changed).start()
+
+        self._closing = False
+        # Пока True, камеру открывает StartupLoader: открывать её ещё раз нельзя
+        self.loading = True
+        self.loader = StartupLoader(self)
+        self.loader.progress.connect(self._on_load_progress)
+        self.loader.loaded.connect(self._on_loaded)
+        # Загрузка стартует после первой отрисовки окна
+        QTimer.singleShot(0, self.loader.start)
+
+    def _on_load_progress(self, step, message):
+        self.load_progress.setValue(step)
+        self.status_bar.showMessage(message)
+
+    def _on_loaded(self, source):
+        self.loading = False
+        self.load_progress.hide()
+        if not self._closing:
+            # pynput уже загружен StartupLoader-ом
+            self.cancel_hotkey = listen_hotkey(MacroRunner.cancel_hotkey, self.camera.runner.cancel)
+        if self._closing:
+            if source is not None:
+                source.release()
+            return
+        if source is None or not source.isOpened():
+            if source is not None:
+                source.release()
+            self.status_bar.showMessage("Камера недоступна")
+            return
+        self.camera.start(source)
+        self.status_bar.showMessage("Ready")
 
     def init_ui(self):
         # Create central widget and main layout
@@ -288,12 +513,22 @@ class GestureMacroApp(QMainWindow):
         learning_tab.setLayout(self.create_learning_tab())
         self.tabs.addTab(learning_tab, "Режим обучения")
 
+        # Commands Tab
+        commands_tab = QWidget()
+        commands_tab.setLayout(self.create_commands_tab())
+        self.tabs.addTab(commands_tab, "Команды")
+
         main_layout.addWidget(self.tabs)
 
         # Status Bar
         self.status_bar = self.statusBar()
         self.status_bar.setStyleSheet("color: #AAAAAA;")
-        self.status_bar.showMessage("Ready")
+        self.status_bar.showMessage("Загрузка...")
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, StartupLoader.STEPS)
+        self.load_progress.setFixedWidth(150)
+        self.load_progress.setTextVisible(False)
+        self.status_bar.addPermanentWidget(self.load_progress)
 
     def create_macros_tab(self):
         layout = QHBoxLayout()
@@ -302,21 +537,48 @@ class GestureMacroApp(QMainWindow):
         left = QVBoxLayout()
         self.camera.setMinimumSize(300, 200)
         left.addWidget(self.camera)
+        overlay_check = QCheckBox("Показывать FPS и задержки")
+        overlay_check.toggled.connect(self.toggle_overlay)
+        left.addWidget(overlay_check)
         left.addStretch()
         layout.addLayout(left)
 
         # Right side - Macros table and buttons
         right = QVBoxLayout()
 
-        self.macros_table = QTableWidget()
-        self.macros_table.setColumnCount(3)
-        self.macros_table.setHorizontalHeaderLabels(["Жест", "Описание", "Действие"])
+        self.profile_label = QLabel(f"Профиль: {ConfigManager.active_profile}")
+        right.addWidget(self.profile_label)
+
+        self.macros_search = QLineEdit()
+        self.macros_search.setPlaceholderText("Поиск по названию или жесту")
+        self.macros_search.setStyleSheet("background-color: #2B2B2B; padding: 5px;")
+        right.addWidget(self.macros_search)
+        # Фильтр применяется после паузы в наборе, а не на каждую букву
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self._apply_search)
+        self.macros_search.textChanged.connect(lambda _: self._search_timer.start())
+
+        self.macros_model = MacroTableModel(self)
+        self.macros_proxy = MacroFilterProxy(self)
+        self.macros_proxy.setSourceModel(self.macros_model)
+
+        self.macros_table = QTableView()
+        self.macros_table.setModel(self.macros_proxy)
         self.macros_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.macros_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.macros_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        # Одинаковая высота строк: прокрутка не измеряет строки
+        self.macros_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.macros_table.horizontalHeader().setStretchLastSection(True)
+        # Без индикатора сортировки строки идут в порядке конфига
+        self.macros_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.macros_table.setSortingEnabled(True)
 
         # Configure table style
         self.macros_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #2B2B2B;
                 color: white;
                 border: none;
@@ -328,7 +590,7 @@ class GestureMacroApp(QMainWindow):
                 padding: 5px;
                 border: none;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
         """)
@@ -368,6 +630,16 @@ class GestureMacroApp(QMainWindow):
         delete_btn.clicked.connect(self.delete_macro)
         btn_layout.addWidget(delete_btn)
 
+        stop_btn = QPushButton("Остановить макрос")
+        stop_btn.setToolTip(f"Прервать выполнение и очистить очередь ({MacroRunner.cancel_hotkey})")
+        stop_btn.setStyleSheet("""
+            background-color: #3E3E3E;
+            padding: 8px;
+            border-radius: 4px;
+        """)
+        stop_btn.clicked.connect(self.camera.runner.cancel)
+        btn_layout.addWidget(stop_btn)
+
         right.addWidget(self.macros_table)
         right.addLayout(btn_layout)
         layout.addLayout(right)
@@ -377,57 +649,268 @@ class GestureMacroApp(QMainWindow):
     def create_learning_tab(self):
         layout = QVBoxLayout()
 
-        # Add content for learning tab
-        label = QLabel("Режим обучения: покажите жесты камере для распознавания")
+        label = QLabel("Режим обучения: покажите жест камере, пока идёт запись образцов")
         label.setStyleSheet("font-size: 16px;")
         label.setAlignment(Qt.AlignCenter)
         layout.addWidget(label)
 
+        self.learned_table = QTableWidget()
+        self.learned_table.setColumnCount(3)
+        self.learned_table.setHorizontalHeaderLabels(["Жест", "Описание", "Образцов"])
+        self.learned_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.learned_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.learned_table.setStyleSheet(self.macros_table.styleSheet())
+        layout.addWidget(self.learned_table)
+
+        name_layout = QHBoxLayout()
+        self.learned_name_input = QLineEdit()
+        self.learned_name_input.setPlaceholderText("Название нового жеста")
+        self.learned_name_input.setStyleSheet("background-color: #2B2B2B; padding: 5px;")
+        name_layout.addWidget(self.learned_name_input)
+        layout.addLayout(name_layout)
+
+        btn_layout = QHBoxLayout()
+        self.learn_new_btn = QPushButton("Записать новый жест")
+        self.learn_new_btn.setStyleSheet("""
+            background-color: #2D8CFF;
+            color: white;
+            padding: 8px;
+            font-size: 14px;
+            border-radius: 4px;
+        """)
+        self.learn_new_btn.clicked.connect(lambda: self.start_learning(new=True))
+        btn_layout.addWidget(self.learn_new_btn)
+
+        self.learn_more_btn = QPushButton("Добавить образцы")
+        self.learn_more_btn.setStyleSheet("""
+            background-color: #3E3E3E;
+            padding: 8px;
+            border-radius: 4px;
+        """)
+        self.learn_more_btn.clicked.connect(lambda: self.start_learning(new=False))
+        btn_layout.addWidget(self.learn_more_btn)
+
+        forget_btn = QPushButton("Удалить")
+        forget_btn.setStyleSheet("""
+            background-color: #5E1E1E;
+            padding: 8px;
+            border-radius: 4px;
+        """)
+        forget_btn.clicked.connect(self.delete_learned)
+        btn_layout.addWidget(forget_btn)
+        layout.addLayout(btn_layout)
+
+        self.learning_progress = QProgressBar()
+        self.learning_progress.setRange(0, self.samples_per_capture)
+        self.learning_progress.setValue(0)
+        layout.addWidget(self.learning_progress)
+
+        self._learning = None  # (ключ, название, точки, метки) во время записи
+        self.update_learned_table()
         return layout
 
+    def create_commands_tab(self):
+        layout = QVBoxLayout()
+
+        self.commands_label = QLabel()
+        layout.addWidget(self.commands_label)
+
+        self.command_log = QPlainTextEdit()
+        self.command_log.setReadOnly(True)
+        self.command_log.setMaximumBlockCount(self.command_log_lines)
+        self.command_log.setStyleSheet("background-color: #2B2B2B; font-family: monospace;")
+        layout.addWidget(self.command_log)
+
+        btn_layout = QHBoxLayout()
+        stop_btn = QPushButton("Остановить все команды")
+        stop_btn.setStyleSheet("""
+            background-color: #5E1E1E;
+            padding: 8px;
+            border-radius: 4px;
+        """)
+        stop_btn.clicked.connect(self.processes.stop_all)
+        btn_layout.addWidget(stop_btn)
+        clear_btn = QPushButton("Очистить")
+        clear_btn.setStyleSheet("""
+            background-color: #3E3E3E;
+            padding: 8px;
+            border-radius: 4px;
+        """)
+        clear_btn.clicked.connect(self.command_log.clear)
+        btn_layout.addWidget(clear_btn)
+        btn_layout.addStretch()
+        layout.addLayout(btn_layout)
+
+        self.update_commands_label()
+        return layout
+
+    def update_commands_label(self):
+        running, pending = self.processes.counts()
+        self.commands_label.setText(
+            f"Выполняется команд: {running}, в очереди: {pending}. "
+            f"Журнал: {self.processes.log_path}")
+
+    def _append_command_output(self, line):
+        self.command_log.appendPlainText(line)
+
+    def update_learned_table(self):
+        counts = self.camera.learned.counts()
+        self.learned_table.setRowCount(len(counts))
+        for row, (key, count) in enumerate(counts.items()):
+            entry = ConfigManager.entry(key) or {}
+            self.learned_table.setItem(row, 0, QTableWidgetItem(entry.get('name', key)))
+            self.learned_table.setItem(row, 1, QTableWidgetItem(key))
+            self.learned_table.setItem(row, 2, QTableWidgetItem(str(count)))
+        self.learned_table.resizeColumnsToContents()
+
+    def _selected_learned_key(self):
+        row = self.learned_table.currentRow()
+        if row == -1:
+            return None
+        return self.learned_table.item(row, 1).text()
+
+    def start_learning(self, new):
+        if self._learning is not None:
+            self._finish_learning(cancelled=True)
+            return
+        if not self.camera.running:
+            QMessageBox.warning(self, "Ошибка", "Камера не запущена")
+            return
+
+        if new:
+            name = self.learned_name_input.text().strip()
+            if not name:
+                QMessageBox.warning(self, "Ошибка", "Введите название жеста")
+                return
+            key = ConfigManager.next_key(ConfigManager.keys(), "learned")
+        else:
+            key = self._selected_learned_key()
+            if key is None:
+                QMessageBox.warning(self, "Ошибка", "Выберите жест для дообучения")
+                return
+            name = None
+
+        self._learning = (key, name, [], [])
+        self.learning_progress.setValue(0)
+        self.learn_new_btn.setText("Отменить запись")
+        self.learn_more_btn.setEnabled(False)
+        # Как и в окне записи: показанные для обучения позы не запускают макросы
+        self.camera.subscribe(self._collect_sample, hold_macros=True)
+        self.status_bar.showMessage("Покажите жест камере...")
+
+    def _collect_sample(self, result):
+        if result.points is None:
+            return
+        _, _, samples, labels = self._learning
+        samples.append(result.points)
+        labels.append(result.hand_label)
+        self.learning_progress.setValue(len(samples))
+        if len(samples) >= self.samples_per_capture:
+            self._finish_learning()
+
+    def _finish_learning(self, cancelled=False):
+        key, name, samples, labels = self._learning
+        self._learning = None
+        self.camera.unsubscribe(self._collect_sample)
+        self.learn_new_btn.setText("Записать новый жест")
+        self.learn_more_btn.setEnabled(True)
+        self.learning_progress.setValue(0)
+        if cancelled:
+            self.status_bar.showMessage("Запись образцов отменена")
+            return
+
+        learned = self.camera.learned
+        learned.add(key, samples, labels)
+        if not learned.save():
+            learned.remove(key)
+            QMessageBox.critical(self, "Ошибка", "Не удалось сохранить образцы жеста")
+            return
+
+        if name is not None:
+            ConfigManager.put(key, {
+                "name": name,
+                "actions": ["# Добавьте действия через EditMacroDialog"]
+            })
+            self.learned_name_input.clear()
+            EditMacroDialog(self, key, name).exec_()
+        self.update_learned_table()
+        self.status_bar.showMessage(f"Записано образцов: {len(samples)}")
+
+    def delete_learned(self):
+        key = self._selected_learned_key()
+        if key is None:
+            QMessageBox.warning(self, "Ошибка", "Выберите жест для удаления")
+            return
+        reply = QMessageBox.question(
+            self, 'Подтверждение',
+            "Удалить образцы жеста и привязанный к нему макрос?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        self._forget_learned(key)
+        ConfigManager.delete(key)
+        self.update_learned_table()
+
+    def _forget_learned(self, key):
+        learned = self.camera.learned
+        if key in learned.keys:
+            learned.remove(key)
+            learned.save()
+
     def update_macros_table(self):
-        config = ConfigManager.load()
-        self.macros_table.setRowCount(len(config))
-        
-        for row, (sig, data) in enumerate(config.items()):
-            # Защита от пустых действий
-            actions = data.get('actions', ['Нет действий'])
-            action_preview = actions[0][:50] + "..." if actions else "Нет действий"
-            
-            self.macros_table.setItem(row, 0, QTableWidgetItem(data['name']))
-            self.macros_table.setItem(row, 1, QTableWidgetItem(sig))
-            self.macros_table.setItem(row, 2, QTableWidgetItem(action_preview))
-        
-        self.macros_table.resizeColumnsToContents()
+        # Полная перестройка (конфиг перечитан); выделение держится за ключ макроса
+        key = self.selected_macro_key()
+        empty = self.macros_model.rowCount() == 0
+        self.macros_model.reload()
+        if empty:
+            # Ширина по содержимому один раз: дальше - как настроил пользователь
+            self.macros_table.resizeColumnsToContents()
+        self.select_macro(key)
+
+    def _on_config_changed(self, key):
+        if key is None:
+            self.update_macros_table()
+        else:
+            self.macros_model.update_key(key)
+
+    def _apply_search(self):
+        key = self.selected_macro_key()
+        self.macros_proxy.set_search(self.macros_search.text())
+        self.select_macro(key)
+
+    def selected_macro_key(self):
+        rows = self.macros_table.selectionModel().selectedRows()
+        return rows[0].data(MacroTableModel.KEY_ROLE) if rows else None
+
+    def select_macro(self, key):
+        row = self.macros_model.row_of(key) if key is not None else None
+        if row is None:
+            return
+        index = self.macros_proxy.mapFromSource(self.macros_model.index(row, 0))
+        if index.isValid():
+            self.macros_table.selectRow(index.row())
+            self.macros_table.scrollTo(index)
 
     def show_add_dialog(self):
         dialog = AddGestureDialog(self)
-        if dialog.exec_() == QDialog.Accepted:
-            self.update_macros_table()
+        dialog.exec_()
 
     def show_edit_dialog(self):
-        selected = self.macros_table.currentRow()
-        if selected == -1:
+        sig = self.selected_macro_key()
+        if sig is None:
             QMessageBox.warning(self, "Ошибка", "Пожалуйста, выберите макрос для редактирования")
             return
 
-        config = ConfigManager.load()
-        sig = list(config.keys())[selected]
-        name = config[sig]['name']
-
-        dialog = EditMacroDialog(self, sig, name)
-        if dialog.exec_() == QDialog.Accepted:
-            self.update_macros_table()
+        name = (ConfigManager.peek(sig) or {}).get('name', sig)
+        EditMacroDialog(self, sig, name).exec_()
 
     def delete_macro(self):
-        selected = self.macros_table.currentRow()
-        if selected == -1:
+        sig = self.selected_macro_key()
+        if sig is None:
             QMessageBox.warning(self, "Ошибка", "Пожалуйста, выберите макрос для удаления")
             return
 
-        config = ConfigManager.load()
-        sig = list(config.keys())[selected]
-        name = config[sig]['name']
+        name = (ConfigManager.peek(sig) or {}).get('name', sig)
 
         reply = QMessageBox.question(
             self, 'Подтверждение',
@@ -435,18 +918,111 @@ class GestureMacroApp(QMainWindow):
             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
 
         if reply == QMessageBox.Yes:
-            del config[sig]
-            ConfigManager.save(config)
-            self.update_macros_table()
+            ConfigManager.delete(sig)
+            self._forget_learned(sig)
+            self.update_learned_table()
 
     def show_settings(self):
-        QMessageBox.information(self, "Настройки", "Здесь будут настройки приложения")
+        lines = [
+            f"Частота распознавания: до {self.camera.max_fps:g} кадров/с",
+            f"Режим ожидания: {self.camera.idle_fps:g} кадров/с "
+            f"через {self.camera.idle_after:g} с без руки",
+        ]
+        if hasattr(self.camera.cap, 'negotiated') and self.camera.cap.isOpened():
+            lines += [
+                f"Камера: {self.camera.cap.describe()}",
+                f"Запрошено: {self.camera.cap.settings.describe()}",
+            ]
+            if self.camera.cap.settings.latest:
+                lines.append(f"Устаревших кадров отброшено: {self.camera.cap.stale}")
+        counters = self.camera.counters()
+        if counters:
+            mode = "ожидание" if self.camera.pipeline.idle else "активный"
+            lines += [
+                "",
+                f"Режим: {mode}",
+                f"Кадров получено: {counters['captured']}",
+                f"Распознано: {counters['inferred']}",
+                f"Пропущено: {counters['skipped']}",
+                f"Вытеснено из очереди: {counters['dropped']}",
+            ]
+        profiles = ConfigManager.profiles()
+        lines += [
+            "",
+            f"Профиль: {ConfigManager.active_profile} (окно: {ConfigManager.active_app or '-'}, "
+            f"определение: {self.focus.backend.name})",
+        ]
+        for name, (apps, parent, count) in profiles.items():
+            if parent is not None:
+                lines.append(f"  {name} <- {parent}: {', '.join(apps) or 'вручную'}, "
+                             f"жестов {count}")
+        runner = self.camera.runner
+        lines += [
+            "",
+            "Макросов выполнено: {done}, отменено: {cancelled}, пропущено: {dropped}, "
+            "ошибок: {error}".format(**runner.counters),
+        ]
+        if runner.latencies:
+            lines.append(f"Задержка до первого нажатия: p50 {runner.latency_ms(50):.1f} мс, "
+                         f"p95 {runner.latency_ms(95):.1f} мс")
+        snapshot = self.camera.metrics.snapshot()
+        if snapshot["stages"]:
+            lines += ["", f"Этапы (мс, последние {self.camera.metrics.window} кадров), "
+                          f"{snapshot['fps']:.1f} кадров/с:"]
+            for stage in STAGES:
+                stats = snapshot["stages"].get(stage)
+                if stats is not None:
+                    lines.append(f"  {stage}: p50 {stats['p50_ms']:.2f}, p95 {stats['p95_ms']:.2f}, "
+                                 f"p99 {stats['p99_ms']:.2f}")
+        QMessageBox.information(self, "Настройки", "\n".join(lines))
+
+    def _on_focus_changed(self, app):  # из потока FocusWatcher
+        profile = ConfigManager.switch_app(app)
+        if profile is not None:
+            self.profile_changed.emit(profile)
+
+    def _on_profile_changed(self, profile):
+        self.profile_label.setText(f"Профиль: {profile}")
+        self.status_bar.showMessage(f"Профиль: {profile} ({ConfigManager.active_app or '-'})")
+
+    def toggle_overlay(self, checked):
+        self.camera.view.show_overlay = checked
+        self.camera.view.update()
 
     def update_status(self, message):  # Обычный метод без сигналов
         self.status_bar.showMessage(message)
 
+    def _on_macro_event(self, event, name, detail):
+        if event == EVENT_STARTED:
+            message = f"Выполняется: {name}"
+        elif event == EVENT_DONE:
+            message = f"Выполнено: {name}"
+        elif event == EVENT_CANCELLED:
+            message = f"Отменено: {name}"
+        elif event == EVENT_DROPPED:
+            message = f"Пропущено ({detail}): {name}"
+        elif event == EVENT_EXITED:
+            message = f"Команда '{name}': {detail}"
+            self.command_log.appendPlainText(f"{name}: {detail}")
+        else:
+            message = f"Ошибка: {detail}"
+        self.status_bar.showMessage(message)
+        self.update_commands_label()
+
     def closeEvent(self, event):
+        self._closing = True
+        if self.loader.isRunning():
+            self.loader.wait(5000)
+        if self.cancel_hotkey is not None:
+            self.cancel_hotkey.stop()
+        self.focus.stop()
+        ConfigManager.on_change = None
+        ConfigManager.on_error = None
+        self.camera.runner.stop(timeout=1.0)
+        self.processes.on_output = None
+        self.processes.close()
         self.camera.stop()
+        HandDetector.close_shared()
         event.accept()
 
 
@@ -517,27 +1093,33 @@ class AddGestureDialog(QDialog):
         if not name:
             QMessageBox.warning(self, "Ошибка", "Пожалуйста, введите название жеста")
             return
-        recorder = GestureRecorder(self, self.name_input.text())
+        if self.parent().loading:
+            QMessageBox.warning(self, "Ошибка", "Камера ещё открывается, попробуйте через пару секунд")
+            return
+        recorder = GestureRecorder(self, self.name_input.text(), self.parent().camera)
         recorder.finished.connect(self._handle_recorder_close)
         recorder.open()
 
     def _handle_recorder_close(self, result):
-        if result == QDialog.Accepted:
-            # Принудительное обновление таблицы
-            self.parent().update_macros_table()
-            # Явный перезапуск камеры
-            QTimer.singleShot(200, self.parent().camera.start)
         self.show()
 
 
 
 class GestureRecorder(QDialog):
-    def __init__(self, parent, name):
+    def __init__(self, parent, name, camera):
         super().__init__(parent)
         self.name = name
         self.signature = None
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
+        self.motion = None  # MotionTemplate, если записано движение
+        self.motion_frames = None  # (время, признаки) во время записи движения
+        # Кадры идут из камеры главного окна: устройство не открывается заново
+        self.camera = camera
+        self.subscribed = False
+
+        # Камера не открылась при запуске (StartupLoader уже завершён) - ещё одна попытка
+        if not camera.running:
+            camera.start()
+        if not camera.running:
             QMessageBox.critical(self, "Ошибка", "Не удалось открыть камеру")
             self.reject()
             return
@@ -548,16 +1130,14 @@ class GestureRecorder(QDialog):
         self.setFixedSize(640, 480)
 
         self.init_ui()
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)
+        # Пока идёт запись, показанные жесты не запускают макросы
+        camera.subscribe(self.update_frame, self.camera_view, hold_macros=True)
+        self.subscribed = True
 
     def init_ui(self):
         layout = QVBoxLayout()
 
-        self.camera_label = QLabel()
-        self.camera_label.setAlignment(Qt.AlignCenter)
-        self.camera_label.setStyleSheet("background-color: black;")
+        self.camera_view = VideoView()
 
         self.status_label = QLabel("Покажите жест камере")
         self.status_label.setAlignment(Qt.AlignCenter)
@@ -574,6 +1154,16 @@ class GestureRecorder(QDialog):
         """)
         save_btn.clicked.connect(self.save_gesture)
 
+        self.motion_btn = QPushButton("Записать движение")
+        self.motion_btn.setStyleSheet("""
+            background-color: #3C3C3C;
+            color: white;
+            padding: 10px;
+            font-size: 14px;
+            border-radius: 4px;
+        """)
+        self.motion_btn.clicked.connect(self.toggle_motion_recording)
+
         cancel_btn = QPushButton("Отмена")
         cancel_btn.setStyleSheet("""
             background-color: #5E1E1E;
@@ -585,104 +1175,90 @@ class GestureRecorder(QDialog):
         cancel_btn.clicked.connect(self.reject)
 
         btn_layout.addWidget(save_btn)
+        btn_layout.addWidget(self.motion_btn)
         btn_layout.addWidget(cancel_btn)
 
-        layout.addWidget(self.camera_label)
+        layout.addWidget(self.camera_view)
         layout.addWidget(self.status_label)
         layout.addLayout(btn_layout)
 
         self.setLayout(layout)
 
-    def update_frame(self):
-        ret, frame = self.cap.read()
-        if not ret:
+    def update_frame(self, result):
+        if self.motion_frames is not None:
+            if result.points is not None:
+                self.motion_frames.append((result.timestamp, frame_features(result.points)))
+        elif result.signature and self.motion is None:
+            self.signature = result.signature
+            self.status_label.setText("Жест распознан! Нажмите 'Сохранить'")
+
+        if result.display is not None and self.camera_view.is_showing():
+            self.camera_view.set_frame(result.display)
+
+    def toggle_motion_recording(self):
+        # Первое нажатие начинает запись траектории, второе - заканчивает
+        if self.motion_frames is None:
+            self.motion_frames = []
+            self.motion = None
+            self.motion_btn.setText("Остановить")
+            self.status_label.setText("Выполните движение и нажмите 'Остановить'")
             return
 
-        frame = cv2.flip(frame, 1)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-        with mp_hands.Hands(
-                max_num_hands=1,
-                model_complexity=0,
-                min_detection_confidence=0.7,
-                min_tracking_confidence=0.7) as hands:
-
-            results = hands.process(rgb_frame)
-
-            if results.multi_hand_landmarks:
-                landmarks = results.multi_hand_landmarks[0].landmark
-                fingers = GestureRecognizer.fingers_up(landmarks)
-                self.signature = GestureRecognizer.get_signature(fingers)
-
-                mp_drawing.draw_landmarks(
-                    frame,
-                    results.multi_hand_landmarks[0],
-                    mp_hands.HAND_CONNECTIONS,
-                    mp_drawing_styles.get_default_hand_landmarks_style(),
-                    mp_drawing_styles.get_default_hand_connections_style()
-                )
-
-                self.status_label.setText("Жест распознан! Нажмите 'Сохранить'")
-
-        h, w, ch = frame.shape
-        bytes_per_line = ch * w
-        q_img = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(q_img)
-        self.camera_label.setPixmap(pixmap.scaled(
-            self.camera_label.size(), Qt.KeepAspectRatio))
+        frames, self.motion_frames = self.motion_frames, None
+        self.motion_btn.setText("Записать движение")
+        self.motion = MotionTemplate.from_recording(
+            [t for t, _ in frames], [f for _, f in frames]) if frames else None
+        if self.motion is None:
+            self.status_label.setText(
+                "Движение не распознано (нужно не дольше "
+                f"{MotionTemplate.max_duration:g} с), попробуйте ещё раз")
+        else:
+            self.status_label.setText(
+                f"Движение записано ({self.motion.duration:.1f} с). Нажмите 'Сохранить'")
 
     def save_gesture(self):
-        if not self.signature:
+        if self.motion_frames is not None:
+            self.toggle_motion_recording()
+        if not self.signature and self.motion is None:
             QMessageBox.warning(self, "Ошибка", "Жест не распознан")
             return
 
-        config = ConfigManager.load()
-        if self.signature in config:
+        keys = ConfigManager.keys()
+        if self.motion is not None:
+            self.signature = ConfigManager.next_key(keys, "motion")
+        elif self.signature in keys:
             QMessageBox.warning(self, "Ошибка", "Этот жест уже существует")
             return
 
         # Сразу создаем запись с пустыми действиями
-        config[self.signature] = {
+        entry = {
             "name": self.name,
             "actions": ["# Добавьте действия через EditMacroDialog"]
         }
-        ConfigManager.save(config)
+        if self.motion is not None:
+            entry["motion"] = self.motion.to_dict()
+        ConfigManager.put(self.signature, entry)
         
         dialog = EditMacroDialog(self, self.signature, self.name)
         if dialog.exec_() == QDialog.Accepted:
             self.accept()
         else:
             # Удаляем временную запись если пользователь отменил редактирование
-            del config[self.signature]
-            ConfigManager.save(config)
+            ConfigManager.delete(self.signature)
 
-    def _restart_camera(self):
-        try:
-            self.parent().camera.stop()
-            time.sleep(0.3)
-            self.parent().camera.start()
-        except Exception as e:
-            print(f"Camera restart failed: {str(e)}")
+    def _stop_capture(self):
+        # Камера остаётся открытой: главное окно продолжает распознавание
+        if self.subscribed:
+            self.camera.unsubscribe(self.update_frame)
+            self.subscribed = False
+
+    def done(self, result):
+        self._stop_capture()
+        super().done(result)
 
     def closeEvent(self, event):
-        try:
-            self.cap.release()
-        except:
-            pass
-        
-        # Явный перезапуск камеры с проверкой
-        if self.parent() and hasattr(self.parent(), 'camera'):
-            QTimer.singleShot(100, self._safe_restart)
-        
+        self._stop_capture()
         event.accept()
-    
-    def _safe_restart(self):
-        try:
-            self.parent().camera.stop()
-            time.sleep(0.3)
-            self.parent().camera.start()
-        except Exception as e:
-            print(f"Camera restart error: {str(e)}")
 
 class EditMacroDialog(QDialog):
     def __init__(self, parent, signature, name):
@@ -734,9 +1310,9 @@ class EditMacroDialog(QDialog):
         """)
 
         # Load existing actions if editing
-        config = ConfigManager.load()
-        if self.signature in config:
-            self.actions_edit.setPlainText("\n".join(config[self.signature]["actions"]))
+        entry = ConfigManager.entry(self.signature)
+        if entry is not None:
+            self.actions_edit.setPlainText("\n".join(entry["actions"]))
 
         # Help button
         help_btn = QPushButton("Справка по командам")
@@ -788,8 +1364,8 @@ class EditMacroDialog(QDialog):
 STRING: <текст> - Напечатать текст
   Пример: STRING: Привет, мир!
 
-KEY: <клавиша> - Нажать клавишу
-  Примеры: KEY: ctrl+c, KEY: alt+f4
+KEY: <клавиша> - Нажать клавишу или сочетание
+  Примеры: KEY: enter, KEY: ctrl+c, KEY: ctrl+shift+esc, KEY: alt+f4
 
 OPEN: <URL> - Открыть веб-страницу
   Пример: OPEN: https://google.com
@@ -815,13 +1391,17 @@ CMD: <команда> - Выполнить команду
             QMessageBox.warning(self, "Ошибка", "Пожалуйста, введите хотя бы одно действие")
             return
 
-        config = ConfigManager.load()
-        config[self.signature] = {
-            "name": name,
-            "actions": valid_actions
-        }
-        ConfigManager.save(config)
-        self.accept()
+        try:
+            MacroCompiler.compile(valid_actions)
+        except MacroCompileError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+            return
+
+        # Сохраняем прочие поля записи (например, настройки trigger)
+        entry = ConfigManager.entry(self.signature) or {}
+        entry.update(name=name, actions=valid_actions)
+        if ConfigManager.put(self.signature, entry):
+            self.accept()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,196 @@
+import ctypes
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+
+def app_key(name):
+    # "C:\\...\\Firefox.exe", "firefox", "Firefox.app" -> "firefox"
+    if not name:
+        return None
+    name = os.path.basename(name.strip().rstrip("/\\")).lower()
+    for suffix in (".exe", ".app"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name or None
+
+
+class NullFocus:
+    # Активное окно не определяется (Wayland, нет xprop): всегда базовый профиль
+    name = "none"
+
+    def active_app(self):
+        return None
+
+
+class MockFocus:
+    # Активное приложение задаётся вручную: тесты, бенчмарки и запуск без
+    # дисплея ("--focus mock:firefox" в CLI)
+    name = "mock"
+
+    def __init__(self, app=None):
+        self.app = app_key(app)
+
+    def set(self, app):
+        self.app = app_key(app)
+
+    def active_app(self):
+        return self.app
+
+
+class X11Focus:
+    # Окно из _NET_ACTIVE_WINDOW, приложение - имя процесса по _NET_WM_PID,
+    # иначе класс окна (WM_CLASS)
+    name = "x11"
+
+    def active_app(self):
+        out = self._xprop("-root", "_NET_ACTIVE_WINDOW")
+        window = out.split()[-1] if out else ""
+        if not window.startswith("0x") or int(window, 16) == 0:
+            return None
+        out = self._xprop("-id", window, "_NET_WM_PID", "WM_CLASS")
+        wm_class = None
+        for line in out.splitlines():
+            if line.startswith("_NET_WM_PID") and "=" in line:
+                try:
+                    with open(f"/proc/{int(line.split('=')[1])}/comm", encoding="utf-8") as f:
+                        return app_key(f.read())
+                except (OSError, ValueError):
+                    pass
+            elif line.startswith("WM_CLASS") and "=" in line:
+                parts = [part.strip().strip('"') for part in line.split("=", 1)[1].split(",")]
+                wm_class = parts[-1]
+        return app_key(wm_class)
+
+    @staticmethod
+    def _xprop(*args):
+        return subprocess.run(["xprop"] + list(args), stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, universal_newlines=True,
+                              timeout=1).stdout
+
+
+class WindowsFocus:
+    # GetForegroundWindow -> процесс -> имя исполняемого файла
+    name = "windows"
+
+    def __init__(self):
+        from ctypes import wintypes
+
+        self._user32 = ctypes.windll.user32
+        self._kernel32 = ctypes.windll.kernel32
+        self._wintypes = wintypes
+
+    def active_app(self):
+        wintypes = self._wintypes
+        hwnd = self._user32.GetForegroundWindow()
+        if not hwnd:
+            return None
+        pid = wintypes.DWORD()
+        self._user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        # PROCESS_QUERY_LIMITED_INFORMATION
+        handle = self._kernel32.OpenProcess(0x1000, False, pid.value)
+        if not handle:
+            return None
+        try:
+            size = wintypes.DWORD(260)
+            buffer = ctypes.create_unicode_buffer(size.value)
+            query = self._kernel32.QueryFullProcessImageNameW
+            if not query(handle, 0, buffer, ctypes.byref(size)):
+                return None
+            return app_key(buffer.value)
+        finally:
+            self._kernel32.CloseHandle(handle)
+
+
+class MacFocus:
+    # NSWorkspace (pyobjc), если установлен, иначе AppleScript
+    name = "macos"
+
+    def __init__(self):
+        try:
+            from AppKit import NSWorkspace
+
+            self._workspace = NSWorkspace.sharedWorkspace()
+        except ImportError:
+            self._workspace = None
+
+    def active_app(self):
+        if self._workspace is not None:
+            app = self._workspace.frontmostApplication()
+            return app_key(app.localizedName()) if app is not None else None
+        script = ('tell application "System Events" to get name of first application '
+                  'process whose frontmost is true')
+        out = subprocess.run(["osascript", "-e", script], stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, universal_newlines=True, timeout=1).stdout
+        return app_key(out)
+
+
+def detect_focus_backend(spec="auto"):
+    # "auto" - по платформе, "none" - без переключения, "mock[:приложение]"
+    if spec == "none":
+        return NullFocus()
+    if spec.startswith("mock"):
+        return MockFocus(spec.partition(":")[2] or None)
+    try:
+        if sys.platform == "win32":
+            return WindowsFocus()
+        if sys.platform == "darwin":
+            return MacFocus()
+        if os.environ.get("DISPLAY") and shutil.which("xprop"):
+            return X11Focus()
+    except Exception as e:
+        print(f"Ошибка определения активного окна: {str(e)}")
+    return NullFocus()
+
+
+class FocusWatcher:
+    # Опрашивает backend в своём потоке и вызывает on_change(приложение)
+    # только при смене активного приложения; кадры не ждут определения окна
+    interval = 0.25
+
+    def __init__(self, backend, on_change, interval=None):
+        self.backend = backend
+        self.on_change = on_change
+        self.interval = interval or self.interval
+        self.app = None
+        self._failing = False  # ошибка backend печатается один раз, а не каждый опрос
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if isinstance(self.backend, NullFocus):
+            return self
+        self._thread = threading.Thread(target=self._run, name="FocusWatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def poll(self):
+        try:
+            app = self.backend.active_app()
+        except Exception as e:
+            if not self._failing:
+                print(f"Ошибка определения активного окна: {str(e) or type(e).__name__}")
+            self._failing = True
+            return False
+        self._failing = False
+        if app == self.app:
+            return False
+        self.app = app
+        try:
+            self.on_change(app)
+        except Exception as e:
+            print(f"Ошибка переключения профиля: {str(e)}")
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.interval)
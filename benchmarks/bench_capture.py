@@ -0,0 +1,192 @@
+# Захват с камеры при медленном потребителе: возраст кадра к моменту
+# обработки с чтением по очереди и в режиме latest (CaptureSettings.latest),
+# при разном числе буферов драйвера. Без --device камера моделируется:
+# кадры приходят с частотой --fps в буфер на --buffers кадров, а когда он
+# полон, новые кадры теряются (так ведёт себя uvcvideo). Кадры берутся из
+# видеофайла или генерируются. С --device (номер или /dev/videoN, например
+# v4l2loopback, в который ffmpeg -re пишет видео) печатаются согласованные
+# параметры, а возраст кадра считается по метке времени буфера V4L2.
+# Запуск: python benchmarks/bench_capture.py [video.mp4] [--work 0.05] [--device /dev/video10]
+import argparse
+import collections
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from frame_sources import CameraSource, CaptureSettings
+
+
+class BufferedCapture:
+    # Интерфейс cv2.VideoCapture: grab ждёт кадра из буфера, retrieve отдаёт его
+    def __init__(self, frames, fps, buffers):
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.props = {cv2.CAP_PROP_FPS: fps, cv2.CAP_PROP_BUFFERSIZE: buffers,
+                      cv2.CAP_PROP_FRAME_WIDTH: frames[0].shape[1],
+                      cv2.CAP_PROP_FRAME_HEIGHT: frames[0].shape[0],
+                      cv2.CAP_PROP_FOURCC: cv2.VideoWriter_fourcc(*"YUYV")}
+        self.buffer = collections.deque()
+        self.lost = 0
+        self.captured_at = None  # время съёмки последнего grab
+        self._frame = None
+        self._ready = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        due, i = time.monotonic(), 0
+        while not self._stop.is_set():
+            due += self.interval
+            time.sleep(max(0.0, due - time.monotonic()))
+            with self._ready:
+                if len(self.buffer) >= self.props[cv2.CAP_PROP_BUFFERSIZE]:
+                    self.lost += 1
+                else:
+                    self.buffer.append((time.monotonic(), self.frames[i % len(self.frames)]))
+                    self._ready.notify()
+            i += 1
+
+    def isOpened(self):
+        return not self._stop.is_set()
+
+    def set(self, prop, value):
+        # Формат и размер модель не меняет, частоту и буфер - принимает
+        if prop in (cv2.CAP_PROP_FPS, cv2.CAP_PROP_BUFFERSIZE):
+            self.props[prop] = value
+            if prop == cv2.CAP_PROP_FPS:
+                self.interval = 1.0 / value
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0)
+
+    def getBackendName(self):
+        return "SIM"
+
+    def grab(self):
+        with self._ready:
+            while not self.buffer:
+                if not self._ready.wait(1.0):
+                    return False
+            self.captured_at, self._frame = self.buffer.popleft()
+        return True
+
+    def retrieve(self):
+        return True, self._frame.copy()
+
+    def read(self):
+        return self.grab() and self.retrieve()
+
+    def release(self):
+        self._stop.set()
+
+
+class SimulatedCamera(CameraSource):
+    def __init__(self, frames, settings):
+        self.frames = frames
+        super().__init__(0, backend=cv2.CAP_ANY, settings=settings)
+
+    def _open(self, index, backend):
+        return BufferedCapture(self.frames, self.settings.fps, 4)
+
+
+def load_frames(path, limit=150):
+    if path is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(8)]
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        sys.exit(f"Не удалось прочитать кадры: {path}")
+    return frames
+
+
+def consume(source, work, duration, age_of):
+    # Потребитель медленнее камеры: каждый кадр "обрабатывается" work секунд
+    ages = []
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        ok, frame, timestamp = source.read_timed()
+        if not ok:
+            continue
+        age = age_of(source, timestamp)
+        if age is not None:
+            ages.append(age)
+        time.sleep(work)
+    ages.sort()
+    return ages
+
+
+def report(label, source, ages, duration):
+    if not ages:
+        print(f"{label:<24} нет кадров")
+        return
+    print(f"{label:<24} {len(ages) / duration:6.1f} кадров/с  возраст p50 "
+          f"{ages[len(ages) // 2] * 1000:6.1f} мс, max {ages[-1] * 1000:6.1f} мс, "
+          f"отброшено {source.stale}")
+
+
+def v4l2_age(source, timestamp):
+    # Метка буфера V4L2 (CAP_PROP_POS_MSEC) - по CLOCK_MONOTONIC, как time.monotonic()
+    stamp = source.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+    age = time.monotonic() - stamp
+    return age if 0 <= age < 10 else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("video", nargs="?", help="видео для модели камеры (по умолчанию шум)")
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--work", type=float, default=0.05,
+                        help="время обработки кадра потребителем, секунд")
+    parser.add_argument("--duration", type=float, default=3)
+    parser.add_argument("--device", help="настоящая камера: номер или /dev/videoN")
+    parser.add_argument("--size", default="640x480")
+    parser.add_argument("--format", default="auto")
+    args = parser.parse_args()
+
+    width, height = map(int, args.size.split("x"))
+    if args.device is not None:
+        device = int(args.device) if args.device.isdigit() else args.device
+        for buffers in (4, 1):
+            for latest in (False, True):
+                settings = CaptureSettings(width, height, args.fps, args.format, buffers,
+                                           latest=latest)
+                with CameraSource(device, settings=settings) as source:
+                    if not source.isOpened():
+                        sys.exit(f"Не удалось открыть камеру: {args.device}")
+                    print(f"запрошено {settings.describe()}, latest={latest}")
+                    print(f"  получено: {source.describe()}")
+                    ages = consume(source, args.work, args.duration, v4l2_age)
+                    report("  чтение", source, ages, args.duration)
+        return
+
+    frames = load_frames(args.video)
+    print(f"Модель камеры: {args.fps:g} кадров/с, обработка кадра {args.work * 1000:.0f} мс")
+    sim_age = lambda source, timestamp: time.monotonic() - source.cap.captured_at
+    for buffers in (4, 1):
+        for latest in (False, True):
+            settings = CaptureSettings(width, height, args.fps, args.format, buffers,
+                                       latest=latest)
+            with SimulatedCamera(frames, settings) as source:
+                time.sleep(0.2)  # буфер успевает заполниться, как после открытия камеры
+                ages = consume(source, args.work, args.duration, sim_age)
+                mode = "latest" if latest else "по очереди"
+                report(f"буфер {buffers}, {mode}", source, ages, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Запуск команд CMD: через ProcessManager:
+#   launch - сколько поток макросов занят запуском (argv напрямую против оболочки)
+#   exit   - от запуска до получения кода возврата
+# и сколько процессов-зомби оставляет старый Popen без ожидания (только POSIX).
+# Запуск: python benchmarks/bench_commands.py [--runs 200] [--command "true"]
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_manager import ProcessManager
+
+
+def measure(manager, command, runs):
+    launches, exits = [], []
+    for _ in range(runs):
+        finished = threading.Event()
+        start = time.perf_counter()
+        manager.launch(command, on_exit=lambda job: finished.set())
+        launches.append(time.perf_counter() - start)
+        finished.wait()
+        exits.append(time.perf_counter() - start)
+    return launches, exits
+
+
+def zombies():
+    if os.name != "posix":
+        return None
+    out = subprocess.run(["ps", "-o", "stat=", "--ppid", str(os.getpid())],
+                         stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return sum(line.startswith("Z") for line in out.split())
+
+
+def summary(values):
+    values = sorted(values)
+    p99 = values[min(len(values) - 1, int(0.99 * len(values)))]
+    return f"{sum(values) / len(values) * 1000:8.2f} {values[len(values) // 2] * 1000:8.2f} " \
+           f"{p99 * 1000:8.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--command", default="true")
+    args = parser.parse_args()
+
+    manager = ProcessManager()
+    argv = tuple(args.command.split())
+    print(f"{'':<16} {'mean':>8} {'p50':>8} {'p99':>8}  (мс)")
+    for name, command in (("argv", (args.command, argv)), ("оболочка", (args.command, None))):
+        launches, exits = measure(manager, command, args.runs)
+        print(f"{name + ' launch':<16} {summary(launches)}")
+        print(f"{name + ' exit':<16} {summary(exits)}")
+
+    managed = zombies()
+    if os.name == "posix":
+        # Старый _run_command: Popen без wait, процесс остаётся зомби до выхода
+        children = [subprocess.Popen(argv) for _ in range(min(args.runs, 50))]
+        time.sleep(0.5)
+        print(f"Зомби после {len(children)} запусков: Popen без ожидания {zombies()}, "
+              f"ProcessManager {managed}")
+        for child in children:
+            child.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
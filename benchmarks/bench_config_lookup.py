@@ -0,0 +1,70 @@
+# Поиск жестов в конфиге на 10k записей: чтение JSON на каждый поиск
+# (старое поведение) против кеша ConfigManager.
+# Запуск: python benchmarks/bench_config_lookup.py [--entries 10000] [--seconds 2]
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_manager import ConfigManager
+
+
+def make_config(entries):
+    config = {}
+    for i in range(entries):
+        config[format(i, "016b")] = {
+            "name": f"macro {i}",
+            "actions": ["KEY: enter", "WAIT: 0.1", f"STRING: payload {i}"],
+        }
+    return config
+
+
+def run_for(seconds, lookup, signatures):
+    count = hits = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for sig in signatures:
+            hits += lookup(sig) is not None
+        count += len(signatures)
+    return count / seconds, hits
+
+
+def uncached_lookup(path):
+    def lookup(signature):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get(signature)
+    return lookup
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    config = make_config(args.entries)
+    signatures = random.Random(0).sample(list(config), 100) + ["missing"] * 10
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ConfigManager.path = os.path.join(tmp, "config.json")
+        ConfigManager.invalidate()
+
+        start = time.perf_counter()
+        ConfigManager.save(config)
+        print(f"save ({args.entries} записей): {(time.perf_counter() - start) * 1000:.1f} мс")
+
+        rate, _ = run_for(args.seconds, uncached_lookup(ConfigManager.path), signatures[:5])
+        print(f"before (json.load на каждый поиск): {rate:12,.0f} поисков/с")
+
+        ConfigManager.invalidate()
+        rate, _ = run_for(args.seconds, ConfigManager.lookup, signatures)
+        print(f"after  (ConfigManager.lookup):      {rate:12,.0f} поисков/с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Сравнение FPS: новый mp_hands.Hands на каждый кадр против общего HandDetector.
+# Запуск: python benchmarks/bench_hand_tracking.py recording.mp4 [--frames 300]
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hand_tracking import HandDetector, load_mediapipe
+
+
+def read_frames(path, limit):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Не удалось открыть видео: {path}")
+    frames = []
+    while len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB))
+    cap.release()
+    if not frames:
+        raise SystemExit("В видео нет кадров")
+    return frames
+
+
+def bench_per_frame_session(frames):
+    mp_hands = load_mediapipe().hands
+    detected = 0
+    start = time.perf_counter()
+    for rgb in frames:
+        with mp_hands.Hands(
+                max_num_hands=1,
+                model_complexity=0,
+                min_detection_confidence=0.7,
+                min_tracking_confidence=0.7) as hands:
+            results = hands.process(rgb)
+        detected += bool(results.multi_hand_landmarks)
+    return time.perf_counter() - start, detected
+
+
+def bench_persistent_detector(frames):
+    detected = 0
+    with HandDetector() as detector:
+        start = time.perf_counter()
+        for rgb in frames:
+            results = detector.process(rgb)
+            detected += bool(results.multi_hand_landmarks)
+        return time.perf_counter() - start, detected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("video")
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    print(f"Кадров: {len(frames)}, размер: {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    for title, bench in (("before (Hands на каждый кадр)", bench_per_frame_session),
+                         ("after  (общий HandDetector)", bench_persistent_detector)):
+        elapsed, detected = bench(frames)
+        print(f"{title}: {len(frames) / elapsed:7.1f} FPS, "
+              f"{elapsed * 1000 / len(frames):6.2f} мс/кадр, рука в {detected} кадрах")
+
+
+if __name__ == "__main__":
+    main()
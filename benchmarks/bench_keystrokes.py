@@ -0,0 +1,70 @@
+# Пропускная способность ввода KeystrokeEngine (символов в секунду) для
+# STRING: разной длины:
+#   batch   - строка целиком одним вызовом клавиатуры (key_delay=0, по умолчанию)
+#   per-key - посимвольно, как при key_delay > 0 (сами паузы не выдерживаются)
+#   paste   - через буфер обмена и Ctrl+V (paste_over)
+# и аккорды KEY: в секунду. По умолчанию клавиатура - keystrokes.MockKeyboard,
+# так что замер идёт без дисплея; --backend pynput вводит в активное окно.
+# Запуск: python benchmarks/bench_keystrokes.py [--lengths 10 100 1000] [--backend mock]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keystrokes import KeystrokeEngine, MockKeyboard, TypingSettings, parse_chord
+
+
+def no_sleep(seconds):
+    return False
+
+
+def rate(func, units, min_time=0.2):
+    runs, start = 0, time.perf_counter()
+    while True:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return runs * units / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--backend", choices=("mock", "pynput"), default="mock")
+    args = parser.parse_args()
+
+    if args.backend == "pynput":
+        from keystrokes import PynputKeyboard, SystemClipboard
+        from macros import get_keyboard
+        engine = KeystrokeEngine(PynputKeyboard(get_keyboard()), SystemClipboard())
+    else:
+        mock = MockKeyboard()
+        engine = KeystrokeEngine(mock, mock)
+
+    modes = (
+        ("batch", TypingSettings()),
+        ("per-key", TypingSettings(key_delay=1e-9)),
+        ("paste", TypingSettings(paste_over=1)),
+    )
+    print(f"{'длина':>7} " + " ".join(f"{name:>14}" for name, _ in modes) + "  (символов/с)")
+    for length in args.lengths:
+        text = ("Привет, мир! hello world\n" * (length // 25 + 1))[:length]
+        rates = [rate(lambda: engine.type_text(text, settings, no_sleep), length)
+                 for _, settings in modes]
+        print(f"{length:>7} " + " ".join(f"{value:14,.0f}" for value in rates))
+
+    chord = parse_chord("ctrl+shift+esc")
+    chords = rate(lambda: engine.press_chord(chord, TypingSettings(), no_sleep), 1)
+    parses = rate(lambda: parse_chord("ctrl+shift+esc"), 1)
+    print(f"KEY: ctrl+shift+esc - {chords:,.0f} аккордов/с (разбор один раз при "
+          f"компиляции, {1e6 / parses:.2f} мкс)")
+    print("Прежний MacroExecutor: пауза 0.05 с после каждого действия - не больше "
+          "20 действий/с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
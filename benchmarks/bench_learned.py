@@ -0,0 +1,100 @@
+# Классификатор выученных жестов (gesture_learning.LearnedGestures):
+#   classify - время распознавания одного кадра при 100..1000 жестах по --samples образцов
+#   load     - загрузка индекса из .npz
+#   точность - доля верно узнанных кадров с новым шумом, поворотом и масштабом,
+#              отказ - доля отвергнутых кадров с позами, которых нет в индексе
+# Позы синтетические: случайные углы сгиба суставов пальцев.
+# Запуск: python benchmarks/bench_learned.py [--gestures 100 300 1000] [--samples 40]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gesture_learning import LearnedGestures
+
+FINGERS = ((1, (0.42, 0.83)), (5, (0.45, 0.62)), (9, (0.5, 0.6)), (13, (0.55, 0.62)),
+           (17, (0.6, 0.66)))
+BONES = (0.08, 0.05, 0.04)
+
+
+def random_pose(rng):
+    # Углы сгиба трёх суставов каждого пальца и разворот большого пальца
+    return rng.uniform(0, np.radians(90), (5, 3)), rng.uniform(-0.6, 0.2)
+
+
+def hand(pose, rng, noise=0.004):
+    bends, thumb = pose
+    points = np.zeros((21, 3))
+    points[0] = (0.5, 0.9, 0)
+    for finger, (base, (x, y)) in enumerate(FINGERS):
+        points[base] = (x, y, 0)
+        heading = thumb if finger == 0 else 0.0
+        for joint in range(3):
+            heading_z = bends[finger, joint] * (joint + 1) / 2
+            direction = np.array([np.sin(heading), -np.cos(heading) * np.cos(heading_z),
+                                  -np.sin(heading_z)])
+            points[base + joint + 1] = points[base + joint] + direction * BONES[joint]
+    # Случайные поворот в плоскости кадра, масштаб и положение
+    angle, scale = rng.uniform(-0.5, 0.5), rng.uniform(0.6, 1.4)
+    c, s = np.cos(angle), np.sin(angle)
+    centered = points - points.mean(axis=0)
+    centered[:, :2] = centered[:, :2] @ np.array([[c, -s], [s, c]]).T
+    shift = np.r_[rng.uniform(0.3, 0.7, 2), 0]
+    return (centered * scale + shift + rng.normal(0, noise, points.shape)).astype(np.float32)
+
+
+def build(rng, gestures, samples):
+    poses = [random_pose(rng) for _ in range(gestures)]
+    store = LearnedGestures()
+    for i, pose in enumerate(poses):
+        store.add(f"learned-{i + 1}", [hand(pose, rng) for _ in range(samples)])
+    return store, poses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gestures", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--samples", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'жестов':>7} {'образцов':>9} {'mean':>8} {'p99':>8} (мкс)  "
+          f"{'загрузка':>9}  точность  отказ")
+    for gestures in args.gestures:
+        store, poses = build(rng, gestures, args.samples)
+        owners = rng.integers(0, gestures, args.queries)
+        queries = [hand(poses[i], rng) for i in owners]
+        unknown = [hand(random_pose(rng), rng) for _ in range(args.queries // 4)]
+
+        store.classify(queries[0], "R")  # первый вызов строит индекс и пороги
+        timings, correct = [], 0
+        clock = time.perf_counter
+        for owner, points in zip(owners, queries):
+            start = clock()
+            key, _ = store.classify(points, "R")
+            timings.append(clock() - start)
+            correct += key == f"learned-{owner + 1}"
+        rejected = sum(store.classify(points, "R")[0] is None for points in unknown)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "learned.npz")
+            store.save(path)
+            start = clock()
+            LearnedGestures(path).load()
+            load_ms = (clock() - start) * 1000
+
+        timings = np.array(timings) * 1e6
+        print(f"{gestures:>7} {len(store):>9} {timings.mean():8.1f} "
+              f"{np.percentile(timings, 99):8.1f}        {load_ms:7.1f} мс  "
+              f"{correct / len(queries):8.1%} {rejected / len(unknown):6.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
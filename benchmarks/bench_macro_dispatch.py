@@ -0,0 +1,83 @@
+# Накладные расходы на одно действие макроса: разбор строк при каждом
+# запуске (старый MacroExecutor) против заранее скомпилированной программы.
+# Клавиатура подменяется заглушкой (keystrokes.MockKeyboard), pynput не нужен.
+# Запуск: python benchmarks/bench_macro_dispatch.py [--runs 20000]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import macros
+from keystrokes import KEY_NAMES, KeystrokeEngine, MockKeyboard
+from macros import MacroCompiler, MacroExecutor
+
+ACTIONS = [
+    "KEY: enter",
+    "STRING: hello",
+    "WAIT: 0",
+    "# комментарий",
+    "KEY: tab",
+    "просто текст",
+    "KEY: a",
+    "WAIT: 0.0",
+]
+
+
+def legacy_execute(actions, keyboard):
+    # Копия старого MacroExecutor.execute без time.sleep(0.05)
+    for action in actions:
+        action = action.strip()
+        if not action or action.startswith("#"):
+            continue
+        if action.startswith("STRING:"):
+            keyboard.type(action[7:])
+        elif action.startswith("KEY:"):
+            keyname = action[4:]
+            key = keyboard.key(keyname) if keyname in KEY_NAMES else keyname
+            keyboard.press(key)
+            keyboard.release(key)
+        elif action.startswith("WAIT:"):
+            try:
+                time.sleep(max(0, float(action[5:].strip())))
+            except:
+                pass
+        else:
+            keyboard.type(action)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20000)
+    args = parser.parse_args()
+
+    keyboard = MockKeyboard()
+    macros.keystroke_engine = KeystrokeEngine(keyboard)
+
+    program = MacroCompiler.compile(ACTIONS)
+    total = args.runs * len(program)
+
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        legacy_execute(ACTIONS, keyboard)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        MacroExecutor.execute(program)
+    compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        MacroCompiler.compile(ACTIONS)
+    compile_time = time.perf_counter() - start
+
+    print(f"Действий за прогон: {len(program)}, прогонов: {args.runs}")
+    print(f"before (разбор при запуске):  {legacy * 1e9 / total:8.0f} нс/действие")
+    print(f"after  (скомпилированный):    {compiled * 1e9 / total:8.0f} нс/действие")
+    print(f"компиляция (один раз на загрузку): {compile_time * 1e6 / args.runs:.1f} мкс/макрос")
+
+
+if __name__ == "__main__":
+    main()
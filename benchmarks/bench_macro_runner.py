@@ -0,0 +1,87 @@
+# Задержка от срабатывания жеста до первого нажатия макроса:
+#   thread - как было: новый threading.Thread на каждый макрос
+#   runner - MacroRunner: один рабочий поток и очередь
+# а также стоимость submit() для потока распознавания и время отмены макроса,
+# стоящего в WAIT. Клавиатура подменяется заглушкой (keystrokes.MockKeyboard).
+# Запуск: python benchmarks/bench_macro_runner.py [--macros 2000]
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import macros
+from keystrokes import KeystrokeEngine, MockKeyboard
+from macro_runner import MacroRunner
+from macros import MacroCompiler, MacroExecutor
+
+
+def percentiles(values):
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q / 100 * len(values)))] * 1e6
+    return f"{sum(values) / len(values) * 1e6:8.1f} {pick(50):8.1f} {pick(99):8.1f}"
+
+
+def bench_thread(macro, count):
+    latencies = []
+    for _ in range(count):
+        first = []
+        start = time.monotonic()
+        thread = threading.Thread(
+            target=MacroExecutor.execute,
+            args=(macro, None, lambda: first.append(time.monotonic() - start)), daemon=True)
+        thread.start()
+        thread.join()
+        latencies.append(first[0])
+    return latencies
+
+
+def bench_runner(macro, count):
+    runner = MacroRunner()
+    submits = []
+    for _ in range(count):
+        start = time.perf_counter()
+        runner.submit(macro)
+        submits.append(time.perf_counter() - start)
+        runner.wait()
+    runner.stop()
+    return list(runner.latencies), submits
+
+
+def bench_cancel(count):
+    runner = MacroRunner()
+    waiting = MacroCompiler.compile_macro("wait", {"actions": ["WAIT: 10"]})
+    timings = []
+    for _ in range(count):
+        runner.submit(waiting)
+        time.sleep(0.002)
+        start = time.perf_counter()
+        runner.cancel()
+        runner.wait()
+        timings.append(time.perf_counter() - start)
+    runner.stop()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--macros", type=int, default=2000)
+    args = parser.parse_args()
+
+    macros.keystroke_engine = KeystrokeEngine(MockKeyboard())
+    MacroRunner.latency_window = args.macros
+    macro = MacroCompiler.compile_macro("bench", {"actions": ["KEY: enter", "STRING: ok"]})
+
+    print(f"{'':<28} {'mean':>8} {'p50':>8} {'p99':>8}  (мкс)")
+    print(f"{'thread: до первого нажатия':<28} {percentiles(bench_thread(macro, args.macros))}")
+    latencies, submits = bench_runner(macro, args.macros)
+    print(f"{'runner: до первого нажатия':<28} {percentiles(latencies)}")
+    print(f"{'runner: submit()':<28} {percentiles(submits)}")
+    print(f"{'runner: отмена WAIT':<28} {percentiles(bench_cancel(min(args.macros, 200)))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# Таблица макросов главного окна на большом конфиге: прежняя перестройка
+# QTableWidget против MacroTableModel (полная загрузка, обновление одной
+# строки после правки, поиск через прокси, прокрутка на страницу с
+# перерисовкой). Qt работает offscreen, дисплей не нужен.
+# Запуск: python benchmarks/bench_macro_table.py [--entries 50000] [--config library.db]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QTableView, QTableWidget, QTableWidgetItem
+
+from config_manager import ConfigManager
+from GestureMacro import MacroFilterProxy, MacroTableModel
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def widget_rebuild(table):
+    # Как update_macros_table до перехода на модель
+    config = ConfigManager.load()
+    table.setRowCount(len(config))
+    for row, (sig, data) in enumerate(config.items()):
+        actions = data.get('actions', ['Нет действий'])
+        action_preview = actions[0][:50] + "..." if actions else "Нет действий"
+        table.setItem(row, 0, QTableWidgetItem(data['name']))
+        table.setItem(row, 1, QTableWidgetItem(sig))
+        table.setItem(row, 2, QTableWidgetItem(action_preview))
+    table.resizeColumnsToContents()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--config", default="config.json",
+                        help="имя файла конфига (.db - хранилище SQLite)")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    saved_path = ConfigManager.path
+    with tempfile.TemporaryDirectory() as tmp:
+        ConfigManager.path = os.path.join(tmp, args.config)
+        ConfigManager.invalidate()
+        ConfigManager.save({f"macro-{i}": {"name": f"macro {i}",
+                                           "actions": [f"STRING: payload {i}", "KEY: enter"]}
+                            for i in range(args.entries)})
+        try:
+            widget = QTableWidget()
+            widget.setColumnCount(3)
+            widget.resize(600, 500)
+            widget.show()
+            rebuild = timed(lambda: widget_rebuild(widget))
+            print(f"QTableWidget, перестройка:      {rebuild * 1000:8.1f} мс")
+            widget.close()
+
+            model = MacroTableModel()
+            proxy = MacroFilterProxy()
+            proxy.setSourceModel(model)
+            view = QTableView()
+            view.setModel(proxy)
+            view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+            view.setSortingEnabled(True)
+            view.resize(600, 500)
+            view.show()
+            app.processEvents()
+
+            def reload():
+                model.reload()
+                view.repaint()
+            print(f"MacroTableModel, загрузка:       {timed(reload) * 1000:8.1f} мс")
+            view.resizeColumnsToContents()
+            print(f"  перечитанный конфиг:          {timed(reload) * 1000:8.1f} мс")
+
+            key = f"macro-{args.entries // 2}"
+            view.selectRow(proxy.mapFromSource(model.index(model.row_of(key), 0)).row())
+            edits = []
+            for i in range(20):
+                ConfigManager.put(key, {"name": f"edited {i}", "actions": ["KEY: a"]})
+                edits.append(timed(lambda: (model.update_key(key), view.repaint())))
+            print(f"  правка одной строки:          {min(edits) * 1000:8.2f} мс "
+                  f"(+ ConfigManager.put)")
+            print(f"  выделение после правки:       "
+                  f"{view.selectionModel().selectedRows()[0].data(MacroTableModel.KEY_ROLE)}")
+
+            search = timed(lambda: (proxy.set_search("Macro 4999"), proxy.rowCount()))
+            print(f"  поиск \"Macro 4999\":           {search * 1000:8.1f} мс, "
+                  f"строк: {proxy.rowCount()}")
+            proxy.set_search("")
+            # Как GestureMacroApp._apply_search: выделение возвращается по ключу
+            view.selectRow(proxy.mapFromSource(model.index(model.row_of(key), 0)).row())
+            by_name = timed(lambda: (view.sortByColumn(0, Qt.DescendingOrder), view.repaint()))
+            print(f"  сортировка по названию:       {by_name * 1000:8.1f} мс, "
+                  f"выделение: {view.selectionModel().selectedRows()[0].data(MacroTableModel.KEY_ROLE)}")
+            view.sortByColumn(-1, Qt.AscendingOrder)
+
+            bar = view.verticalScrollBar()
+            bar.setValue(0)
+            page = bar.pageStep()
+            frames = []
+            for _ in range(100):
+                frames.append(timed(lambda: (bar.setValue(bar.value() + page), view.repaint())))
+            frames.sort()
+            print(f"  прокрутка на страницу:        p50 {frames[50] * 1000:.2f} мс, "
+                  f"max {frames[-1] * 1000:.2f} мс")
+            view.close()
+        finally:
+            ConfigManager.path = saved_path
+            ConfigManager.invalidate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Цена замеров StageMetrics: запись одной длительности (нс), снимок для
+# окна настроек/файла метрик и воспроизведение записи ландмарок через
+# FramePipeline с метриками и без (попеременно, лучший из --repeats прогонов).
+# Запуск: python benchmarks/bench_metrics.py recording.jsonl [--repeats 5]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_pipeline import FramePipeline
+from frame_sources import open_source
+from stage_metrics import StageMetrics
+
+
+def per_call(func, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs
+
+
+def replay(path, metrics):
+    source = open_source(path, False)
+    if not source.isOpened():
+        raise SystemExit(f"Не удалось открыть источник: {path}")
+    pipeline = FramePipeline(source, lossless=True, queue_size=4, metrics=metrics)
+    frames = 0
+    start = time.perf_counter()
+    pipeline.start()
+    for result in pipeline.iter_results():
+        if metrics is not None:
+            now = time.monotonic()
+            metrics.record("total", now - result.captured_at)
+            metrics.frame_done(now)
+        frames += 1
+    elapsed = time.perf_counter() - start
+    pipeline.stop()
+    source.release()
+    return frames / elapsed if elapsed else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", help="запись ландмарок .jsonl/.npz")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    metrics = StageMetrics()
+    timer = metrics.timer("inference")
+    record = per_call(lambda: metrics.record("inference", 0.001), 200000)
+    direct = per_call(lambda: timer.record(0.001), 200000)
+    for stage in ("capture", "convert", "recognize", "draw", "lookup", "render", "total"):
+        for _ in range(metrics.window):
+            metrics.record(stage, 0.001)
+    snapshot = per_call(metrics.snapshot, 200)
+    overlay = per_call(metrics.overlay_lines, 200)
+    print(f"record: {record * 1e9:.0f} нс (StageTimer.record {direct * 1e9:.0f} нс)")
+    print(f"snapshot: {snapshot * 1e6:.0f} мкс, overlay_lines: {overlay * 1e6:.0f} мкс")
+
+    best_off = best_on = 0.0
+    for _ in range(args.repeats):
+        best_off = max(best_off, replay(args.source, None))
+        best_on = max(best_on, replay(args.source, StageMetrics()))
+    print(f"Воспроизведение, кадров/с: без метрик {best_off:.0f}, с метриками {best_on:.0f} "
+          f"({(best_off - best_on) / best_off * 100:+.1f}% потерь)")
+
+
+if __name__ == "__main__":
+    main()
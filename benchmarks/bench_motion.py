@@ -0,0 +1,64 @@
+# Время MotionMatcher.update на кадр в зависимости от числа шаблонов движений.
+# Рука непрерывно движется по случайной траектории (худший случай: окно
+# каждый кадр сравнивается со всеми шаблонами), шаблоны - случайные движения.
+# Запуск: python benchmarks/bench_motion.py [--frames 3000] [--templates 1 5 20 50]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from macros import CompiledMacro
+from motion_recognition import MotionMatcher, MotionTemplate, RAW_FEATURES
+
+
+def random_walk(rng, frames):
+    steps = rng.normal(0, 0.01, (frames, RAW_FEATURES)).astype(np.float32)
+    steps[:, 4:] = 0
+    raw = np.cumsum(steps, axis=0)
+    raw[:, 4] = 0.05
+    raw[:, 5] = 0.15
+    return raw
+
+
+def make_templates(rng, count):
+    macros = []
+    for i in range(count):
+        raw = random_walk(rng, 40) * 3
+        raw[:, 5] = 0.15
+        timestamps = np.arange(len(raw)) / 30.0
+        template = MotionTemplate.from_recording(timestamps, raw)
+        macros.append(CompiledMacro(f"motion-{i}", f"motion-{i}", [], (), motion=template))
+    return tuple(macros)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--templates", type=int, nargs="+", default=[1, 5, 20, 50])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    stream = random_walk(rng, args.frames)
+    print(f"{'шаблонов':>9} {'mean':>9} {'p99':>9} {'max':>9}  (мкс/кадр)  брошено DTW")
+    for count in args.templates:
+        macros = make_templates(rng, count)
+        matcher = MotionMatcher()
+        timings = []
+        clock = time.perf_counter
+        for i, raw in enumerate(stream):
+            start = clock()
+            matcher.update_features(raw, i / 30.0, macros)
+            timings.append(clock() - start)
+        timings = np.array(timings[60:]) * 1e6
+        share = matcher.abandoned / max(matcher.compared, 1)
+        print(f"{count:>9} {timings.mean():9.1f} {np.percentile(timings, 99):9.1f} "
+              f"{timings.max():9.1f}  {share:20.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
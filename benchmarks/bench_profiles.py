@@ -0,0 +1,123 @@
+# Профили приложений: сборка индексов при загрузке, переключение профиля
+# (switch_app) против слияния цепочки наследования при каждом переключении,
+# поиск жеста в базовом профиле и в профиле в конце цепочки наследования
+# (должны совпадать). Активное окно подменяется app_focus.MockFocus.
+# Запуск: python benchmarks/bench_profiles.py [--entries 5000] [--profiles 50] [--depth 4]
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_focus import FocusWatcher, MockFocus
+from config_manager import ConfigManager, PROFILES_FILE
+
+
+def rate(func, min_time=0.3):
+    runs, start = 0, time.perf_counter()
+    while True:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def make_files(directory, entries, profiles, depth):
+    macro = lambda name: {"name": name, "actions": ["KEY: ctrl+c", f"STRING: {name}"]}
+    config = {format(i, "016b"): macro(f"base {i}") for i in range(entries)}
+    data = {}
+    for p in range(profiles):
+        # Профиль p наследует p-1 внутри группы из depth профилей
+        parent = f"app{p - 1}" if p % depth else None
+        gestures = {format((p * 37 + i) % entries, "016b"): macro(f"app{p} {i}")
+                    for i in range(50)}
+        gestures[format(p, "016b")] = None
+        data[f"app{p}"] = {"apps": [f"app{p}.exe"], "gestures": gestures}
+        if parent:
+            data[f"app{p}"]["inherits"] = parent
+    with open(os.path.join(directory, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    with open(os.path.join(directory, PROFILES_FILE), "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return config, data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--profiles", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=4, help="длина цепочки наследования")
+    args = parser.parse_args()
+    # Опросу нужно хотя бы два окна, самый глубокий профиль должен существовать
+    if args.profiles < 2:
+        parser.error("--profiles должно быть не меньше 2")
+    if not 1 <= args.depth <= args.profiles:
+        parser.error("--depth должно быть от 1 до --profiles")
+    if args.entries < 1:
+        parser.error("--entries должно быть не меньше 1")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config, profiles = make_files(tmp, args.entries, args.profiles, args.depth)
+        ConfigManager.path = os.path.join(tmp, "config.json")
+        ConfigManager.invalidate()
+        start = time.perf_counter()
+        ConfigManager.load()
+        print(f"Загрузка: конфиг {args.entries} жестов + {args.profiles} профилей - "
+              f"{(time.perf_counter() - start) * 1000:.0f} мс")
+
+        apps = [f"app{p}.exe" for p in range(args.profiles)]
+        state = {"i": 0}
+
+        def switch():
+            state["i"] += 1
+            ConfigManager.switch_app(apps[state["i"] % len(apps)])
+        signatures = [format(i * 97 % args.entries, "016b") for i in range(100)]
+        deepest = f"app{args.depth - 1}"
+
+        def lookup():
+            for signature in signatures:
+                ConfigManager.lookup(signature)
+
+        def naive_switch():
+            # Слияние цепочки заново при каждом переключении
+            merged, chain, name = dict(config), [], deepest
+            while name is not None:
+                chain.append(profiles[name]["gestures"])
+                name = profiles[name].get("inherits")
+            for gestures in reversed(chain):
+                merged.update(gestures)
+
+        print(f"switch_app:                  {rate(switch) * 1e6:8.2f} мкс")
+        print(f"слияние при переключении:    {rate(naive_switch) * 1e6:8.2f} мкс")
+        ConfigManager.switch_app(None)
+        print(f"lookup, профиль default:     {rate(lookup) / len(signatures) * 1e9:8.0f} нс")
+        ConfigManager.switch_app(f"{deepest}.exe")
+        print(f"lookup, профиль {deepest} ({args.depth} уровня): "
+              f"{rate(lookup) / len(signatures) * 1e9:5.0f} нс")
+
+        # Задержка от смены окна до смены профиля определяется опросом
+        focus = MockFocus("app0.exe")
+        switched = []
+        watcher = FocusWatcher(focus, lambda app: switched.append(
+            (time.perf_counter(), ConfigManager.switch_app(app))), interval=0.05).start()
+        time.sleep(0.2)
+        delays = []
+        for p in range(1, 11):
+            changed_at = time.perf_counter()
+            count = len(switched)
+            focus.set(apps[p % len(apps)])
+            while len(switched) == count:
+                time.sleep(0.001)
+            delays.append(switched[-1][0] - changed_at)
+        watcher.stop()
+        print(f"FocusWatcher (опрос {watcher.interval * 1000:.0f} мс): переключение через "
+              f"{sum(delays) / len(delays) * 1000:.0f} мс в среднем")
+    ConfigManager.invalidate()
+
+
+if __name__ == "__main__":
+    main()
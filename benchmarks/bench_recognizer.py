@@ -0,0 +1,74 @@
+# Пропускная способность распознавания: старый покадровый разбор объектов
+# MediaPipe против углов изгиба (по кадру без NumPy и пакетом в NumPy).
+# Запуск: python benchmarks/bench_recognizer.py [--frames 20000] [--npz landmarks.npz]
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gesture_recognition import GestureRecognizer
+
+Landmark = namedtuple("Landmark", "x y z")
+
+
+def legacy_fingers_up(landmarks):
+    # Копия прежнего GestureRecognizer.fingers_up
+    tips_ids = [4, 8, 12, 16, 20]
+    fingers = []
+    if landmarks:
+        thumb_tip = landmarks[tips_ids[0]]
+        thumb_ip = landmarks[tips_ids[0] - 1]
+        fingers.append(thumb_tip.x < thumb_ip.x - 0.02)
+        for i in range(1, 5):
+            tip = landmarks[tips_ids[i]]
+            dip = landmarks[tips_ids[i] - 2]
+            fingers.append(tip.y < dip.y + 0.03)
+    return fingers
+
+
+def load_points(args):
+    if args.npz:
+        with np.load(args.npz) as data:
+            return data["points"].astype(np.float32)
+    rng = np.random.default_rng(0)
+    return rng.random((args.frames, 21, 3), dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--npz", help="файл с массивом points формы (N, 21, 3)")
+    args = parser.parse_args()
+
+    points = load_points(args)
+    objects = [[Landmark(*p) for p in frame] for frame in points.tolist()]
+    n = len(points)
+
+    start = time.perf_counter()
+    for landmarks in objects:
+        GestureRecognizer.get_signature(legacy_fingers_up(landmarks))
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for landmarks in objects:
+        GestureRecognizer.get_signature(GestureRecognizer.fingers_up(landmarks))
+    per_frame = time.perf_counter() - start
+
+    start = time.perf_counter()
+    GestureRecognizer.signatures_batch(points)
+    batch = time.perf_counter() - start
+
+    print(f"Кадров: {n}")
+    for title, elapsed in (("legacy (объекты, по кадру)", legacy),
+                           ("углы (по кадру)", per_frame),
+                           ("углы, numpy (пакетом)", batch)):
+        print(f"{title:28s} {n / elapsed:12,.0f} кадров/с  {elapsed * 1e6 / n:8.2f} мкс/кадр")
+
+
+if __name__ == "__main__":
+    main()
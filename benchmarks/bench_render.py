@@ -0,0 +1,89 @@
+# Стоимость отрисовки одного кадра: старый путь (QImage из BGR -> QPixmap ->
+# scaled в GUI-потоке) против FrameRenderer (один cv2.resize RGB-буфера +
+# QImage поверх памяти numpy). FrameRenderer работает в потоке распознавания,
+# поэтому его время печатается отдельно от времени GUI-потока. Размеры окна -
+# от окна по умолчанию до развёрнутого на весь экран.
+# Работает и без дисплея (QT_QPA_PLATFORM=offscreen).
+# Запуск: python benchmarks/bench_render.py [--width 1280 --height 720] [--view 400x300 1280x720]
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImage, QPainter, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+from frame_pipeline import FrameRenderer, to_rgb_mirrored
+
+
+def legacy_render(frame, view_size, target):
+    h, w, ch = frame.shape
+    q_img = QImage(frame.data, w, h, ch * w, QImage.Format_RGB888)
+    pixmap = QPixmap.fromImage(q_img).scaled(view_size, Qt.KeepAspectRatio)
+    painter = QPainter(target)
+    painter.drawPixmap(0, 0, pixmap)
+    painter.end()
+
+
+def new_render(rgb, view_size):
+    return FrameRenderer.render(rgb, (view_size.width(), view_size.height()))
+
+
+def new_draw(display, view_size, target):
+    h, w = display.shape[:2]
+    q_img = QImage(display.data, w, h, display.strides[0], QImage.Format_RGB888)
+    painter = QPainter(target)
+    painter.drawImage(0, 0, q_img)
+    painter.end()
+
+
+def per_frame(func, frames, rounds=5):
+    # Лучший из rounds замеров, мс на кадр
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(frames):
+            func()
+        best = min(best, (time.perf_counter() - start) / frames)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--view", nargs="+", default=["400x300", "640x480", "960x540",
+                                                      "1280x720"])
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    frame = np.random.default_rng(0).integers(
+        0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    # RGB-буфер уже есть в конвейере (он нужен MediaPipe), поэтому не входит в замер
+    rgb = to_rgb_mirrored(frame)
+
+    print(f"Кадр {args.width}x{args.height}, мс/кадр")
+    print(f"{'окно':>10} {'было (GUI)':>11} {'стало (GUI)':>12} {'+ поток':>9}")
+    for view in args.view:
+        view_w, view_h = (int(v) for v in view.split("x"))
+        view_size = QSize(view_w, view_h)
+        target = QImage(view_w, view_h, QImage.Format_RGB32)
+        display = new_render(rgb, view_size)
+        before = per_frame(lambda: legacy_render(frame, view_size, target), args.frames)
+        gui = per_frame(lambda: new_draw(display, view_size, target), args.frames)
+        worker = per_frame(lambda: new_render(rgb, view_size), args.frames)
+        print(f"{view:>10} {before:11.3f} {gui:12.3f} {worker:9.3f}")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Сквозная задержка конвейера (захват -> результат) на записанном источнике.
+# Источник: видеофайл, папка с кадрами или лог ландмарок (.jsonl/.npz).
+# Запуск: python benchmarks/bench_replay.py recording.mp4 [--record out.jsonl]
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_pipeline import FramePipeline
+from frame_sources import LandmarkRecorder, open_source
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source")
+    parser.add_argument("--paced", action="store_true", help="воспроизводить в реальном времени")
+    parser.add_argument("--record", help="сохранить ландмарки в .jsonl/.npz")
+    args = parser.parse_args()
+
+    source = open_source(args.source, args.paced)
+    if not source.isOpened():
+        raise SystemExit(f"Не удалось открыть источник: {args.source}")
+    recorder = LandmarkRecorder(args.record) if args.record else None
+
+    latencies = []
+    signatures = Counter()
+    pipeline = FramePipeline(source, lossless=True, queue_size=4, recorder=recorder)
+    start = time.perf_counter()
+    pipeline.start()
+    for result in pipeline.iter_results():
+        latencies.append(time.monotonic() - result.captured_at)
+        signatures[result.signature or '-'] += 1
+    elapsed = time.perf_counter() - start
+    pipeline.stop()
+    source.release()
+    if recorder:
+        recorder.close()
+
+    if not latencies:
+        raise SystemExit("Источник не дал ни одного кадра")
+    print(f"Кадров: {len(latencies)}, {len(latencies) / elapsed:.1f} кадров/с")
+    print("Задержка захват->результат, мс: "
+          f"p50={percentile(latencies, 50) * 1000:.2f} "
+          f"p95={percentile(latencies, 95) * 1000:.2f} "
+          f"max={max(latencies) * 1000:.2f}")
+    print("Сигнатуры:", ", ".join(f"{sig}: {n}" for sig, n in signatures.most_common()))
+    if recorder:
+        print(f"Записано кадров: {recorder.count} -> {args.record}")
+
+
+if __name__ == "__main__":
+    main()
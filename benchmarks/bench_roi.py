@@ -0,0 +1,150 @@
+# Стоимость инференса на кадр при разных способах подачи кадра в MediaPipe:
+#   full      - полный кадр камеры (как было)
+#   downscale - кадр, уменьшенный до --detect-width
+#   roi       - RoiHandTracker: поиск по уменьшенному кадру, трекинг по области руки
+#   crop      - только кадры трекинга: каждый кадр - область --roi-size в центре
+# Запуск: python benchmarks/bench_roi.py [video.mp4 | frames/] [--frames 300]
+# Без источника используется синтетическое видео 1280x720: нарисованная
+# раскрытая ладонь (её MediaPipe находит) ходит по кадру, в середине записи
+# на секунду пропадает.
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_pipeline import to_rgb_mirrored
+from frame_sources import open_source
+from hand_tracking import HandDetector, RoiHandTracker
+
+
+def draw_palm(width, height, center, size, angle):
+    # Раскрытая ладонь цвета кожи на ровном фоне: запястье, ладонь, пять пальцев
+    import cv2
+
+    image = np.full((height, width, 3), (70, 80, 90), np.uint8)
+    c, s, unit = np.cos(angle), np.sin(angle), size / 2
+
+    def point(x, y):
+        return (int(center[0] + unit * (x * c - y * s)), int(center[1] + unit * (x * s + y * c)))
+    skin = (130, 165, 215)
+    palm = [(-0.45, 0.55), (0.45, 0.55), (0.5, -0.35), (0.25, -0.5), (-0.05, -0.52),
+            (-0.3, -0.48), (-0.5, -0.3)]
+    cv2.fillPoly(image, [np.array([point(x, y) for x, y in palm])], skin, cv2.LINE_AA)
+    cv2.rectangle(image, point(-0.3, 0.55), point(0.3, 1.5), skin, -1)
+    # (основание x, y, наклон, длина); большой палец - последний
+    fingers = ((-0.36, -0.4, -0.22, 0.62), (-0.12, -0.5, -0.07, 0.78),
+               (0.13, -0.5, 0.06, 0.72), (0.36, -0.38, 0.2, 0.56), (-0.45, 0.3, -0.98, 0.6))
+    for x, y, tilt, length in fingers:
+        tip = point(x + np.sin(tilt) * length, y - np.cos(tilt) * length)
+        cv2.line(image, point(x, y), tip, skin, int(unit * 0.2), cv2.LINE_AA)
+        cv2.circle(image, tip, int(unit * 0.1), skin, -1, cv2.LINE_AA)
+    image = cv2.GaussianBlur(image, (7, 7), 0)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def synthetic_frames(limit, width, height):
+    frames = []
+    for i in range(limit):
+        t = i / 30
+        if limit // 2 <= i < limit // 2 + 30:
+            frames.append(np.full((height, width, 3), 80, np.uint8))  # руки нет
+            continue
+        center = (width / 2 + width * 0.2 * np.sin(t * 0.8),
+                  height * 0.53 + height * 0.08 * np.sin(t * 1.3))
+        frames.append(draw_palm(width, height, center, height * 0.3, 0.15 * np.sin(t)))
+    return frames
+
+
+def load_frames(source, limit, width, height):
+    if source is None:
+        return synthetic_frames(limit, width, height)
+    cap = open_source(source)
+    frames = []
+    try:
+        while len(frames) < limit:
+            ok, frame = cap.read()
+            if not ok:
+                if cap.finished:
+                    break
+                continue
+            frames.append(to_rgb_mirrored(frame))
+    finally:
+        cap.release()
+    return frames
+
+
+class CenterCrop:
+    # Трекинг без потерь: MediaPipe всегда получает область руки
+    def __init__(self, detector, size):
+        self.detector = detector
+        self.size = size
+
+    def process(self, rgb):
+        import cv2
+
+        h, w = rgb.shape[:2]
+        side = min(h, w) // 2
+        top, left = (h - side) // 2, (w - side) // 2
+        crop = cv2.resize(rgb[top:top + side, left:left + side], (self.size, self.size),
+                          interpolation=cv2.INTER_LINEAR)
+        return self.detector.process(crop)
+
+
+def measure(processor, frames):
+    found = 0
+    start = time.perf_counter()
+    for rgb in frames:
+        if processor.process(rgb).multi_hand_landmarks:
+            found += 1
+    return (time.perf_counter() - start) / len(frames), found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", nargs="?", help="видеофайл или папка кадров")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--detect-width", type=int, default=480)
+    parser.add_argument("--roi-size", type=int, default=256)
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames, args.width, args.height)
+    if not frames:
+        print("Источник не дал ни одного кадра")
+        return 1
+    h, w = frames[0].shape[:2]
+    print(f"Кадров: {len(frames)}, {w}x{h}")
+
+    modes = (
+        ("full", lambda d: RoiHandTracker(d, detect_width=0, roi_size=0, rescan_interval=0)),
+        ("downscale", lambda d: RoiHandTracker(d, detect_width=args.detect_width,
+                                               rescan_interval=0)),
+        ("roi", lambda d: RoiHandTracker(d, detect_width=args.detect_width,
+                                         roi_size=args.roi_size)),
+        ("crop", lambda d: CenterCrop(d, args.roi_size)),
+    )
+    baseline = None
+    for name, make in modes:
+        # Отдельная сессия на режим, чтобы трекинг MediaPipe не переходил между ними
+        with HandDetector() as detector:
+            processor = make(detector)
+            detector.warm_up(crop=True)  # прогрев графов
+            detector.process(frames[0])
+            per_frame, found = measure(processor, frames)
+        baseline = baseline or per_frame
+        line = (f"{name:<10} {per_frame * 1000:8.2f} мс/кадр  x{baseline / per_frame:4.2f}"
+                f"  рука найдена: {found}")
+        stats = getattr(processor, "stats", None)
+        if name == "roi" and stats:
+            line += "  (полный {full}, область {roi}, потеря {fallback})".format(**stats)
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# Холодный старт: время импорта (python -X importtime), время до показа окна и
+# пик памяти GUI против консольного "gesture_macro.py run" на записи ландмарок.
+# Результат можно сохранить в JSON и сравнивать между релизами.
+# Запуск: python benchmarks/bench_startup.py [--runs 5] [--top 15] [--json startup.json]
+#         [--source benchmarks/fixtures/one_hand.npz]
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WINDOW_SNIPPET = """
+import time
+start = time.perf_counter()
+import sys
+from PyQt5.QtWidgets import QApplication
+import GestureMacro
+app = QApplication(sys.argv)
+window = GestureMacro.GestureMacroApp()
+window.show()
+app.processEvents()
+shown = time.perf_counter() - start
+window.loader.wait(60000)
+app.processEvents()
+ready = time.perf_counter() - start
+window.close()
+print(shown, ready, peak_rss())
+"""
+
+# Консольный режим: от запуска интерпретатора до конца воспроизведения записи
+HEADLESS_SNIPPET = """
+import time
+start = time.perf_counter()
+import sys
+import gesture_macro
+gesture_macro.main(sys.argv[1:])
+print(time.perf_counter() - start, peak_rss())
+"""
+
+# Пик резидентной памяти процесса, байт (0 там, где нет модуля resource)
+PEAK_RSS = """
+import sys
+def peak_rss():
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # ru_maxrss: на macOS в байтах, на Linux в килобайтах
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault("PYTHONPATH", ROOT)
+    if sys.platform.startswith("linux") and not env.get("DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        env.setdefault("PYNPUT_BACKEND", "dummy")
+    return env
+
+
+def import_times(module):
+    # Возвращает {модуль: накопленное время, мкс} из вывода -X importtime
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def window_times():
+    proc = subprocess.run([sys.executable, "-c", PEAK_RSS + WINDOW_SNIPPET],
+                          cwd=ROOT, env=child_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr)
+    shown, ready, rss = proc.stdout.split()[-3:]
+    return float(shown), float(ready), int(rss)
+
+
+def headless_times(source):
+    command = [sys.executable, "-c", PEAK_RSS + HEADLESS_SNIPPET,
+               "run", "--source", source, "--fast", "--dry-run", "--focus", "none"]
+    proc = subprocess.run(command, cwd=ROOT, env=child_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr)
+    total, rss = proc.stdout.split()[-2:]
+    return float(total), int(rss)
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="GestureMacro")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--no-window", action="store_true", help="только время импорта")
+    parser.add_argument("--json", help="сохранить результат в файл")
+    parser.add_argument("--source", default=os.path.join(ROOT, "benchmarks", "fixtures",
+                                                         "one_hand.npz"),
+                        help="запись для консольного run (видео или .jsonl/.npz)")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    total = median([r.get(args.module, 0) for r in runs]) / 1000
+    print(f"import {args.module}: {total:.1f} мс (медиана из {args.runs})")
+
+    last = runs[-1]
+    heaviest = sorted((name for name in last if name != args.module),
+                      key=last.get, reverse=True)[:args.top]
+    for name in heaviest:
+        print(f"  {last[name] / 1000:8.1f} мс  {name}")
+
+    result = {"module": args.module, "import_ms": total,
+              "heaviest_ms": {name: last[name] / 1000 for name in heaviest}}
+    if not args.no_window:
+        windows = [window_times() for _ in range(args.runs)]
+        result["window_shown_s"] = median([w[0] for w in windows])
+        result["components_ready_s"] = median([w[1] for w in windows])
+        result["window_peak_rss_mb"] = median([w[2] for w in windows]) / 2 ** 20
+        print(f"окно показано через {result['window_shown_s']:.3f} с, "
+              f"компоненты загружены через {result['components_ready_s']:.3f} с, "
+              f"пик памяти {result['window_peak_rss_mb']:.0f} МБ")
+
+        headless = [headless_times(args.source) for _ in range(args.runs)]
+        result["headless_run_s"] = median([h[0] for h in headless])
+        result["headless_peak_rss_mb"] = median([h[1] for h in headless]) / 2 ** 20
+        print(f"gesture_macro.py run ({os.path.basename(args.source)}): "
+              f"{result['headless_run_s']:.3f} с до конца записи, "
+              f"пик памяти {result['headless_peak_rss_mb']:.0f} МБ")
+        if result["window_peak_rss_mb"]:
+            print(f"  от GUI: время {result['headless_run_s'] / result['components_ready_s']:.0%}, "
+                  f"память {result['headless_peak_rss_mb'] / result['window_peak_rss_mb']:.0%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Большая библиотека макросов: JSON-конфиг против хранилища SQLite
+# (macro_store). Сохранение всей библиотеки, загрузка с нуля до готового
+# индекса, первый запуск макроса (тело подгружается из базы), изменение и
+# удаление одного макроса (как EditMacroDialog.save_macro и delete_macro),
+# размер файла. Каждый четвёртый макрос - с длинной строкой STRING:.
+# Запуск: python benchmarks/bench_store.py [--entries 10000 100000] [--repeats 3]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import macros
+from config_manager import ConfigManager
+from keystrokes import KeystrokeEngine, MockKeyboard
+from macros import MacroExecutor
+
+
+def best(func, repeats):
+    # Лучшее время из repeats запусков, секунд
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        result = elapsed if result is None else min(result, elapsed)
+    return result
+
+
+def make_config(entries):
+    config = {}
+    for i in range(entries):
+        actions = ["KEY: ctrl+c", "WAIT: 0", f"STRING: payload {i}"]
+        if i % 4 == 0:
+            actions.append("STRING: " + f"текст макроса {i} " * 120)
+        config[f"macro-{i}"] = {"name": f"macro {i}", "actions": actions, "policy": "queue"}
+    return config
+
+
+def bench(path, config, repeats):
+    ConfigManager.path = path
+    ConfigManager.invalidate()
+    keys = list(config)
+    middle = keys[len(keys) // 2]
+    results = {"save": best(lambda: ConfigManager.save(config), 1)}
+
+    def load():
+        ConfigManager.invalidate()
+        ConfigManager.lookup(middle)
+    results["load"] = best(load, repeats)
+
+    def first_run():
+        # Тело макроса к первому запуску: из базы читается и компилируется одна запись
+        ConfigManager.invalidate()
+        macro = ConfigManager.lookup(middle)
+        start = time.perf_counter()
+        macro.load()
+        return time.perf_counter() - start
+    results["first_run"] = min(first_run() for _ in range(repeats))
+    MacroExecutor.execute(ConfigManager.lookup(middle))
+
+    edited = dict(config[middle], name="edited")
+    results["put"] = best(lambda: ConfigManager.put(middle, edited), repeats)
+    results["delete"] = best(lambda: (ConfigManager.delete(keys[0]),
+                                      ConfigManager.put(keys[0], config[keys[0]])), repeats)
+    # У SQLite часть данных ещё в журнале WAL
+    results["size"] = sum(os.path.getsize(name) for name in (path, path + "-wal")
+                          if os.path.exists(name))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    keyboard = MockKeyboard()
+    macros.keystroke_engine = KeystrokeEngine(keyboard, keyboard)
+    saved_path = ConfigManager.path
+    print(f"{'макросов':>9} {'формат':<7} {'save':>9} {'load':>9} {'1-й запуск':>11} "
+          f"{'put':>9} {'delete+put':>11} {'файл':>9}")
+    try:
+        for entries in args.entries:
+            config = make_config(entries)
+            with tempfile.TemporaryDirectory() as tmp:
+                for label, name in (("json", "config.json"), ("sqlite", "config.db")):
+                    r = bench(os.path.join(tmp, name), config, args.repeats)
+                    print(f"{entries:>9} {label:<7} {r['save'] * 1000:7.0f}мс "
+                          f"{r['load'] * 1000:7.0f}мс {r['first_run'] * 1e6:8.0f}мкс "
+                          f"{r['put'] * 1000:7.2f}мс {r['delete'] * 1000:9.2f}мс "
+                          f"{r['size'] / 2 ** 20:7.1f}МБ")
+                ConfigManager.invalidate()
+    finally:
+        ConfigManager.path = saved_path
+        ConfigManager.invalidate()
+
+
+if __name__ == "__main__":
+    main()
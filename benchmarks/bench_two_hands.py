@@ -0,0 +1,107 @@
+# Цена второй руки на кадр:
+#   recognize - сигнатуры всех рук кадра (GestureRecognizer.recognize_hands), 1 против 2 рук
+#   resolve   - поиск ключа конфига (ConfigManager.resolve) при 10..100000 привязках
+#   mediapipe - HandDetector(max_num_hands=1) против 2 на видео (если указан источник)
+# Запуск: python benchmarks/bench_two_hands.py [video.mp4] [--frames 200]
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_manager import ConfigManager
+from gesture_recognition import GestureRecognizer
+
+
+def per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def bench_recognize(number):
+    rng = np.random.default_rng(0)
+    one = [rng.random((21, 3), dtype=np.float32)]
+    two = one + [rng.random((21, 3), dtype=np.float32)]
+    size = (1280, 720)
+    t1 = per_call(lambda: GestureRecognizer.recognize_hands(one, ["R"], size), number)
+    t2 = per_call(lambda: GestureRecognizer.recognize_hands(two, ["R", "L"], size), number)
+    print(f"recognize  1 рука {t1 * 1e6:8.1f} мкс   2 руки {t2 * 1e6:8.1f} мкс   "
+          f"вторая рука +{(t2 - t1) * 1e6:.1f} мкс")
+
+
+def bench_resolve(number):
+    bits = [''.join(p) for p in itertools.product("01", repeat=5)]
+    chords = [f"L{a}+R{b}" for a in bits for b in bits]
+    one = [("R", "01000")]
+    two = [("L", "11000"), ("R", "00111")]
+    saved_path = ConfigManager.path
+    try:
+        for size in (10, 1000, 100000):
+            # Аккордов всего 1024; остальное - прочие ключи (как у будущих типов жестов)
+            keys = (chords + [f"macro-{i}" for i in range(size)])[:size]
+            config = {key: {"name": key, "actions": []} for key in keys}
+            with tempfile.TemporaryDirectory() as tmp:
+                ConfigManager.path = os.path.join(tmp, "config.json")
+                ConfigManager.invalidate()
+                ConfigManager.save(config)
+                t1 = per_call(lambda: ConfigManager.resolve(one), number)
+                t2 = per_call(lambda: ConfigManager.resolve(two), number)
+            print(f"resolve    {size:>6} привязок: 1 рука {t1 * 1e6:6.2f} мкс   "
+                  f"2 руки {t2 * 1e6:6.2f} мкс")
+    finally:
+        ConfigManager.path = saved_path
+        ConfigManager.invalidate()
+
+
+def bench_mediapipe(source, limit):
+    from frame_pipeline import to_rgb_mirrored
+    from frame_sources import open_source
+    from hand_tracking import HandDetector
+
+    cap = open_source(source)
+    frames = []
+    while len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            if cap.finished:
+                break
+            continue
+        frames.append(to_rgb_mirrored(frame))
+    cap.release()
+    if not frames:
+        print("Источник не дал ни одного кадра")
+        return
+
+    for max_hands in (1, 2):
+        with HandDetector(max_num_hands=max_hands) as detector:
+            detector.process(frames[0])
+            counts = [0, 0, 0]
+            start = time.perf_counter()
+            for rgb in frames:
+                counts[len(detector.process(rgb).multi_hand_landmarks or ())] += 1
+            per_frame = (time.perf_counter() - start) / len(frames)
+        print(f"mediapipe  max_num_hands={max_hands}: {per_frame * 1000:6.2f} мс/кадр  "
+              f"(кадров без рук {counts[0]}, с одной {counts[1]}, с двумя {counts[2]})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", nargs="?", help="видеофайл или папка кадров с руками")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    bench_recognize(args.number)
+    bench_resolve(args.number * 10)
+    if args.source:
+        bench_mediapipe(args.source, args.frames)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# Генератор записей ландмарок для run_benchmarks.py: модель кисти из 21
+# точки проходит заданную последовательность жестов с плавными переходами,
+# дрожанием, дрейфом и паузами без руки. Пишется через LandmarkRecorder,
+# поэтому файлы читаются так же, как записи "gesture_macro.py run --record".
+# Файлы уже лежат в репозитории; перегенерировать нужно только при смене
+# сценария (вместе с "run_benchmarks.py --update").
+# Запуск: python benchmarks/fixtures/make_fixtures.py
+import os
+import sys
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(HERE)))
+
+from frame_sources import LandmarkRecorder
+
+FPS = 30
+SIZE = (640, 480)
+
+# Основания пальцев (MCP) и длины фаланг
+MCPS = {5: (0.45, 0.62), 9: (0.50, 0.60), 13: (0.55, 0.62), 17: (0.60, 0.66)}
+PHALANGES = (0.08, 0.05, 0.04)
+CURL = np.radians((60, 80, 50))
+
+
+def rotate_x(vector, angle):
+    c, s = np.cos(angle), np.sin(angle)
+    x, y, z = vector
+    return np.array([x, y * c - z * s, y * s + z * c])
+
+
+def hand(bends, mirror=False, angle=0.0, shift=(0.0, 0.0)):
+    # bends - изгиб пальцев от большого до мизинца: 0 - выпрямлен, 1 - согнут
+    points = np.zeros((21, 3))
+    points[0] = (0.5, 0.9, 0.0)
+    for finger, (mcp, base) in enumerate(MCPS.items(), 1):
+        points[mcp] = (*base, 0.0)
+        direction = np.array([0.0, -1.0, 0.0])
+        position = points[mcp].copy()
+        for joint in range(3):
+            direction = rotate_x(direction, np.radians(5) + bends[finger] * CURL[joint])
+            position = position + direction * PHALANGES[joint]
+            points[mcp + 1 + joint] = position
+    points[1] = (0.42, 0.83, 0.0)
+    points[2] = (0.36, 0.76, 0.0)
+    straight = np.array([(0.31, 0.70, 0.0), (0.27, 0.64, 0.0)])
+    folded = np.array([(0.40, 0.70, -0.03), (0.47, 0.69, -0.04)])
+    points[3:5] = straight + (folded - straight) * bends[0]
+
+    center = points.mean(axis=0)
+    offsets = points - center
+    if mirror:
+        offsets[:, 0] *= -1
+    c, s = np.cos(angle), np.sin(angle)
+    offsets[:, :2] = offsets[:, :2] @ np.array([[c, -s], [s, c]]).T
+    return offsets * 0.9 + center + (*shift, 0.0)
+
+
+def bends_for(signature):
+    return np.array([0.0 if bit == "1" else 1.0 for bit in signature])
+
+
+def scenario(steps, mirror=False, seed=0):
+    # steps: [(сигнатура или None, секунд)] -> кадры [(точки руки или None)]
+    rng = np.random.default_rng(seed)
+    frames, previous = [], None
+    for signature, seconds in steps:
+        count = int(seconds * FPS)
+        if signature is None:
+            frames += [None] * count
+            previous = None
+            continue
+        target = bends_for(signature)
+        for i in range(count):
+            # Первые 6 кадров - переход от предыдущего жеста
+            mix = min(1.0, (i + 1) / 6) if previous is not None else 1.0
+            bends = previous + (target - previous) * mix if previous is not None else target
+            t = len(frames) / FPS
+            points = hand(bends, mirror, angle=0.15 * np.sin(t * 0.7),
+                          shift=(0.03 * np.sin(t * 0.5), 0.02 * np.cos(t * 0.4)))
+            frames.append(points + rng.normal(0, 0.003, points.shape))
+        previous = target
+    return frames
+
+
+def write(name, tracks, labels):
+    path = os.path.join(HERE, name)
+    with LandmarkRecorder(path) as recorder:
+        for i, hands in enumerate(zip(*tracks)):
+            present = [(h, label) for h, label in zip(hands, labels) if h is not None]
+            recorder.write(i / FPS, [h for h, _ in present], SIZE, [label for _, label in present])
+    print(f"{path}: {recorder.count} кадров")
+
+
+def main():
+    gestures = ["11000", "01000", "01100", "11111", "00000", "01111", "10001", "00001"]
+    steps = []
+    for i, signature in enumerate(gestures * 2):
+        steps.append((signature, 1.0))
+        if i % 4 == 3:
+            steps.append((None, 0.5))
+    write("one_hand.npz", [scenario(steps, mirror=True)], ["R"])
+
+    left = scenario([("11111", 2.0), ("01000", 2.0), ("00000", 2.0), (None, 1.0),
+                     ("11000", 3.0)], seed=1)
+    right = scenario([("01000", 1.0), ("01100", 2.0), ("11111", 2.0), ("00000", 2.0),
+                      (None, 3.0)], mirror=True, seed=2)
+    write("two_hands.npz", [left, right], ["L", "R"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+# Набор бенчмарков с сохранёнными базовыми значениями: распознавание,
+# загрузка/сохранение большого конфига, выполнение макроса на заглушке
+# клавиатуры, воспроизведение записей ландмарок через FramePipeline и
+# отрисовка кадра в Qt (offscreen). Камера, дисплей и сеть не нужны.
+#
+# Результат каждого бенчмарка сравнивается с benchmarks/baselines.json:
+# если он медленнее базы больше чем на tolerance, скрипт завершается с
+# кодом 1. Перед каждым замером выполняется короткий калибровочный цикл, и
+# результат приводится к скорости машины, на которой записаны базы: так
+# сравнение переживает смену частоты процессора и другую машину.
+# Запуск: python benchmarks/run_benchmarks.py [--only recognizer config] [--update]
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+FIXTURES = os.path.join(HERE, "fixtures")
+# Базы: {"calibration_s", "results": {имя: {"value" (секунды), "unit" (для
+# вывода), "tolerance" (если отличается от TOLERANCE)}}}
+BASELINES = os.path.join(HERE, "baselines.json")
+TOLERANCE = 0.3  # допустимое замедление относительно базы
+UNITS = {"ns": 1e-9, "us": 1e-6, "ms": 1e-3}
+
+Landmark = namedtuple("Landmark", "x y z")
+
+
+class Calibration:
+    # Скорость машины относительно той, где записаны базы: время эталонной
+    # нагрузки (Python и NumPy) сейчас, делённое на reference
+    def __init__(self, reference=None):
+        self.reference = reference
+        self._data = np.arange(4096, dtype=np.float32)
+
+    def _work(self):
+        total = 0
+        for i in range(2000):
+            total += i * i % 7
+        for _ in range(20):
+            np.sqrt(self._data * self._data + 1.0).sum()
+        return total
+
+    def measure(self):
+        best = None
+        for _ in range(5):
+            start = time.perf_counter()
+            self._work()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def factor(self):
+        current = self.measure()
+        if self.reference is None:
+            self.reference = current
+        return current / self.reference
+
+
+calibration = Calibration()
+
+
+def measure(func, units=1, rounds=5, min_time=0.1):
+    # Лучший из rounds замеров (меньше всего зависит от соседних процессов);
+    # в каждом func повторяется не меньше min_time секунд. Возвращает
+    # секунды на единицу работы в масштабе машины баз
+    results = []
+    for _ in range(rounds):
+        factor = calibration.factor()
+        runs, start = 0, time.perf_counter()
+        while True:
+            func()
+            runs += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        results.append(elapsed / (runs * units) / factor)
+    return min(results)
+
+
+def load_fixture(name):
+    from frame_sources import open_source
+
+    source = open_source(os.path.join(FIXTURES, name), False)
+    frames = []
+    while True:
+        ok, frame, _ = source.read_timed()
+        if not ok:
+            if source.finished:
+                break
+            continue
+        frames.append(frame)
+    source.release()
+    return frames
+
+
+def bench_recognizer(rounds):
+    from gesture_recognition import GestureRecognizer
+
+    frames = load_fixture("one_hand.npz")
+    points = np.stack([hand for frame in frames for hand in frame.hands])
+    objects = [[Landmark(*p) for p in hand] for hand in points.tolist()]
+
+    def per_hand():
+        for landmarks in objects:
+            GestureRecognizer.get_signature(GestureRecognizer.fingers_up(landmarks))
+
+    chords = load_fixture("two_hands.npz")
+
+    def per_frame():
+        for frame in chords:
+            GestureRecognizer.recognize_hands(frame.hands, frame.labels, frame.image_size)
+
+    yield "recognizer.fingers_up", "us", measure(per_hand, len(objects), rounds)
+    yield "recognizer.batch", "ns", measure(
+        lambda: GestureRecognizer.signatures_batch(points), len(points), rounds)
+    yield "recognizer.two_hands", "us", measure(per_frame, len(chords), rounds)
+
+
+def bench_config(rounds, entries=5000):
+    from config_manager import ConfigManager
+
+    config = {}
+    for i in range(entries):
+        config[format(i, "016b")] = {
+            "name": f"macro {i}",
+            "actions": ["KEY: ctrl+c", "WAIT: 0.1", f"STRING: payload {i}", "CMD: echo done"],
+            "policy": "queue",
+        }
+    hands = [[("", format(i, "05b"))] for i in range(32)]
+    saved_path = ConfigManager.path
+    with tempfile.TemporaryDirectory() as tmp:
+        ConfigManager.path = os.path.join(tmp, "config.json")
+        ConfigManager.invalidate()
+        try:
+            yield "config.save", "ms", measure(lambda: ConfigManager.save(config), 1, rounds)
+
+            def load():
+                # Без кеша: чтение файла, разбор JSON и компиляция макросов
+                ConfigManager.invalidate()
+                ConfigManager.load()
+            yield "config.load", "ms", measure(load, 1, rounds)
+
+            def resolve():
+                for hand in hands:
+                    ConfigManager.lookup(ConfigManager.resolve(hand))
+            yield "config.resolve", "us", measure(resolve, len(hands), rounds)
+        finally:
+            ConfigManager.path = saved_path
+            ConfigManager.invalidate()
+
+
+def bench_macros(rounds):
+    import macros
+    from keystrokes import KeystrokeEngine, MockKeyboard
+    from macros import MacroCompiler, MacroExecutor
+
+    actions = ["KEY: ctrl+shift+esc", "STRING: hello, world", "WAIT: 0", "KEY: enter",
+               "# комментарий", "KEY: tab", "просто текст"]
+    keyboard = MockKeyboard()
+    saved_engine = macros.keystroke_engine
+    macros.keystroke_engine = KeystrokeEngine(keyboard, keyboard)
+    try:
+        program = MacroCompiler.compile(actions)
+        yield "macro.dispatch", "us", measure(lambda: MacroExecutor.execute(program), len(program),
+                                              rounds)
+        yield "macro.compile", "us", measure(lambda: MacroCompiler.compile(actions), 1, rounds)
+    finally:
+        macros.keystroke_engine = saved_engine
+
+
+def replay(name):
+    # Как цикл "gesture_macro.py run": конвейер, стабилизатор и поиск в конфиге
+    from config_manager import ConfigManager
+    from frame_pipeline import FramePipeline
+    from frame_sources import open_source
+    from gesture_recognition import GestureStabilizer
+
+    source = open_source(os.path.join(FIXTURES, name), False)
+    pipeline = FramePipeline(source, lossless=True, queue_size=1)
+    stabilizer = GestureStabilizer(ConfigManager.trigger_settings)
+    latencies = []
+    factor = calibration.factor()
+    start = time.perf_counter()
+    pipeline.start()
+    for result in pipeline.iter_results():
+        fired = stabilizer.update(ConfigManager.resolve(result.hands), result.timestamp)
+        if fired:
+            ConfigManager.lookup(fired)
+        latencies.append(time.monotonic() - result.captured_at)
+    elapsed = time.perf_counter() - start
+    pipeline.stop()
+    source.release()
+    p50 = sorted(latencies)[len(latencies) // 2]
+    return elapsed / len(latencies) / factor, p50 / factor
+
+
+def bench_replay(rounds):
+    from config_manager import ConfigManager
+
+    saved_path = ConfigManager.path
+    with tempfile.TemporaryDirectory() as tmp:
+        ConfigManager.path = os.path.join(tmp, "config.json")
+        ConfigManager.invalidate()
+        ConfigManager.save({"11000": {"name": "victory", "actions": ["KEY: a"]},
+                            "L01000+R01100": {"name": "chord", "actions": ["KEY: b"]}})
+        try:
+            for name in ("one_hand.npz", "two_hands.npz"):
+                # Медиана прогонов: у двух потоков лучший прогон - случайность
+                # планировщика, а не свойство кода
+                runs = [replay(name) for _ in range(rounds)]
+                per_frame = sorted(run[0] for run in runs)[len(runs) // 2]
+                p50 = sorted(run[1] for run in runs)[len(runs) // 2]
+                label = name.split(".")[0]
+                yield f"replay.{label}.frame", "us", per_frame
+                yield f"replay.{label}.latency_p50", "us", p50
+        finally:
+            ConfigManager.path = saved_path
+            ConfigManager.invalidate()
+
+
+def bench_gui(rounds):
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        print("PyQt5 не установлен, gui пропущен")
+        return
+    from frame_pipeline import FrameRenderer
+    from GestureMacro import VideoView
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    view = VideoView()
+    view.resize(480, 360)
+    view.show()
+    frames = load_fixture("two_hands.npz")
+    images = [FrameRenderer.render_points(frame.image_size, (480, 360), frame.hands)
+              for frame in frames[:60]]
+
+    def draw():
+        for image in images:
+            view.set_frame(image)
+            view.repaint()
+    yield "gui.render", "us", measure(draw, len(images), rounds)
+    view.close()
+    app.processEvents()
+
+
+GROUPS = {
+    "recognizer": bench_recognizer,
+    "config": bench_config,
+    "macro": bench_macros,
+    "replay": bench_replay,
+    "gui": bench_gui,
+}
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {"results": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baselines(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".baselines_", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", nargs="+", choices=sorted(GROUPS), help="только эти группы")
+    parser.add_argument("--update", action="store_true", help="записать результаты как базу")
+    parser.add_argument("--tolerance", type=float,
+                        help="допустимое замедление для всех бенчмарков (0.3 - на 30%%)")
+    parser.add_argument("--rounds", type=int, default=5, help="замеров на бенчмарк")
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--json", help="сохранить результаты в файл")
+    args = parser.parse_args()
+
+    baselines = load_baselines(args.baselines)
+    fresh = not baselines.get("calibration_s")
+    calibration.reference = baselines.get("calibration_s")
+    factor = calibration.factor()
+    print(f"Калибровка: {calibration.reference * 1000:.3f} мс в базе, "
+          f"машина сейчас x{factor:.2f}")
+    print(f"{'бенчмарк':<32} {'сейчас':>10} {'база':>10} {'отн.':>6}  (в масштабе машины баз)")
+
+    results, failed = {}, []
+    for group in args.only or GROUPS:
+        for name, unit, value in GROUPS[group](args.rounds):
+            results[name] = {"value": value, "unit": unit}
+            scale = UNITS[unit]
+            base = baselines["results"].get(name)
+            if base is None:
+                print(f"{name:<32} {value / scale:8.2f}{unit} {'-':>10}   нет базы")
+                continue
+            tolerance = args.tolerance if args.tolerance is not None else \
+                base.get("tolerance", TOLERANCE)
+            ratio = value / base["value"]
+            status = "ok"
+            if ratio > 1 + tolerance:
+                status = f"РЕГРЕССИЯ (допуск +{tolerance:.0%})"
+                failed.append(name)
+            print(f"{name:<32} {value / scale:8.2f}{unit} {base['value'] / scale:8.2f}{unit} "
+                  f"{ratio:6.2f}  {status}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"calibration_s": calibration.reference, "results": results}, f, indent=2)
+    if args.update:
+        # Допуски, подобранные вручную, сохраняются
+        for name, result in results.items():
+            old = baselines["results"].get(name, {})
+            if "tolerance" in old:
+                result["tolerance"] = old["tolerance"]
+        baselines["results"].update(results)
+        if fresh:
+            baselines.update(calibration_s=calibration.reference,
+                             python=platform.python_version(),
+                             machine=f"{platform.system()} {platform.machine()}")
+        save_baselines(args.baselines, baselines)
+        print(f"База обновлена: {args.baselines}")
+        return 0
+    if failed:
+        print(f"Регрессии: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,588 @@
+import functools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from app_focus import app_key
+from gesture_recognition import GestureRecognizer
+from macro_store import MacroStore, is_store_path
+from macros import MacroCompiler, MacroCompileError
+
+CONFIG_FILE = "gestures_macros_config.json"
+PROFILES_FILE = "gesture_profiles.json"
+BASE_PROFILE = "default"  # сам конфиг: профиль для всех остальных приложений
+
+
+class ConfigManager:
+    # Конфиг кешируется на весь процесс и перечитывается с диска только
+    # если у файла изменились mtime/inode/размер или после save().
+    # Профили приложений лежат в gesture_profiles.json рядом с конфигом:
+    # {"browser": {"apps": ["firefox"], "inherits": "default",
+    #              "gestures": {"11000": {...}, "01000": null}}}
+    # Каждый профиль при загрузке сливается с родителями в готовый индекс,
+    # null убирает унаследованный жест. Смена профиля - подмена ссылки на
+    # индекс, поиск жеста остаётся одним обращением к dict.
+    # Конфиг с расширением .db/.sqlite хранится в macro_store.MacroStore:
+    # при загрузке читаются заголовки макросов, тела - при первом запуске,
+    # put()/delete() пишут один макрос и правят индексы по месту
+    path = CONFIG_FILE
+    profiles_path = None  # None - PROFILES_FILE рядом с конфигом
+    check_interval = 0.5  # как часто (сек) проверять файл при поиске жеста
+    on_error = None  # callable(title, message), GUI показывает QMessageBox
+    # callable(ключ) после put()/delete(), callable(None) - конфиг перечитан или
+    # сохранён целиком. Может вызываться из потока камеры (перечитывание при поиске)
+    on_change = None
+
+    _lock = threading.RLock()
+    _config = None
+    _store = None
+    _index = {}
+    _motions = ()
+    _stamp = None
+    _checked_at = 0.0
+    _profiles = {}  # профили в том виде, как они записаны в файле
+    _indexes = {BASE_PROFILE: ({}, ())}  # профиль -> (индекс, жесты-движения)
+    _app_profiles = {}  # приложение -> профиль
+    active_profile = BASE_PROFILE
+    active_app = None
+    pinned = None  # профиль, выбранный вручную; активное окно его не меняет
+
+    @staticmethod
+    def _report(title, message):
+        if ConfigManager.on_error:
+            ConfigManager.on_error(title, message)
+        else:
+            print(f"{title}: {message}")
+
+    @staticmethod
+    def _notify(key):
+        if ConfigManager.on_change:
+            ConfigManager.on_change(key)
+
+    @staticmethod
+    def _file_stamp(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    @classmethod
+    def _macro_store(cls):
+        # MacroStore для конфига .db/.sqlite, None - конфиг в JSON
+        if not is_store_path(cls.path):
+            return None
+        if cls._store is None or cls._store.path != cls.path:
+            if cls._store is not None:
+                cls._store.close()
+                cls._store = None
+            cls._store = MacroStore(cls.path)
+        return cls._store
+
+    @classmethod
+    def _load_actions(cls, key):
+        # Тело макроса для CompiledMacro.load(): вызывается из потока MacroRunner,
+        # хранилище могло быть закрыто invalidate() и открывается заново. Чтение
+        # под блокировкой: иначе GUI может закрыть соединение посреди запроса
+        with cls._lock:
+            return cls._macro_store().actions(key)
+
+    @classmethod
+    def _config_stamp(cls):
+        if not is_store_path(cls.path):
+            return cls._file_stamp(cls.path)
+        try:
+            return ("sqlite", cls._macro_store().version())
+        except sqlite3.Error as e:
+            return ("error", str(e))
+
+    @classmethod
+    def _read_config(cls, stamp):
+        if not is_store_path(cls.path):
+            return cls._read_json(cls.path, stamp)
+        try:
+            if stamp[0] == "error":
+                raise sqlite3.Error(stamp[1])
+            return cls._store.headers()
+        except sqlite3.Error as e:
+            cls._report("Config Error", f"Failed to load {os.path.basename(cls.path)}: {str(e)}")
+            return {}
+
+    @classmethod
+    def _store_write(cls, method, *args):
+        try:
+            method(*args)
+            return True
+        except sqlite3.Error as e:
+            cls._report("Config Error", f"Failed to save {os.path.basename(cls.path)}: {str(e)}")
+            return False
+
+    @classmethod
+    def _compile_index(cls, config, strict=False, loader=None):
+        # Действия компилируются один раз при загрузке, а не при каждом срабатывании.
+        # Ключи приводятся к каноническому виду, чтобы поиск был одним обращением к dict.
+        # loader(ключ) -> actions для заголовков из хранилища: тело загрузится при запуске
+        index = {}
+        for key, macro in config.items():
+            sig = GestureRecognizer.canonical_signature(key)
+            lazy = functools.partial(loader, key) if loader and "actions" not in macro else None
+            try:
+                index[sig] = MacroCompiler.compile_macro(sig, macro, lazy)
+            except MacroCompileError as e:
+                if strict:
+                    raise MacroCompileError(
+                        e.line, e.action,
+                        f"макрос '{macro.get('name', sig)}': {e.args[0]}") from None
+                cls._report("Config Error", f"Macro '{sig}' skipped: {str(e)}")
+        return index
+
+    @classmethod
+    def _build_profiles(cls, base, profiles, strict=False):
+        # Все профили -> {имя: (индекс, жесты-движения)} с учётом наследования
+        # Жесты-движения отдельным кортежем: MotionMatcher пересобирает
+        # шаблоны только когда кортеж сменился
+        motions = lambda index: tuple(m for m in index.values() if m.motion is not None)
+        indexes = {BASE_PROFILE: (base, motions(base))}
+        building = []
+
+        def build(name):
+            if name in indexes:
+                return indexes[name][0]
+            if name in building:
+                raise ValueError(f"циклическое наследование: {' -> '.join(building + [name])}")
+            profile = profiles.get(name)
+            if not isinstance(profile, dict):
+                raise ValueError(f"нет профиля '{name}'")
+            gestures = profile.get("gestures", {})
+            if not isinstance(gestures, dict):
+                raise ValueError(f"профиль '{name}': gestures должен быть объектом")
+            building.append(name)
+            index = dict(build(profile.get("inherits") or BASE_PROFILE))
+            building.pop()
+            for sig, macro in gestures.items():
+                if macro is None:
+                    index.pop(GestureRecognizer.canonical_signature(sig), None)
+            index.update(cls._compile_index(
+                {sig: macro for sig, macro in gestures.items() if macro is not None}, strict))
+            indexes[name] = (index, motions(index))
+            return index
+
+        for name in profiles:
+            try:
+                build(name)
+            except ValueError as e:
+                building.clear()
+                if strict:
+                    raise MacroCompileError(None, name, f"профиль '{name}': {str(e)}") from None
+                cls._report("Config Error", f"Profile '{name}' skipped: {str(e)}")
+        return indexes
+
+    @staticmethod
+    def _app_map(profiles):
+        apps = {}
+        for name, profile in profiles.items():
+            for app in (profile.get("apps") or []) if isinstance(profile, dict) else []:
+                apps.setdefault(app_key(app), name)
+        return apps
+
+    @classmethod
+    def _set_cache(cls, config, stamp, index=None, profiles=None):
+        cls._config = config
+        if profiles is not None:
+            cls._profiles = profiles
+        if index is None:
+            loader = cls._load_actions if is_store_path(cls.path) else None
+            index = cls._compile_index(config, loader=loader)
+        base = index
+        cls._indexes = cls._build_profiles(base, cls._profiles)
+        cls._app_profiles = cls._app_map(cls._profiles)
+        cls._select(cls._profile_for(cls.active_app))
+        cls._stamp = stamp
+        cls._checked_at = time.monotonic()
+
+    @classmethod
+    def _profile_for(cls, app):
+        if cls.pinned in cls._indexes:
+            return cls.pinned
+        name = cls._app_profiles.get(app, BASE_PROFILE) if app else BASE_PROFILE
+        return name if name in cls._indexes else BASE_PROFILE
+
+    @classmethod
+    def _select(cls, name):
+        cls._index, cls._motions = cls._indexes[name]
+        cls.active_profile = name
+
+    @classmethod
+    def validate(cls, config):
+        return cls._compile_index(config, strict=True)
+
+    @classmethod
+    def profiles_file(cls):
+        if cls.profiles_path:
+            return cls.profiles_path
+        return os.path.join(os.path.dirname(os.path.abspath(cls.path)), PROFILES_FILE)
+
+    @classmethod
+    def _read_json(cls, path, stamp):
+        if stamp is None:
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("ожидался объект JSON")
+            return data
+        except Exception as e:
+            cls._report("Config Error", f"Failed to load {os.path.basename(path)}: {str(e)}")
+            return {}
+
+    @classmethod
+    def _refresh(cls, force=False):
+        now = time.monotonic()
+        if cls._config is not None and not force and now - cls._checked_at < cls.check_interval:
+            return
+        cls._checked_at = now
+
+        profiles_path = cls.profiles_file()
+        stamp = (cls._config_stamp(), cls._file_stamp(profiles_path))
+        if cls._config is not None and stamp == cls._stamp:
+            return
+
+        index = None
+        if cls._config is not None and stamp[0] == cls._stamp[0]:
+            config, index = cls._config, cls._indexes[BASE_PROFILE][0]  # изменились только профили
+        else:
+            config = cls._read_config(stamp[0])
+        cls._set_cache(config, stamp, index, cls._read_json(profiles_path, stamp[1]))
+        if index is None:
+            cls._notify(None)
+
+    @classmethod
+    def load(cls):
+        with cls._lock:
+            cls._refresh(force=True)
+            store = cls._macro_store()
+            if store is not None:
+                # Весь конфиг с телами макросов; для одного макроса - entry()
+                try:
+                    return store.read()
+                except sqlite3.Error as e:
+                    cls._report("Config Error", f"Failed to load {os.path.basename(cls.path)}: "
+                                                f"{str(e)}")
+                    return {}
+            # Копия, чтобы изменения до save() не портили общий кеш
+            return dict(cls._config)
+
+    @classmethod
+    def entries(cls):
+        # {ключ: макрос} из кеша без копирования самих макросов (не менять!);
+        # у хранилища макросы без actions - тело читает entry()
+        with cls._lock:
+            cls._refresh()
+            return dict(cls._config)
+
+    @classmethod
+    def peek(cls, key):
+        # Макрос из кеша без копии (как в entries()) или None
+        with cls._lock:
+            cls._refresh()
+            return cls._config.get(key)
+
+    @classmethod
+    def keys(cls):
+        with cls._lock:
+            cls._refresh()
+            return set(cls._config)
+
+    @classmethod
+    def entry(cls, key):
+        # Один макрос в виде из конфига или None
+        with cls._lock:
+            cls._refresh()
+            if key not in cls._config:
+                return None
+            store = cls._macro_store()
+            if store is None:
+                return json.loads(json.dumps(cls._config[key]))
+            try:
+                return store.get(key)
+            except sqlite3.Error as e:
+                cls._report("Config Error", f"Failed to load {os.path.basename(cls.path)}: {str(e)}")
+                return None
+
+    @classmethod
+    def lookup(cls, signature):
+        with cls._lock:
+            cls._refresh()
+            return cls._index.get(signature)
+
+    @classmethod
+    def resolve(cls, hands, learned=None):
+        # [(метка, биты)] руки в кадре -> ключ конфига, на который они
+        # указывают: выученный жест learned, если у него есть макрос в
+        # активном профиле, аккорд двух рук, затем жест одной из рук с меткой
+        # ("L11000", "R01000"), потом без метки ("11000", "01000").
+        # Если ничего не привязано - сигнатура кадра.
+        # Не больше пяти обращений к словарю при любом размере конфига
+        signature = GestureRecognizer.frame_signature(hands)
+        if not hands:
+            return signature
+        with cls._lock:
+            cls._refresh()
+            index = cls._index
+        if learned in index:
+            return learned
+        if len(hands) > 1:
+            if signature in index:
+                return signature
+            chord = GestureRecognizer.chord_key(hands)
+            if chord in index:
+                return chord
+        # Жест с меткой руки важнее жеста без метки у любой из рук
+        for label, bits in hands:
+            if label and label + bits in index:
+                return label + bits
+        for _, bits in hands:
+            if bits in index:
+                return bits
+        return signature
+
+    @classmethod
+    def motion_macros(cls):
+        with cls._lock:
+            cls._refresh()
+            return cls._motions
+
+    @classmethod
+    def switch_app(cls, app):
+        # Активное приложение сменилось (FocusWatcher); возвращает новый
+        # профиль или None, если профиль остался прежним
+        with cls._lock:
+            cls._refresh()
+            cls.active_app = app_key(app)
+            name = cls._profile_for(cls.active_app)
+            if name == cls.active_profile:
+                return None
+            cls._select(name)
+            return name
+
+    @classmethod
+    def pin(cls, name):
+        # Закрепить профиль (None - снова выбирать по активному окну)
+        with cls._lock:
+            cls._refresh()
+            if name is not None and name not in cls._indexes:
+                return False
+            cls.pinned = name
+            cls._select(cls._profile_for(cls.active_app))
+            return True
+
+    @classmethod
+    def profiles(cls):
+        # {имя: (приложения, родитель, число жестов после слияния)}
+        with cls._lock:
+            cls._refresh()
+            result = {BASE_PROFILE: ((), None, len(cls._indexes[BASE_PROFILE][0]))}
+            for name, profile in cls._profiles.items():
+                if name in cls._indexes:
+                    result[name] = (tuple(profile.get("apps") or ()),
+                                    profile.get("inherits") or BASE_PROFILE,
+                                    len(cls._indexes[name][0]))
+            return result
+
+    @classmethod
+    def load_profiles(cls):
+        with cls._lock:
+            cls._refresh(force=True)
+            return json.loads(json.dumps(cls._profiles))
+
+    @classmethod
+    def next_key(cls, config, prefix):
+        # Ключ для нового записанного жеста: "motion-1", "learned-2", ...
+        number = 1
+        while f"{prefix}-{number}" in config:
+            number += 1
+        return f"{prefix}-{number}"
+
+    @classmethod
+    def trigger_settings(cls, signature):
+        macro = cls.lookup(signature)
+        return macro.trigger if macro is not None else None
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            if cls._store is not None:
+                cls._store.close()
+                cls._store = None
+            cls._config = None
+            cls._index = {}
+            cls._motions = ()
+            cls._stamp = None
+            cls._profiles = {}
+            cls._indexes = {BASE_PROFILE: ({}, ())}
+            cls._app_profiles = {}
+            cls.active_profile = BASE_PROFILE
+
+    @classmethod
+    def _write_json(cls, path, data):
+        directory = os.path.dirname(os.path.abspath(path))
+        tmp_path = None
+        try:
+            # Пишем во временный файл и атомарно подменяем им конфиг
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=".gestures_", suffix=".json.tmp", dir=directory)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            tmp_path = None
+            return True
+        except Exception as e:
+            cls._report("Config Error", f"Failed to save {os.path.basename(path)}: {str(e)}")
+            return False
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def save(cls, config):
+        with cls._lock:
+            if not cls._save(config):
+                return False
+        cls._notify(None)
+        return True
+
+    @classmethod
+    def _save(cls, config):
+        with cls._lock:
+            cls._refresh()
+            try:
+                index = cls.validate(config)
+            except MacroCompileError as e:
+                cls._report("Config Error", f"Failed to save config: {str(e)}")
+                return False
+            store = cls._macro_store()
+            if store is not None:
+                if not cls._store_write(store.write, config):
+                    return False
+            elif not cls._write_json(cls.path, config):
+                return False
+            # Профили наследуют конфиг, поэтому пересобираются вместе с ним
+            stamp = (cls._config_stamp(), cls._stamp[1] if cls._stamp else None)
+            cls._set_cache(dict(config), stamp, index)
+            return True
+
+    @classmethod
+    def put(cls, key, macro):
+        # Добавить или заменить один макрос. В хранилище - одна запись в
+        # базу и правка индексов; JSON-конфиг переписывается целиком
+        with cls._lock:
+            cls._refresh()
+            store = cls._macro_store()
+            if store is None:
+                config = dict(cls._config)
+                config[key] = macro
+                if not cls._save(config):
+                    return False
+            else:
+                sig = GestureRecognizer.canonical_signature(key)
+                try:
+                    compiled = MacroCompiler.compile_macro(sig, macro)
+                except MacroCompileError as e:
+                    cls._report("Config Error", f"Failed to save config: макрос "
+                                                f"'{macro.get('name', sig)}': {str(e)}")
+                    return False
+                if not cls._store_write(store.put, key, macro):
+                    return False
+                cls._config[key] = macro
+                cls._update_indexes(sig, compiled)
+        cls._notify(key)
+        return True
+
+    @classmethod
+    def delete(cls, key):
+        with cls._lock:
+            cls._refresh()
+            if key not in cls._config:
+                return False
+            store = cls._macro_store()
+            if store is None:
+                config = dict(cls._config)
+                del config[key]
+                if not cls._save(config):
+                    return False
+            else:
+                if not cls._store_write(store.delete, key):
+                    return False
+                del cls._config[key]
+                cls._update_indexes(GestureRecognizer.canonical_signature(key), None)
+        cls._notify(key)
+        return True
+
+    @classmethod
+    def _update_indexes(cls, sig, compiled):
+        # Один жест базового конфига сменился: правим индекс каждого профиля,
+        # который его наследует (профиль, задающий или убирающий жест сам, не
+        # меняется). Кортеж жестов-движений пересобирается, только если
+        # затронуто движение
+        for name, (index, motions) in cls._indexes.items():
+            if name != BASE_PROFILE and cls._overrides(name, sig):
+                continue
+            old = index.pop(sig, None)
+            if compiled is not None:
+                index[sig] = compiled
+            if (old is not None and old.motion is not None) or \
+                    (compiled is not None and compiled.motion is not None):
+                cls._indexes[name] = (index, tuple(
+                    m for m in index.values() if m.motion is not None))
+        cls._select(cls.active_profile)
+
+    @classmethod
+    def _overrides(cls, name, sig):
+        while name != BASE_PROFILE:
+            profile = cls._profiles[name]
+            if any(GestureRecognizer.canonical_signature(key) == sig
+                   for key in profile.get("gestures", {})):
+                return True
+            name = profile.get("inherits") or BASE_PROFILE
+        return False
+
+    @classmethod
+    def import_json(cls, path):
+        # Заменить конфиг содержимым JSON-файла (в хранилище - одной транзакцией)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            if not isinstance(config, dict):
+                raise ValueError("ожидался объект JSON")
+        except Exception as e:
+            cls._report("Config Error", f"Failed to load {os.path.basename(path)}: {str(e)}")
+            return False
+        return cls.save(config)
+
+    @classmethod
+    def export_json(cls, path):
+        with cls._lock:
+            return cls._write_json(path, cls.load())
+
+    @classmethod
+    def save_profiles(cls, profiles):
+        with cls._lock:
+            cls._refresh()
+            base = cls._indexes[BASE_PROFILE][0]
+            try:
+                cls._build_profiles(base, profiles, strict=True)
+            except MacroCompileError as e:
+                cls._report("Config Error", f"Failed to save profiles: {str(e)}")
+                return False
+            path = cls.profiles_file()
+            if not cls._write_json(path, profiles):
+                return False
+            stamp = (cls._stamp[0], cls._file_stamp(path))
+            cls._set_cache(cls._config, stamp, base, json.loads(json.dumps(profiles)))
+            return True
@@ -0,0 +1,415 @@
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from frame_sources import LandmarkFrame
+from gesture_recognition import GestureRecognizer
+from hand_tracking import HandDetector, RoiHandTracker
+
+
+class DropOldestQueue(queue.Queue):
+    # Ограниченная очередь: при переполнении выбрасывается самый старый
+    # элемент, чтобы потребитель всегда получал свежие кадры
+    def __init__(self, maxsize=1):
+        super().__init__(maxsize)
+        self.dropped = 0
+
+    def put(self, item, block=False, timeout=None):
+        with self.mutex:
+            while self.maxsize > 0 and self._qsize() >= self.maxsize:
+                self._get()
+                self.unfinished_tasks -= 1
+                self.dropped += 1
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def put_end(self):
+        # Признак конца потока (None) кладётся сверх maxsize: иначе он вытеснил
+        # бы последний результат, и тот не дошёл бы до потребителя
+        with self.mutex:
+            self._put(None)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def get_latest(self):
+        # Самый свежий результат; признак конца за ним не заслоняет его
+        item = None
+        try:
+            while True:
+                latest = self.get_nowait()
+                if latest is not None:
+                    item = latest
+        except queue.Empty:
+            return item
+
+
+def to_rgb_mirrored(frame):
+    # Сначала конвертация, потом отражение на месте: на один полный буфер меньше
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    cv2.flip(rgb, 1, rgb)
+    return rgb
+
+
+def fit_size(size, bounds):
+    # Размер кадра, вписанного в bounds с сохранением пропорций
+    w, h = size
+    bw, bh = bounds
+    scale = min(bw / w, bh / h)
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+
+class FrameRenderer:
+    # Кадр для показа: уменьшается один раз до размера виджета из уже
+    # готового RGB-буфера, ландмарки рисуются на маленьком изображении
+    interpolation = cv2.INTER_LINEAR
+
+    @staticmethod
+    def render(rgb, target_size, hands=()):
+        # hands - ландмарки MediaPipe всех найденных рук
+        h, w = rgb.shape[:2]
+        size = fit_size((w, h), target_size)
+        if size == (w, h):
+            display = rgb.copy() if hands else rgb
+        else:
+            display = cv2.resize(rgb, size, interpolation=FrameRenderer.interpolation)
+        for hand_landmarks in hands:
+            HandDetector.draw_landmarks(display, hand_landmarks, rgb=True)
+        return display
+
+    @staticmethod
+    def render_points(image_size, target_size, hands=()):
+        w, h = fit_size(image_size, target_size)
+        display = np.zeros((h, w, 3), dtype=np.uint8)
+        for points in hands:
+            HandDetector.draw_points(display, points)
+        return display
+
+
+class FrameScheduler:
+    # Частота распознавания: полная (не выше max_fps), пока рука в кадре, и
+    # idle_fps после idle_after секунд без руки. Пропущенные кадры только
+    # забираются из камеры (grab), без декодирования и MediaPipe.
+    def __init__(self, max_fps=30.0, idle_fps=4.0, idle_after=3.0):
+        self.max_fps = max_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.reset()
+
+    def reset(self):
+        self._last_hand = time.monotonic()
+        self._next_due = 0.0
+
+    def is_idle(self, now=None):
+        if not self.idle_fps:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - self._last_hand > self.idle_after
+
+    def due(self, now):
+        if now < self._next_due:
+            return False
+        fps = self.idle_fps if self.is_idle(now) else self.max_fps
+        interval = 1.0 / fps if fps else 0.0
+        # Слоты идут с шагом interval, но долг за простой не накапливается
+        self._next_due = max(self._next_due, now - interval) + interval
+        return True
+
+    def report(self, found, now):
+        if found:
+            if self.is_idle(now):
+                self._next_due = 0.0  # рука появилась - сразу на полную частоту
+            self._last_hand = now
+
+
+class FrameResult:
+    def __init__(self, display, rgb, results, signature, timestamp, points=None,
+                 captured_at=None, hands=(), hand_label=None):
+        self.display = display  # RGB под размер виджета или None, если не показывается
+        self.rgb = rgb
+        self.results = results
+        self.signature = signature
+        self.timestamp = timestamp  # время кадра в потоке (для стабилизатора)
+        self.points = points  # (21, 3) float32 для других распознавателей
+        self.captured_at = captured_at  # time.monotonic() в момент захвата
+        self.hands = hands  # [(метка руки, биты)] для ConfigManager.resolve
+        self.hand_label = hand_label  # "L"/"R"/"" для points
+
+
+def _put(target, item, stop_event):
+    # DropOldestQueue никогда не блокирует; обычная очередь (lossless-режим)
+    # ждёт потребителя, но не дольше, чем до остановки конвейера
+    if isinstance(target, DropOldestQueue):
+        if item is None:
+            target.put_end()
+        else:
+            target.put(item)
+        return True
+    while not stop_event.is_set():
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class CaptureWorker(threading.Thread):
+    def __init__(self, cap, frames, stop_event, scheduler=None, metrics=None):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.frames = frames
+        self.stop_event = stop_event
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.captured = 0
+        self.skipped = 0
+
+    def _read(self):
+        if hasattr(self.cap, 'read_timed'):
+            return self.cap.read_timed()
+        success, frame = self.cap.read()
+        return success, frame, time.monotonic()
+
+    def _skip(self):
+        # Кадр не нужен: освобождаем буфер камеры, не декодируя его
+        if hasattr(self.cap, 'grab'):
+            return self.cap.grab()
+        return self._read()[0]
+
+    def run(self):
+        scheduler = self.scheduler
+        while not self.stop_event.is_set():
+            if scheduler is not None and not scheduler.due(time.monotonic()):
+                try:
+                    success = self._skip()
+                except Exception as e:
+                    print(f"Ошибка захвата кадра: {str(e)}")
+                    break
+                if success:
+                    self.captured += 1
+                    self.skipped += 1
+                elif getattr(self.cap, 'finished', False):
+                    break
+                else:
+                    time.sleep(0.01)
+                continue
+            started = time.perf_counter()
+            try:
+                success, frame, timestamp = self._read()
+            except Exception as e:
+                print(f"Ошибка захвата кадра: {str(e)}")
+                break
+            if not success:
+                if getattr(self.cap, 'finished', False):
+                    break
+                time.sleep(0.01)
+                continue
+            if self.metrics is not None:
+                self.metrics.record("capture", time.perf_counter() - started)
+            self.captured += 1
+            _put(self.frames, (frame, timestamp, time.monotonic()), self.stop_event)
+        # Конец потока (файл закончился или конвейер остановлен)
+        _put(self.frames, None, self.stop_event)
+
+
+class InferenceWorker(threading.Thread):
+    def __init__(self, frames, results, stop_event, detector, on_result=None,
+                 recorder=None, scheduler=None, metrics=None):
+        super().__init__(name="inference", daemon=True)
+        self.frames = frames
+        self.results = results
+        self.stop_event = stop_event
+        self.detector = detector
+        self.on_result = on_result
+        self.recorder = recorder
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.inferred = 0
+        # (w, h) области показа; None - кадры не рендерятся (окно скрыто, CLI)
+        self.render_size = None
+
+    def _process_image(self, frame, timestamp):
+        clock = time.perf_counter
+        t0 = clock()
+        rgb_frame = to_rgb_mirrored(frame)
+        t1 = clock()
+        results = self.detector.process(rgb_frame)
+        t2 = clock()
+        h, w = rgb_frame.shape[:2]
+        if self.recorder:
+            self.recorder.write_results(timestamp, results, (w, h))
+
+        t3 = clock()
+        detected = results.multi_hand_landmarks or []
+        signature, hands, points, label = GestureRecognizer.recognize_hands(
+            [hand.landmark for hand in detected], HandDetector.handedness(results), (w, h))
+        t4 = clock()
+
+        display = None
+        render_size = self.render_size
+        if render_size:
+            display = FrameRenderer.render(rgb_frame, render_size, detected)
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.record("convert", t1 - t0)
+            metrics.record("inference", t2 - t1)
+            metrics.record("recognize", t4 - t3)
+            if render_size:
+                metrics.record("draw", clock() - t4)
+        return display, rgb_frame, results, signature, points, hands, label
+
+    def _process_landmarks(self, record, timestamp):
+        # Записанные ландмарки: MediaPipe не нужен, рисуем их на пустом кадре
+        w, h = record.image_size
+        if self.recorder:
+            self.recorder.write(timestamp, record.hands, (w, h), record.labels)
+
+        clock = time.perf_counter
+        t0 = clock()
+        signature, hands, points, label = GestureRecognizer.recognize_hands(
+            record.hands, record.labels, (w, h))
+        t1 = clock()
+
+        display = None
+        render_size = self.render_size
+        if render_size:
+            display = FrameRenderer.render_points((w, h), render_size, record.hands)
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.record("recognize", t1 - t0)
+            if render_size:
+                metrics.record("draw", clock() - t1)
+        return display, None, None, signature, points, hands, label
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                item = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            frame, timestamp, captured_at = item
+
+            try:
+                if isinstance(frame, LandmarkFrame):
+                    processed = self._process_landmarks(frame, timestamp)
+                else:
+                    processed = self._process_image(frame, timestamp)
+            except Exception as e:
+                print(f"Ошибка обработки кадра: {str(e)}")
+                continue
+
+            display, rgb_frame, results, signature, points, hands, label = processed
+            self.inferred += 1
+            if self.scheduler is not None:
+                self.scheduler.report(points is not None, captured_at)
+            result = FrameResult(display, rgb_frame, results, signature, timestamp, points,
+                                 captured_at, hands, label)
+            _put(self.results, result, self.stop_event)
+            if self.on_result:
+                self.on_result()
+
+        _put(self.results, None, self.stop_event)
+        if self.on_result:
+            self.on_result()
+
+
+class FramePipeline:
+    # Захват -> распознавание -> потребитель (GUI), связанные очередями
+    # с вытеснением старых кадров. GUI-поток только отрисовывает результат.
+    # lossless=True - кадры не выбрасываются (детерминированное воспроизведение)
+    # roi=True - детекция на кадре шириной detect_width, трекинг по области руки
+    # scheduler - FrameScheduler, ограничивающий частоту распознавания
+    # metrics - StageMetrics, куда потоки пишут длительности своих этапов
+    def __init__(self, cap, detector=None, on_result=None, queue_size=1,
+                 lossless=False, recorder=None, roi=True, detect_width=480,
+                 scheduler=None, metrics=None):
+        self.cap = cap
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.tracker = None
+        if not getattr(cap, 'provides_landmarks', False):
+            if detector is None:
+                detector = HandDetector.shared()
+            if roi:
+                self.tracker = RoiHandTracker(detector, detect_width=detect_width)
+        self.detector = detector
+        if lossless:
+            self.frames = queue.Queue(max(queue_size, 1))
+            self.results = queue.Queue(max(queue_size, 1))
+        else:
+            self.frames = DropOldestQueue(queue_size)
+            self.results = DropOldestQueue(queue_size)
+        self._stop_event = threading.Event()
+        self._capture = CaptureWorker(cap, self.frames, self._stop_event, scheduler, metrics)
+        self._inference = InferenceWorker(
+            self.frames, self.results, self._stop_event, self.tracker or self.detector,
+            on_result, recorder, scheduler, metrics)
+
+    @property
+    def render_size(self):
+        return self._inference.render_size
+
+    @render_size.setter
+    def render_size(self, size):
+        self._inference.render_size = size
+
+    @property
+    def running(self):
+        return self._capture.is_alive() or self._inference.is_alive()
+
+    @property
+    def dropped(self):
+        return sum(getattr(q, 'dropped', 0) for q in (self.frames, self.results))
+
+    @property
+    def idle(self):
+        return self.scheduler is not None and self.scheduler.is_idle()
+
+    def counters(self):
+        # captured - прочитано из источника, skipped - пропущено планировщиком,
+        # inferred - распознано, dropped - вытеснено из очередей
+        return {
+            "captured": self._capture.captured,
+            "skipped": self._capture.skipped,
+            "inferred": self._inference.inferred,
+            "dropped": self.dropped,
+        }
+
+    def start(self):
+        if self.scheduler is not None:
+            self.scheduler.reset()
+        self._capture.start()
+        self._inference.start()
+
+    def latest(self):
+        if isinstance(self.results, DropOldestQueue):
+            return self.results.get_latest()
+        try:
+            return self.results.get_nowait()
+        except queue.Empty:
+            return None
+
+    def iter_results(self):
+        # Все результаты по порядку до конца потока (для lossless-режима)
+        while True:
+            try:
+                result = self.results.get(timeout=0.1)
+            except queue.Empty:
+                if not self.running:
+                    return
+                continue
+            if result is None:
+                return
+            yield result
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        for worker in (self._capture, self._inference):
+            if worker.is_alive() and worker is not threading.current_thread():
+                worker.join(timeout)
@@ -0,0 +1,450 @@
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from hand_tracking import HandDetector
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class LandmarkFrame:
+    # Кадр из записанного лога: руки уже найдены, инференс не нужен.
+    # hands - список массивов (21, 3) в нормированных координатах MediaPipe,
+    # labels - метки рук "L"/"R" (None в старых записях)
+    def __init__(self, hands, image_size, timestamp, labels=None):
+        self.hands = hands
+        self.image_size = image_size
+        self.timestamp = timestamp
+        self.labels = labels
+
+
+class FrameSource:
+    # Интерфейс повторяет cv2.VideoCapture (isOpened/read/release), поэтому
+    # источник можно отдать в FramePipeline вместо камеры
+    provides_landmarks = False
+
+    def __init__(self):
+        self.finished = False
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        ok, frame, _ = self.read_timed()
+        return ok, frame
+
+    def read_timed(self):
+        raise NotImplementedError
+
+    def grab(self):
+        # Пропустить кадр; камера переопределяет это без декодирования
+        return self.read_timed()[0]
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+# Бэкенды захвата в порядке попытки: DSHOW открывается быстрее MSMF, на
+# Linux CAP_ANY может выбрать GStreamer, который игнорирует размер буфера
+PLATFORM_BACKENDS = {
+    'win32': ('DSHOW', 'MSMF'),
+    'darwin': ('AVFOUNDATION',),
+    'linux': ('V4L2',),
+}
+BACKEND_NAMES = ('auto', 'any', 'dshow', 'msmf', 'v4l2', 'avfoundation', 'gstreamer')
+
+
+def camera_backends(name=None):
+    # Константы cv2.CAP_* для имени бэкенда ("auto" - по платформе), CAP_ANY - последним
+    if name and name != 'auto':
+        if name.lower() not in BACKEND_NAMES:
+            raise ValueError(f"Неизвестный бэкенд камеры: {name}")
+        return [getattr(cv2, 'CAP_' + name.upper())]
+    platform = 'linux' if sys.platform.startswith('linux') else sys.platform
+    names = PLATFORM_BACKENDS.get(platform, ())
+    return [getattr(cv2, 'CAP_' + n) for n in names if hasattr(cv2, 'CAP_' + n)] + [cv2.CAP_ANY]
+
+
+def fourcc_code(name):
+    return cv2.VideoWriter_fourcc(*name)
+
+
+def fourcc_name(value):
+    code = int(value)
+    if code <= 0:
+        return '?'
+    return ''.join(chr((code >> 8 * i) & 0xFF) for i in range(4)).strip('\0') or '?'
+
+
+class CaptureSettings:
+    # Что запросить у камеры. Камера может выдать другое - фактические
+    # значения после согласования лежат в CameraSource.negotiated.
+    # fourcc "auto": YUYV до 640x480 (без декодирования JPEG), MJPG выше
+    # (несжатый поток такого размера не проходит по USB 2.0 с полной частотой).
+    # buffer_size - буферов драйвера: каждый лишний - кадр задержки.
+    # latest - отбрасывать накопившиеся в буфере кадры перед чтением
+    def __init__(self, width=640, height=480, fps=30.0, fourcc='auto', buffer_size=1,
+                 backend='auto', latest=True):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.backend = backend
+        self.latest = latest
+
+    def formats(self):
+        if self.fourcc and self.fourcc != 'auto':
+            return [self.fourcc.upper()]
+        if self.width and self.height and self.width * self.height > 640 * 480:
+            return ['MJPG', 'YUYV']
+        return ['YUYV', 'MJPG']
+
+    def describe(self):
+        size = f"{self.width}x{self.height}" if self.width and self.height else "как есть"
+        return f"{size} {self.fourcc} {self.fps:g} кадров/с, буфер {self.buffer_size}"
+
+
+class CameraSource(FrameSource):
+    # Grab из буфера драйвера возвращается сразу, а свежего кадра приходится
+    # ждать. Кадр, полученный быстрее STALE_GRAB секунд, считается устаревшим
+    STALE_GRAB = 0.002
+    MAX_DRAIN = 8
+
+    def __init__(self, index=0, backend=None, settings=None):
+        super().__init__()
+        self.index = index
+        self.settings = settings or CaptureSettings()
+        self.negotiated = {}
+        self.stale = 0  # сколько устаревших кадров отброшено в режиме latest
+        backends = [backend] if backend is not None else camera_backends(self.settings.backend)
+        self.cap = None
+        for backend in backends:
+            self.cap = self._open(index, backend)
+            if self.cap.isOpened():
+                self.negotiate()
+                break
+            self.cap.release()
+
+    def _open(self, index, backend):
+        return cv2.VideoCapture(index, backend)
+
+    def negotiate(self):
+        # Формат ставится до размера: V4L2 и DSHOW выбирают режим по паре формат+размер
+        cap, settings = self.cap, self.settings
+        fourcc = None
+        for name in settings.formats():
+            cap.set(cv2.CAP_PROP_FOURCC, fourcc_code(name))
+            if settings.width and settings.height:
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, settings.width)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, settings.height)
+            fourcc = fourcc_name(cap.get(cv2.CAP_PROP_FOURCC))
+            if fourcc == name:
+                break
+        if settings.fps:
+            cap.set(cv2.CAP_PROP_FPS, settings.fps)
+        if settings.buffer_size:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, settings.buffer_size)
+        try:
+            backend = cap.getBackendName()
+        except cv2.error:
+            backend = '?'
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        self.negotiated = {
+            'backend': backend,
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': fps if fps > 0 else None,
+            'fourcc': fourcc,
+            # 0 или -1 - бэкенд не даёт менять буфер (MSMF, AVFoundation)
+            'buffer_size': int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+        }
+        return self.negotiated
+
+    def describe(self):
+        n = self.negotiated
+        if not n:
+            return "камера не открыта"
+        fps = f"{n['fps']:g}" if n['fps'] else "?"
+        buffers = n['buffer_size'] if n['buffer_size'] > 0 else "не настраивается"
+        latest = ", только свежие кадры" if self.settings.latest else ""
+        return (f"{n['backend']} {n['width']}x{n['height']} {n['fourcc']} {fps} кадров/с, "
+                f"буфер {buffers}{latest}")
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read_timed(self):
+        if not self.settings.latest:
+            ok, frame = self.cap.read()
+            return ok, frame, time.monotonic()
+        if not self._grab_latest():
+            return False, None, None
+        # Время захвата - конец grab: retrieve (декодирование) уже не ожидание камеры
+        timestamp = time.monotonic()
+        ok, frame = self.cap.retrieve()
+        return ok, frame, timestamp
+
+    def _grab_latest(self):
+        # Забираем кадры из буфера без декодирования, пока grab не начнёт ждать
+        # камеру: тот кадр только что снят. Если буфер пуст, это один grab
+        for _ in range(self.MAX_DRAIN):
+            started = time.monotonic()
+            if not self.cap.grab():
+                return False
+            if time.monotonic() - started >= self.STALE_GRAB:
+                return True
+            self.stale += 1
+        self.stale -= 1  # последний забранный кадр всё же отдаётся
+        return True
+
+    def grab(self):
+        return self.cap.grab()
+
+    def release(self):
+        if self.cap is not None and self.cap.isOpened():
+            self.cap.release()
+
+
+class _PacedSource(FrameSource):
+    # paced=True - отдавать кадры в реальном времени по их меткам времени,
+    # иначе с максимальной скоростью (для тестов и бенчмарков)
+    def __init__(self, paced=False, loop=False):
+        super().__init__()
+        self.paced = paced
+        self.loop = loop
+        self._start = None
+        self._offset = 0.0
+
+    def _pace(self, timestamp):
+        if not self.paced:
+            return
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now - timestamp
+        delay = self._start + timestamp - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def _rewind(self, last_timestamp):
+        self._offset = last_timestamp
+
+
+class VideoFileSource(_PacedSource):
+    def __init__(self, path, paced=False, loop=False):
+        super().__init__(paced, loop)
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        self.fps = fps if fps and fps > 0 else 30.0
+        self._index = 0
+        self._last = 0.0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read_timed(self):
+        ok, frame = self.cap.read()
+        if not ok and self.loop and self._index:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._rewind(self._last + 1 / self.fps)
+            self._index = 0
+            ok, frame = self.cap.read()
+        if not ok:
+            self.finished = True
+            return False, None, None
+        timestamp = self._offset + self._index / self.fps
+        self._index += 1
+        self._last = timestamp
+        self._pace(timestamp)
+        return True, frame, timestamp
+
+    def release(self):
+        if self.cap.isOpened():
+            self.cap.release()
+
+
+class ImageDirSource(_PacedSource):
+    def __init__(self, path, fps=30.0, paced=False, loop=False):
+        super().__init__(paced, loop)
+        self.fps = fps
+        self.files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self._index = 0
+
+    def isOpened(self):
+        return bool(self.files)
+
+    def read_timed(self):
+        if self._index >= len(self.files):
+            if not self.loop or not self.files:
+                self.finished = True
+                return False, None, None
+            self._rewind(self._offset + self._index / self.fps)
+            self._index = 0
+        frame = cv2.imread(self.files[self._index])
+        timestamp = self._offset + self._index / self.fps
+        self._index += 1
+        if frame is None:
+            print(f"Не удалось прочитать изображение: {self.files[self._index - 1]}")
+            return False, None, None
+        self._pace(timestamp)
+        return True, frame, timestamp
+
+
+class LandmarkLogSource(_PacedSource):
+    # Воспроизведение записи LandmarkRecorder (.jsonl или .npz) без камеры и MediaPipe
+    provides_landmarks = True
+
+    def __init__(self, path, paced=False, loop=False):
+        super().__init__(paced, loop)
+        self.path = path
+        self.frames = LandmarkLogSource.load(path)
+        self._index = 0
+
+    @staticmethod
+    def load(path):
+        if path.endswith('.npz'):
+            return LandmarkLogSource._load_npz(path)
+        frames = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                hands = [np.asarray(h, dtype=np.float32) for h in record.get("hands", [])]
+                frames.append(LandmarkFrame(hands, tuple(record.get("size", (640, 480))),
+                                            float(record["t"]), record.get("labels")))
+        return frames
+
+    @staticmethod
+    def _load_npz(path):
+        with np.load(path) as data:
+            points = data["points"].astype(np.float32)
+            if points.ndim == 3:
+                points = points[:, None]
+            count = data["count"] if "count" in data else np.full(len(points), points.shape[1])
+            if "t" in data:
+                timestamps = data["t"]
+            else:
+                timestamps = np.arange(len(points)) / 30.0
+            size = tuple(int(v) for v in data["size"]) if "size" in data else (640, 480)
+            labels = data["labels"] if "labels" in data else None
+        frames = []
+        for i in range(len(points)):
+            keep = [h for h in range(int(count[i])) if not np.isnan(points[i, h]).any()]
+            frame_labels = [str(labels[i, h]) for h in keep] if labels is not None else None
+            frames.append(LandmarkFrame([points[i, h] for h in keep], size,
+                                        float(timestamps[i]), frame_labels))
+        return frames
+
+    def isOpened(self):
+        return bool(self.frames)
+
+    def read_timed(self):
+        if self._index >= len(self.frames):
+            if not self.loop or not self.frames:
+                self.finished = True
+                return False, None, None
+            last = self.frames[-1].timestamp - self.frames[0].timestamp
+            self._rewind(self._offset + last + 1 / 30.0)
+            self._index = 0
+        record = self.frames[self._index]
+        self._index += 1
+        timestamp = self._offset + record.timestamp - self.frames[0].timestamp
+        self._pace(timestamp)
+        frame = LandmarkFrame(record.hands, record.image_size, timestamp, record.labels)
+        return True, frame, timestamp
+
+
+class LandmarkRecorder:
+    # Запись потока ландмарок на диск: .jsonl пишется построчно,
+    # .npz собирается в памяти и сохраняется в close()
+    def __init__(self, path, max_hands=2):
+        self.path = path
+        self.max_hands = max_hands
+        self.count = 0
+        self._npz = path.endswith('.npz')
+        self._rows = []
+        self._file = None if self._npz else open(path, 'w', encoding='utf-8')
+
+    def write(self, timestamp, hands, image_size, labels=None):
+        hands = [np.asarray(h, dtype=np.float32) for h in hands][:self.max_hands]
+        labels = list(labels)[:len(hands)] if labels else None
+        self.count += 1
+        if self._npz:
+            self._rows.append((timestamp, hands, image_size, labels))
+            return
+        record = {
+            "t": round(float(timestamp), 6),
+            "size": list(image_size),
+            "hands": [np.round(h, 6).tolist() for h in hands],
+        }
+        if labels:
+            record["labels"] = labels
+        self._file.write(json.dumps(record) + "\n")
+
+    def write_results(self, timestamp, results, image_size):
+        hands = []
+        labels = None
+        if results is not None and results.multi_hand_landmarks:
+            hands = [[(lm.x, lm.y, lm.z) for lm in hand.landmark]
+                     for hand in results.multi_hand_landmarks]
+            labels = HandDetector.handedness(results)
+        self.write(timestamp, hands, image_size, labels)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self._npz and self._rows is not None:
+            n = len(self._rows)
+            points = np.full((n, self.max_hands, 21, 3), np.nan, dtype=np.float32)
+            count = np.zeros(n, dtype=np.int8)
+            timestamps = np.zeros(n, dtype=np.float64)
+            labels = np.full((n, self.max_hands), '', dtype='<U1')
+            size = self._rows[0][2] if self._rows else (640, 480)
+            for i, (timestamp, hands, _, hand_labels) in enumerate(self._rows):
+                timestamps[i] = timestamp
+                count[i] = len(hands)
+                for h, hand in enumerate(hands):
+                    points[i, h] = hand
+                for h, label in enumerate(hand_labels or ()):
+                    labels[i, h] = label
+            np.savez_compressed(self.path, t=timestamps, points=points, count=count,
+                                size=np.array(size), labels=labels)
+            self._rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_source(spec, paced=False, loop=False, settings=None):
+    # "camera" или номер устройства (/dev/videoN - например, v4l2loopback),
+    # папка с кадрами, .jsonl/.npz или видеофайл. settings - CaptureSettings камеры
+    if spec is None or spec == "camera":
+        return CameraSource(0, settings=settings)
+    if str(spec).isdigit():
+        return CameraSource(int(spec), settings=settings)
+    if str(spec).startswith("/dev/video"):
+        return CameraSource(spec, settings=settings)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, paced=paced, loop=loop)
+    if spec.endswith(('.jsonl', '.npz')):
+        return LandmarkLogSource(spec, paced=paced, loop=loop)
+    return VideoFileSource(spec, paced=paced, loop=loop)
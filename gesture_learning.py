@@ -0,0 +1,195 @@
+import os
+import tempfile
+
+import numpy as np
+
+LEARNED_FILE = "gestures_learned.npz"
+FORMAT_VERSION = 1
+
+WRIST = 0
+MIDDLE_MCP = 9
+EMBEDDING_SIZE = 20 * 3
+
+
+def as_right_hand(points, labels=None):
+    # Левые руки отражаются в правые, чтобы образцы одной рукой узнавались в другой
+    points = np.array(points, dtype=np.float32, copy=True)
+    if points.ndim == 2:
+        points = points[None]
+    if labels is not None:
+        left = np.array([label == "L" for label in labels], dtype=bool)
+        points[left, :, 0] *= -1
+    return points
+
+
+def embed(points, labels=None):
+    # (N, 21, 3) точки рук (после landmarks_to_array) -> (N, 60) единичные
+    # векторы: запястье в начале координат, ладонь повёрнута вверх и
+    # приведена к единичному размеру
+    points = as_right_hand(points, labels)
+    points -= points[:, WRIST:WRIST + 1]
+    axis = points[:, MIDDLE_MCP, :2]
+    length = np.maximum(np.linalg.norm(axis, axis=1), 1e-6)
+    # Поворот, переводящий ось запястье -> средний палец в (0, -1)
+    cos, sin = -axis[:, 1] / length, -axis[:, 0] / length
+    x, y = points[:, :, 0].copy(), points[:, :, 1]
+    points[:, :, 0] = x * cos[:, None] - y * sin[:, None]
+    points[:, :, 1] = x * sin[:, None] + y * cos[:, None]
+    vectors = points[:, 1:].reshape(len(points), -1) / length[:, None]
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-6)
+
+
+class LearnedGestures:
+    # Записанные образцы жестов и индекс ближайших соседей по ним.
+    # Образцы (сырые точки) и эмбеддинги хранятся в одном .npz: при загрузке
+    # индекс берётся готовым, а при смене формата пересчитывается из точек.
+    # Ключи - ключи конфига ("learned-1", ...), к ним привязаны макросы.
+    k = 5
+    min_confidence = 0.6  # доля голосов k соседей за победителя
+    # Допустимое расстояние до ближайшего образца победителя - своё у каждого
+    # жеста: разброс его образцов (расстояние до ближайшего соседа того же
+    # жеста, 90-й перцентиль), умноженный на spread_scale, в пределах
+    # min_distance..max_distance. С одним общим порогом единственный выученный
+    # жест забирал и позы с другими пальцами
+    spread_scale = 3.0
+    min_distance = 0.1
+    max_distance = 0.35
+    # При большом числе жестов точный поиск соседей идёт только по образцам
+    # жестов с ближайшими к кадру центроидами
+    candidate_keys = 16
+
+    def __init__(self, path=None):
+        self.path = path
+        self.keys = []
+        self.points = np.zeros((0, 21, 3), dtype=np.float32)
+        self.owners = np.zeros(0, dtype=np.int32)
+        self.embeddings = np.zeros((0, EMBEDDING_SIZE), dtype=np.float32)
+        self._index = None
+
+    @staticmethod
+    def path_for(config_path):
+        return os.path.join(os.path.dirname(os.path.abspath(config_path)), LEARNED_FILE)
+
+    def __len__(self):
+        return len(self.owners)
+
+    def counts(self):
+        counts = np.bincount(self.owners, minlength=len(self.keys))
+        return {key: int(count) for key, count in zip(self.keys, counts)}
+
+    def add(self, key, points, labels=None):
+        points = as_right_hand(np.reshape(points, (-1, 21, 3)), labels)
+        if not len(points):
+            return
+        if key not in self.keys:
+            self.keys.append(key)
+        owner = self.keys.index(key)
+        self.points = np.concatenate([self.points, points])
+        self.owners = np.concatenate([self.owners, np.full(len(points), owner, dtype=np.int32)])
+        self.embeddings = np.concatenate([self.embeddings, embed(points)])
+        self._index = None
+
+    def remove(self, key):
+        if key not in self.keys:
+            return
+        owner = self.keys.index(key)
+        keep = self.owners != owner
+        self.points, self.embeddings = self.points[keep], self.embeddings[keep]
+        owners = self.owners[keep]
+        self.owners = owners - (owners > owner)
+        del self.keys[owner]
+        self._index = None
+
+    def _build_index(self):
+        # Центроиды жестов и номера их образцов для отбора кандидатов,
+        # пороги расстояния по жестам
+        order = np.argsort(self.owners, kind="stable")
+        bounds = np.cumsum(np.bincount(self.owners, minlength=len(self.keys)))[:-1]
+        members = np.split(order, bounds)
+        centroids = np.zeros((len(self.keys), EMBEDDING_SIZE), dtype=np.float32)
+        spread = np.zeros(len(self.keys))
+        for i, rows in enumerate(members):
+            group = self.embeddings[rows]
+            centroids[i] = group.sum(axis=0)
+            spread[i] = self._spread(group)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-6)
+        radii = np.clip(self.spread_scale * spread, self.min_distance, self.max_distance)
+        self._index = centroids, members, radii
+        return self._index
+
+    @staticmethod
+    def _spread(embeddings):
+        # 90-й перцентиль расстояния образца до ближайшего образца того же жеста
+        if len(embeddings) < 2:
+            return 0.0
+        similarity = embeddings @ embeddings.T
+        np.fill_diagonal(similarity, -1.0)
+        nearest = np.sort(similarity.max(axis=1))
+        return float(np.sqrt(max(2.0 - 2.0 * nearest[int(0.1 * (len(nearest) - 1))], 0.0)))
+
+    def classify(self, points, label=None):
+        # (21, 3) точки руки -> (ключ, уверенность) или (None, уверенность)
+        if not len(self.owners):
+            return None, 0.0
+        query = embed(points, None if label is None else [label])[0]
+        embeddings, owners = self.embeddings, self.owners
+        centroids, members, radii = self._index or self._build_index()
+        if len(self.keys) > self.candidate_keys:
+            closest = np.argpartition(centroids @ query, -self.candidate_keys)
+            rows = np.concatenate([members[i] for i in closest[-self.candidate_keys:]])
+            embeddings, owners = embeddings[rows], owners[rows]
+        similarity = embeddings @ query
+        k = min(self.k, len(similarity))
+        nearest = np.argpartition(similarity, -k)[-k:] if k < len(similarity) else \
+            np.arange(len(similarity))
+        votes = np.bincount(owners[nearest], minlength=len(self.keys))
+        winner = int(np.argmax(votes))
+        confidence = votes[winner] / k
+        # Для единичных векторов |a - b| = sqrt(2 - 2 cos)
+        best = similarity[nearest[owners[nearest] == winner]].max()
+        distance = float(np.sqrt(max(2.0 - 2.0 * best, 0.0)))
+        if confidence < self.min_confidence or distance > radii[winner]:
+            return None, confidence
+        return self.keys[winner], confidence
+
+    def load(self, path=None):
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return self
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                keys = [str(key) for key in data["keys"]]
+                points = data["points"].astype(np.float32)
+                owners = data["owners"].astype(np.int32)
+                version = int(data["version"]) if "version" in data else 0
+                embeddings = data["embeddings"] if version == FORMAT_VERSION else None
+        except Exception as e:
+            print(f"Ошибка загрузки образцов жестов: {str(e)}")
+            return self
+        self.keys, self.points, self.owners = keys, points, owners
+        self._index = None
+        # Точки хранятся уже приведёнными к правой руке
+        self.embeddings = embeddings if embeddings is not None else embed(points)
+        # Индекс и пороги строятся сразу, а не на первом кадре распознавания
+        if len(self.owners):
+            self._build_index()
+        return self
+
+    def save(self, path=None):
+        path = path or self.path
+        directory = os.path.dirname(os.path.abspath(path))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=".learned_", suffix=".npz", dir=directory)
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, version=np.int32(FORMAT_VERSION), keys=np.array(self.keys, dtype=str),
+                         points=self.points, owners=self.owners, embeddings=self.embeddings)
+            os.replace(tmp_path, path)
+            tmp_path = None
+            return True
+        except Exception as e:
+            print(f"Ошибка сохранения образцов жестов: {str(e)}")
+            return False
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,457 @@
+# Консольный режим GestureMacro без PyQt5.
+#   python gesture_macro.py run [--source camera|video.mp4|frames/|log.jsonl] [--dry-run]
+#                               [--camera-size 1280x720 --camera-format MJPG --camera-fps 30]
+#   python gesture_macro.py bind --gesture=11000 --macro="KEY: enter" [--macro ...] [--profile NAME]
+#   python gesture_macro.py profiles [--set NAME --apps firefox chrome [--inherits default]]
+#   python gesture_macro.py bench recording.mp4
+import argparse
+import sys
+import time
+
+from config_manager import BASE_PROFILE, CONFIG_FILE, ConfigManager
+
+DRAIN_TIMEOUT = 10.0  # сколько ждать очередь макросов после конца источника, секунд
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def _print_macro_event(event, macro, detail):
+    from macro_runner import (
+        EVENT_CANCELLED, EVENT_DONE, EVENT_DROPPED, EVENT_ERROR, EVENT_EXITED
+    )
+
+    if event == EVENT_DONE:
+        print(f"Выполнено: {macro.name}")
+    elif event == EVENT_CANCELLED:
+        print(f"Отменено: {macro.name}")
+    elif event == EVENT_DROPPED:
+        print(f"Пропущено ({detail}): {macro.name}")
+    elif event == EVENT_ERROR:
+        print(f"Ошибка: {detail}")
+    elif event == EVENT_EXITED:
+        print(f"Команда '{macro.name}': {detail}")
+
+
+def cmd_run(args):
+    from app_focus import FocusWatcher, detect_focus_backend
+    from frame_pipeline import FramePipeline, FrameScheduler
+    from frame_sources import CameraSource, LandmarkRecorder, open_source
+    from gesture_learning import LearnedGestures
+    from gesture_recognition import GestureStabilizer
+    from hand_tracking import HandDetector
+    from macro_runner import MacroRunner, listen_hotkey
+    from keystrokes import TypingSettings
+    from macros import get_keystroke_engine, get_processes
+    from motion_recognition import MotionMatcher
+    from process_manager import ProcessManager
+    from stage_metrics import StageMetrics
+
+    # До открытия источника: дальше запускаются потоки, которые нужно останавливать
+    if args.profile and not ConfigManager.pin(args.profile):
+        print(f"Нет профиля: {args.profile}")
+        return 1
+    try:
+        source = open_source(args.source, paced=not args.fast, loop=args.loop,
+                             settings=_capture_settings(args))
+    except ValueError as e:
+        print(f"Ошибка параметров камеры: {str(e)}")
+        return 1
+    if not source.isOpened():
+        print(f"Не удалось открыть источник: {args.source}")
+        source.release()
+        return 1
+
+    recorder = LandmarkRecorder(args.record) if args.record else None
+    live = isinstance(source, CameraSource)
+    if live:
+        print(f"Камера: {source.describe()}")
+    # Записи воспроизводятся без пропусков, планировщик нужен только камере
+    scheduler = FrameScheduler(args.max_fps, args.idle_fps, args.idle_after) if live else None
+    detector = None if source.provides_landmarks else HandDetector(max_num_hands=args.max_hands)
+    metrics = StageMetrics() if args.metrics else None
+    pipeline = FramePipeline(source, detector, lossless=not live, queue_size=1 if live else 4,
+                             recorder=recorder, roi=not args.no_roi,
+                             detect_width=args.detect_width, scheduler=scheduler,
+                             metrics=metrics)
+    stabilizer = GestureStabilizer(ConfigManager.trigger_settings)
+    motion = MotionMatcher()
+    learned = LearnedGestures(LearnedGestures.path_for(ConfigManager.path)).load()
+    runner = MacroRunner(on_event=_print_macro_event, metrics=metrics)
+    processes = get_processes()
+    processes.log_path = args.command_log or ProcessManager.path_for(ConfigManager.path)
+    processes.max_running = args.max_commands
+    if not args.quiet_commands:
+        processes.on_output = lambda job, line: print(f"[{job.pid}] {line}")
+    hotkey = None if args.dry_run else listen_hotkey(args.cancel_hotkey, runner.cancel)
+    if not args.dry_run:
+        # Настройки ввода для макросов без собственного "typing"
+        get_keystroke_engine().defaults = TypingSettings(
+            args.key_delay, args.action_delay, args.paste_over)
+
+    def focus_changed(app):
+        profile = ConfigManager.switch_app(app)
+        if profile is not None:
+            print(f"Профиль: {profile} ({app or '-'})")
+    # С закреплённым профилем активное окно не отслеживается
+    focus = FocusWatcher(detect_focus_backend("none" if args.profile else args.focus),
+                         focus_changed)
+    deadline = time.monotonic() + args.duration if args.duration else None
+    # Файл метрик перезаписывается каждые metrics_interval секунд и при выходе
+    next_dump = time.monotonic() + args.metrics_interval if args.metrics_interval else None
+
+    def trigger(macro):
+        if args.dry_run:
+            print(f"Жест {macro.signature}: {macro.name} (dry-run)")
+        else:
+            runner.submit(macro)
+
+    interrupted = False
+    print(f"Распознавание запущено (профиль {ConfigManager.active_profile}), Ctrl+C для выхода")
+    focus.start()
+    pipeline.start()
+    try:
+        for result in pipeline.iter_results():
+            started = time.perf_counter()
+            key = None
+            if len(learned) and result.points is not None:
+                key, _ = learned.classify(result.points, result.hand_label)
+            fired = stabilizer.update(ConfigManager.resolve(result.hands, key), result.timestamp)
+            if fired:
+                macro = ConfigManager.lookup(fired)
+                if macro is not None:
+                    trigger(macro)
+            moved = motion.update(result.points, result.timestamp, ConfigManager.motion_macros())
+            if moved is not None:
+                trigger(moved)
+            now = time.monotonic()
+            if metrics is not None:
+                metrics.record("lookup", time.perf_counter() - started)
+                metrics.record("total", now - result.captured_at)
+                metrics.frame_done(now)
+                if next_dump and now >= next_dump:
+                    metrics.dump(args.metrics)
+                    next_dump = now + args.metrics_interval
+            if deadline and now > deadline:
+                break
+    except KeyboardInterrupt:
+        # Ctrl+C отменяет и очередь макросов, а не ждёт её (WAIT: может быть долгим)
+        interrupted = True
+        runner.cancel()
+    finally:
+        focus.stop()
+        pipeline.stop()
+        source.release()
+        if recorder:
+            recorder.close()
+        if detector:
+            detector.close()
+        if hotkey is not None:
+            hotkey.stop()
+        try:
+            # В конце записи макросам дают доиграть, но не дольше DRAIN_TIMEOUT
+            runner.wait(timeout=1.0 if interrupted else DRAIN_TIMEOUT)
+        except KeyboardInterrupt:
+            pass
+        runner.stop(timeout=1.0)
+        processes.close()
+        if metrics is not None and metrics.dump(args.metrics):
+            print(f"Метрики этапов записаны в {args.metrics}")
+    print("Кадров получено {captured}, распознано {inferred}, пропущено {skipped}, "
+          "вытеснено {dropped}".format(**pipeline.counters()))
+    if runner.counters["started"]:
+        line = ("Макросов выполнено {done}, отменено {cancelled}, пропущено {dropped}, "
+                "ошибок {error}".format(**runner.counters))
+        if runner.latencies:
+            line += (f"; до первого нажатия p50 {runner.latency_ms(50):.1f} мс, "
+                     f"p95 {runner.latency_ms(95):.1f} мс")
+        print(line)
+    running, pending = processes.counts()
+    if running or pending:
+        print(f"Команды ещё выполняются: {running}, в очереди: {pending}")
+    return 0
+
+
+def cmd_bind(args):
+    from macros import MacroCompiler, MacroCompileError
+
+    signature = args.gesture.strip()
+    if not signature:
+        print("Не указана сигнатура жеста")
+        return 1
+    try:
+        MacroCompiler.compile(args.macro)
+    except MacroCompileError as e:
+        print(f"Ошибка: {str(e)}")
+        return 1
+
+    profiles = None
+    if args.profile and args.profile != BASE_PROFILE:
+        profiles = ConfigManager.load_profiles()
+        config = profiles.setdefault(args.profile, {}).setdefault("gestures", {})
+        entry = dict(config.get(signature) or {})
+    else:
+        entry = ConfigManager.entry(signature) or {}
+    entry.update(name=args.name or entry.get("name") or signature, actions=args.macro)
+    if args.policy:
+        entry["policy"] = args.policy
+    if args.timeout:
+        entry["timeout"] = args.timeout
+    if profiles is not None:
+        config[signature] = entry
+    if not (ConfigManager.save_profiles(profiles) if profiles is not None
+            else ConfigManager.put(signature, entry)):
+        return 1
+    print(f"Жест {signature} -> {entry['name']}: {len(args.macro)} действ."
+          + (f" (профиль {args.profile})" if profiles is not None else ""))
+    return 0
+
+
+def cmd_profiles(args):
+    if args.set:
+        if args.set == BASE_PROFILE:
+            print(f"Профиль {BASE_PROFILE} - сам конфиг, у него нет приложений")
+            return 1
+        profiles = ConfigManager.load_profiles()
+        profile = profiles.setdefault(args.set, {})
+        if args.apps is not None:
+            profile["apps"] = args.apps
+        if args.inherits:
+            profile["inherits"] = args.inherits
+        if not ConfigManager.save_profiles(profiles):
+            return 1
+
+    print(f"{'профиль':<16} {'наследует':<16} {'жестов':>6}  приложения")
+    for name, (apps, parent, count) in ConfigManager.profiles().items():
+        print(f"{name:<16} {parent or '-':<16} {count:>6}  {', '.join(apps) or '-'}")
+    return 0
+
+
+def cmd_import(args):
+    if not ConfigManager.import_json(args.file):
+        return 1
+    print(f"{args.file} -> {ConfigManager.path}: {len(ConfigManager.keys())} макросов")
+    return 0
+
+
+def cmd_export(args):
+    if not ConfigManager.export_json(args.file):
+        return 1
+    print(f"{ConfigManager.path} -> {args.file}: {len(ConfigManager.keys())} макросов")
+    return 0
+
+
+def cmd_bench(args):
+    from frame_pipeline import to_rgb_mirrored
+    from frame_sources import LandmarkFrame, open_source
+    from gesture_recognition import GestureRecognizer, GestureStabilizer
+    from hand_tracking import HandDetector, RoiHandTracker
+
+    source = open_source(args.source)
+    if not source.isOpened():
+        print(f"Не удалось открыть источник: {args.source}")
+        source.release()
+        return 1
+
+    stages = ("capture", "convert", "inference", "recognize", "lookup")
+    timings = {stage: [] for stage in stages}
+    totals = []
+    hand_counts = [0, 0, 0]
+    stabilizer = GestureStabilizer(ConfigManager.trigger_settings)
+    ConfigManager.lookup("")  # прогрев кеша конфига
+    detector = tracker = None
+    if not source.provides_landmarks:
+        detector = HandDetector(max_num_hands=args.max_hands)
+        if not args.no_roi:
+            tracker = RoiHandTracker(detector, detect_width=args.detect_width)
+    clock = time.perf_counter
+
+    try:
+        while args.frames <= 0 or len(totals) < args.frames:
+            t0 = clock()
+            ok, frame, timestamp = source.read_timed()
+            t1 = clock()
+            if not ok:
+                if source.finished:
+                    break
+                continue
+
+            if isinstance(frame, LandmarkFrame):
+                hand_points, labels = frame.hands, frame.labels
+                size = frame.image_size
+                t2 = t3 = t1
+            else:
+                rgb_frame = to_rgb_mirrored(frame)
+                t2 = clock()
+                results = (tracker or detector).process(rgb_frame)
+                t3 = clock()
+                hand_points = [hand.landmark for hand in results.multi_hand_landmarks or ()]
+                labels = HandDetector.handedness(results)
+                size = (rgb_frame.shape[1], rgb_frame.shape[0])
+
+            _, hands, _, _ = GestureRecognizer.recognize_hands(hand_points, labels, size)
+            hand_counts[min(len(hands), 2)] += 1
+            t4 = clock()
+            fired = stabilizer.update(ConfigManager.resolve(hands), timestamp)
+            if fired:
+                ConfigManager.lookup(fired)
+            t5 = clock()
+
+            for stage, elapsed in zip(stages, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                timings[stage].append(elapsed)
+            totals.append(t5 - t0)
+    finally:
+        source.release()
+        if detector:
+            detector.close()
+
+    if not totals:
+        print("Источник не дал ни одного кадра")
+        return 1
+
+    print(f"Кадров: {len(totals)}, {len(totals) / sum(totals):.1f} кадров/с (последовательно)")
+    print(f"Кадров без рук: {hand_counts[0]}, с одной рукой: {hand_counts[1]}, "
+          f"с двумя: {hand_counts[2]}")
+    if tracker:
+        print("Проходы MediaPipe: полный кадр {full}, область руки {roi}, "
+              "потеря трекинга {fallback}".format(**tracker.stats))
+    print(f"{'этап':<10} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}  (мс)")
+    for stage in stages + ("total",):
+        values = totals if stage == "total" else timings[stage]
+        print(f"{stage:<10} {sum(values) / len(values) * 1000:9.3f} "
+              f"{_percentile(values, 50) * 1000:9.3f} {_percentile(values, 95) * 1000:9.3f} "
+              f"{max(values) * 1000:9.3f}")
+    return 0
+
+
+def _add_detection_args(parser):
+    parser.add_argument("--max-hands", type=int, choices=(1, 2), default=2,
+                        help="сколько рук искать (1 - дешевле, без аккордов)")
+    parser.add_argument("--detect-width", type=int, default=480,
+                        help="ширина кадра для поиска руки (0 - без уменьшения)")
+    parser.add_argument("--no-roi", action="store_true",
+                        help="не обрезать кадр по области руки")
+
+
+def _add_capture_args(parser):
+    # Без choices=BACKEND_NAMES: иначе bind/profiles тоже импортировали бы cv2
+    parser.add_argument("--camera-size", default="640x480",
+                        help="разрешение камеры ШxВ (\"\" - оставить как есть)")
+    parser.add_argument("--camera-fps", type=float, default=30, help="частота кадров камеры")
+    parser.add_argument("--camera-format", default="auto",
+                        help="формат кадров: auto, MJPG, YUYV, ...")
+    parser.add_argument("--camera-buffers", type=int, default=1,
+                        help="буферов драйвера камеры (больше - выше задержка)")
+    parser.add_argument("--camera-backend", default="auto",
+                        help="бэкенд захвата OpenCV: auto (по платформе), any, v4l2, dshow, "
+                             "msmf, avfoundation, gstreamer")
+    parser.add_argument("--all-frames", action="store_true",
+                        help="читать кадры камеры по очереди, не отбрасывая накопившиеся")
+
+
+def _capture_settings(args):
+    from frame_sources import CaptureSettings
+
+    width = height = 0
+    if args.camera_size:
+        try:
+            width, height = map(int, args.camera_size.lower().split("x"))
+        except ValueError:
+            raise ValueError(f"размер {args.camera_size!r}, нужно ШxВ, например 1280x720")
+    return CaptureSettings(width, height, args.camera_fps, args.camera_format,
+                           args.camera_buffers, args.camera_backend, latest=not args.all_frames)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gesture_macro", description="GestureMacro без GUI")
+    parser.add_argument("--config", default=CONFIG_FILE, help="файл конфигурации жестов")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="распознавать жесты и выполнять макросы")
+    run.add_argument("--source", default="camera",
+                     help="camera, номер камеры или /dev/videoN, видеофайл, папка кадров "
+                          "или .jsonl/.npz")
+    run.add_argument("--dry-run", action="store_true", help="только печатать сработавшие макросы")
+    run.add_argument("--fast", action="store_true", help="не выдерживать темп записи")
+    run.add_argument("--loop", action="store_true", help="зациклить файл-источник")
+    run.add_argument("--duration", type=float, default=0, help="остановиться через N секунд")
+    run.add_argument("--record", help="записать ландмарки в .jsonl/.npz")
+    run.add_argument("--max-fps", type=float, default=30,
+                     help="предел частоты распознавания с камеры (0 - без предела)")
+    run.add_argument("--idle-fps", type=float, default=4,
+                     help="частота в режиме ожидания, пока руки нет (0 - не снижать)")
+    run.add_argument("--idle-after", type=float, default=3,
+                     help="через сколько секунд без руки перейти в режим ожидания")
+    run.add_argument("--cancel-hotkey", default="<ctrl>+<alt>+c",
+                     help="горячая клавиша отмены макроса в формате pynput (\"\" - без неё)")
+    run.add_argument("--key-delay", type=float, default=0,
+                     help="пауза между нажатиями внутри действия, секунд")
+    run.add_argument("--action-delay", type=float, default=0,
+                     help="пауза после каждого действия макроса, секунд")
+    run.add_argument("--paste-over", type=int, default=0,
+                     help="вставлять через буфер обмена строки длиннее N символов (0 - нет); "
+                          "прежний текст буфера затем восстанавливается, картинки и файлы - "
+                          "нет, как и текст, если буфер нечем прочитать")
+    run.add_argument("--command-log", help="журнал вывода команд CMD: (по умолчанию рядом "
+                                           "с конфигом)")
+    run.add_argument("--max-commands", type=int, default=4,
+                     help="сколько команд CMD: выполнять одновременно")
+    run.add_argument("--quiet-commands", action="store_true",
+                     help="не печатать вывод команд, только писать в журнал")
+    run.add_argument("--profile", help="закрепить профиль жестов вместо выбора по окну")
+    run.add_argument("--focus", default="auto",
+                     help="определение активного окна: auto, none или mock:приложение")
+    run.add_argument("--metrics", help="записывать задержки этапов в файл: .prom/.txt - "
+                                       "формат Prometheus, иначе JSON")
+    run.add_argument("--metrics-interval", type=float, default=10,
+                     help="перезаписывать файл метрик каждые N секунд (0 - только при выходе)")
+    _add_detection_args(run)
+    _add_capture_args(run)
+    run.set_defaults(func=cmd_run)
+
+    bind = commands.add_parser("bind", help="привязать макрос к жесту")
+    bind.add_argument("--gesture", required=True, help="сигнатура, например 11000")
+    bind.add_argument("--macro", required=True, action="append",
+                      help="действие (STRING:, KEY:, OPEN:, WAIT:, CMD:), можно несколько раз")
+    bind.add_argument("--name", help="название макроса")
+    bind.add_argument("--policy", choices=("drop", "queue", "restart", "cancel"),
+                      help="что делать с жестом, пока выполняется другой макрос")
+    bind.add_argument("--timeout", type=float,
+                      help="предел времени команд CMD: макроса, секунд")
+    bind.add_argument("--profile", help="привязать в профиле приложения, а не в общем конфиге")
+    bind.set_defaults(func=cmd_bind)
+
+    profiles = commands.add_parser("profiles", help="профили жестов для приложений")
+    profiles.add_argument("--set", metavar="NAME", help="создать или изменить профиль")
+    profiles.add_argument("--apps", nargs="*",
+                          help="приложения профиля (имя процесса: firefox, code, ...)")
+    profiles.add_argument("--inherits", help=f"родительский профиль (по умолчанию {BASE_PROFILE})")
+    profiles.set_defaults(func=cmd_profiles)
+
+    imports = commands.add_parser("import", help="заменить конфиг содержимым JSON-файла "
+                                                 "(--config library.db - в хранилище SQLite)")
+    imports.add_argument("file", help="конфиг в формате JSON")
+    imports.set_defaults(func=cmd_import)
+
+    export = commands.add_parser("export", help="сохранить конфиг в JSON")
+    export.add_argument("file", help="куда записать JSON")
+    export.set_defaults(func=cmd_export)
+
+    bench = commands.add_parser("bench", help="задержки по этапам на записи")
+    bench.add_argument("source", help="видеофайл, папка кадров или .jsonl/.npz")
+    bench.add_argument("--frames", type=int, default=0, help="ограничить число кадров")
+    _add_detection_args(bench)
+    bench.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    ConfigManager.path = args.config
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
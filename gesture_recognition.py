@@ -0,0 +1,307 @@
+import math
+from collections import Counter, deque
+
+import numpy as np
+
+
+# Цепочки суставов от запястья к кончику (большой, указательный, ..., мизинец)
+FINGER_CHAINS = np.array([
+    [0, 1, 2, 3, 4],
+    [0, 5, 6, 7, 8],
+    [0, 9, 10, 11, 12],
+    [0, 13, 14, 15, 16],
+    [0, 17, 18, 19, 20],
+])
+PINKY_MCP = 17
+THUMB_TIP_AND_IP = [4, 3]
+SIGNATURE_WEIGHTS = np.array([16, 8, 4, 2, 1])
+# Сколько рук классифицируется по одной, без NumPy: на таких размерах
+# накладные расходы вызовов NumPy больше самих вычислений
+SCALAR_MAX_HANDS = 2
+
+# Сигнатуры жестов двумя руками: "L11000+R01000" (рука - буква, пальцы - биты).
+# "L11000" - жест только левой руки, "11000" - любой рукой, как раньше
+CHORD_SEPARATOR = "+"
+
+
+class GestureRecognizer:
+    # Суммарный изгиб пальца (рад), при котором он ещё считается выпрямленным
+    finger_bend_max = np.radians(90)
+    thumb_bend_max = np.radians(60)
+
+    @staticmethod
+    def landmarks_to_array(landmarks, image_size=None):
+        # 21 точка MediaPipe -> массив (21, 3) float32. image_size=(w, h)
+        # убирает искажение пропорций нормированных координат
+        if isinstance(landmarks, np.ndarray):
+            points = landmarks.astype(np.float32, copy=False)
+        else:
+            points = np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
+        if image_size is not None:
+            w, h = image_size
+            points = points * np.array([w / h, 1.0, w / h], dtype=np.float32)
+        return points
+
+    @staticmethod
+    def bend_angles(points):
+        # points: (N, 21, 3) -> (N, 5) суммарный угол изгиба по суставам пальца.
+        # Углы между соседними костями не зависят от поворота, масштаба и
+        # зеркалирования, поэтому левая и правая рука обрабатываются одинаково
+        joints = points[:, FINGER_CHAINS]
+        bones = joints[:, :, 1:] - joints[:, :, :-1]
+        lengths = np.sqrt(np.einsum('nfjk,nfjk->nfj', bones, bones))
+        a, b = bones[:, :, :-1], bones[:, :, 1:]
+        cos = np.einsum('nfjk,nfjk->nfj', a, b) / (lengths[:, :, :-1] * lengths[:, :, 1:] + 1e-6)
+        angles = np.arccos(np.clip(cos, -1.0, 1.0))
+        # У большого пальца угол у запястья (CMC) большой и при выпрямленном пальце
+        angles[:, 0, 0] = 0.0
+        return angles.sum(axis=-1)
+
+    @staticmethod
+    def fingers_up_batch(points):
+        points = np.asarray(points, dtype=np.float32)
+        if points.ndim == 2:
+            points = points[None]
+        bend = GestureRecognizer.bend_angles(points)
+        extended = np.empty(bend.shape, dtype=bool)
+        extended[:, 1:] = bend[:, 1:] < GestureRecognizer.finger_bend_max
+        # Большой палец: почти прямой и кончик дальше от основания мизинца, чем
+        # межфаланговый сустав (при прижатом к ладони пальце - наоборот)
+        offsets = points[:, THUMB_TIP_AND_IP] - points[:, [PINKY_MCP]]
+        dist = np.einsum('njk,njk->nj', offsets, offsets)
+        extended[:, 0] = (bend[:, 0] < GestureRecognizer.thumb_bend_max) & (dist[:, 0] > dist[:, 1])
+        return extended
+
+    @staticmethod
+    def fingers_up_scalar(points):
+        # То же, что fingers_up_batch, для одной руки: 21 точка (x, y, z) как
+        # последовательность чисел Python. Запас 1e-6 в знаменателе держит
+        # косинус внутри [-1, 1], поэтому acos не нужен clip
+        acos, sqrt = math.acos, math.sqrt
+        finger_max = float(GestureRecognizer.finger_bend_max)
+        ox, oy, oz = points[0]
+        fingers = [False]
+        for base in (5, 9, 13, 17):
+            ax, ay, az = points[base]
+            bx, by, bz = points[base + 1]
+            cx, cy, cz = points[base + 2]
+            dx, dy, dz = points[base + 3]
+            sx, sy, sz = ax - ox, ay - oy, az - oz
+            ux, uy, uz = bx - ax, by - ay, bz - az
+            vx, vy, vz = cx - bx, cy - by, cz - bz
+            wx, wy, wz = dx - cx, dy - cy, dz - cz
+            ls = sqrt(sx * sx + sy * sy + sz * sz)
+            lu = sqrt(ux * ux + uy * uy + uz * uz)
+            lv = sqrt(vx * vx + vy * vy + vz * vz)
+            lw = sqrt(wx * wx + wy * wy + wz * wz)
+            bend = (acos((sx * ux + sy * uy + sz * uz) / (ls * lu + 1e-6))
+                    + acos((ux * vx + uy * vy + uz * vz) / (lu * lv + 1e-6))
+                    + acos((vx * wx + vy * wy + vz * wz) / (lv * lw + 1e-6)))
+            fingers.append(bend < finger_max)
+        # Большой палец: угол у запястья не считается (см. bend_angles)
+        ax, ay, az = points[1]
+        bx, by, bz = points[2]
+        cx, cy, cz = points[3]
+        dx, dy, dz = points[4]
+        ux, uy, uz = bx - ax, by - ay, bz - az
+        vx, vy, vz = cx - bx, cy - by, cz - bz
+        wx, wy, wz = dx - cx, dy - cy, dz - cz
+        lu = sqrt(ux * ux + uy * uy + uz * uz)
+        lv = sqrt(vx * vx + vy * vy + vz * vz)
+        lw = sqrt(wx * wx + wy * wy + wz * wz)
+        bend = (acos((ux * vx + uy * vy + uz * vz) / (lu * lv + 1e-6))
+                + acos((vx * wx + vy * wy + vz * wz) / (lv * lw + 1e-6)))
+        px, py, pz = points[PINKY_MCP]
+        tip = (dx - px) ** 2 + (dy - py) ** 2 + (dz - pz) ** 2
+        ip = (cx - px) ** 2 + (cy - py) ** 2 + (cz - pz) ** 2
+        fingers[0] = bend < float(GestureRecognizer.thumb_bend_max) and tip > ip
+        return fingers
+
+    @staticmethod
+    def fingers_up(landmarks):
+        if landmarks is None or len(landmarks) == 0:
+            return []
+        if isinstance(landmarks, np.ndarray):
+            points = landmarks.tolist()
+        else:
+            points = [(lm.x, lm.y, lm.z) for lm in landmarks]
+        return GestureRecognizer.fingers_up_scalar(points)
+
+    @staticmethod
+    def get_signature(fingers):
+        return ''.join(['1' if f else '0' for f in fingers]) if len(fingers) else ''
+
+    @staticmethod
+    def signature_codes(points):
+        # Пакетная классификация: (N, 21, 3) -> (N,) int, 0b11000 == "11000"
+        return GestureRecognizer.fingers_up_batch(points).astype(np.int64) @ SIGNATURE_WEIGHTS
+
+    @staticmethod
+    def signatures_batch(points):
+        return [format(code, '05b') for code in GestureRecognizer.signature_codes(points)]
+
+    @staticmethod
+    def assign_labels(labels, points):
+        # Метки рук "L"/"R" для каждой руки. Если меток нет или обе руки
+        # получили одну метку - левая та, чьё запястье левее в (отражённом) кадре
+        labels = list(labels or ())[:len(points)]
+        if len(points) == 2 and sorted(labels) != ["L", "R"]:
+            left_first = points[0][0, 0] <= points[1][0, 0]
+            labels = ["L", "R"] if left_first else ["R", "L"]
+        elif len(labels) < len(points):
+            labels = [''] * len(points)
+        return labels
+
+    @staticmethod
+    def hand_signatures(points, labels):
+        # Список (21, 3) по рукам -> [(метка, биты)], левая рука первой
+        if not len(points):
+            return []
+        if len(points) <= SCALAR_MAX_HANDS:
+            bits = [GestureRecognizer.get_signature(GestureRecognizer.fingers_up_scalar(
+                hand.tolist())) for hand in points]
+        else:
+            bits = GestureRecognizer.signatures_batch(np.stack(points))
+        return sorted(zip(labels, bits), key=lambda hand: hand[0] != "L")
+
+    @staticmethod
+    def recognize_hands(hand_points, labels, image_size=None):
+        # Все руки кадра -> (сигнатура кадра, [(метка, биты)], точки и метка первой руки)
+        if not len(hand_points):
+            return '', [], None, None
+        points = [GestureRecognizer.landmarks_to_array(hand, image_size) for hand in hand_points]
+        labels = GestureRecognizer.assign_labels(labels, points)
+        hands = GestureRecognizer.hand_signatures(points, labels)
+        return GestureRecognizer.frame_signature(hands), hands, points[0], labels[0]
+
+    @staticmethod
+    def frame_signature(hands):
+        # Одна рука - биты без метки (совместимо со старыми ключами конфига),
+        # две - аккорд с метками рук
+        if not hands:
+            return ''
+        if len(hands) == 1:
+            return hands[0][1]
+        return CHORD_SEPARATOR.join(label + bits for label, bits in hands)
+
+    @staticmethod
+    def chord_key(hands):
+        # Аккорд без меток (для записей, где рука не определена): части по порядку
+        return CHORD_SEPARATOR.join(sorted(bits for _, bits in hands))
+
+    @staticmethod
+    def canonical_signature(signature):
+        # Ключ конфига в каноническом виде: "r01000+l11000" -> "L11000+R01000".
+        # Строки не в формате сигнатур возвращаются как есть
+        signature = str(signature).strip()
+        parts = []
+        for part in signature.split(CHORD_SEPARATOR):
+            part = part.strip().upper()
+            label, bits = (part[0], part[1:]) if part[:1] in ("L", "R") else ('', part)
+            if len(bits) != 5 or set(bits) - {"0", "1"}:
+                return signature
+            parts.append((label, bits))
+        if len(parts) == 1:
+            return parts[0][0] + parts[0][1]
+        labels = sorted(label for label, _ in parts)
+        if labels == ["L", "R"]:
+            return CHORD_SEPARATOR.join(label + bits for label, bits in sorted(parts))
+        if labels == ['', '']:
+            return CHORD_SEPARATOR.join(sorted(bits for _, bits in parts))
+        return signature
+
+
+class TriggerSettings:
+    # votes из последних window кадров должны совпасть, затем жест держится
+    # hold секунд; повторный запуск только после отпускания на release секунд
+    def __init__(self, votes=4, window=5, hold=0.1, release=0.25):
+        votes, window = int(votes), int(window)
+        hold, release = float(hold), float(release)
+        if window < 1 or not 1 <= votes <= window:
+            raise ValueError("trigger: нужно 1 <= votes <= window")
+        if hold < 0 or release < 0:
+            raise ValueError("trigger: hold и release не могут быть отрицательными")
+        self.votes = votes
+        self.window = window
+        self.hold = hold
+        self.release = release
+
+    @classmethod
+    def from_dict(cls, data, default=None):
+        default = default or cls()
+        if not isinstance(data, dict):
+            raise ValueError("trigger должен быть объектом")
+        unknown = set(data) - {"votes", "window", "hold", "release"}
+        if unknown:
+            raise ValueError(f"trigger: неизвестные параметры {', '.join(sorted(unknown))}")
+        return cls(data.get("votes", default.votes),
+                   data.get("window", default.window),
+                   data.get("hold", default.hold),
+                   data.get("release", default.release))
+
+
+class GestureStabilizer:
+    # Поток сигнатур по кадрам -> подтверждённые срабатывания.
+    # settings_for(signature) возвращает TriggerSettings для макроса или None.
+    def __init__(self, settings_for=None, default=None):
+        self.settings_for = settings_for
+        self.default = default or TriggerSettings()
+        # Длина истории - наибольшее окно из встреченных настроек, растёт по мере надобности
+        self.history = deque(maxlen=self.default.window)
+        self.reset()
+
+    def reset(self):
+        self.history.clear()
+        self.candidate = ''
+        self.candidate_since = None
+        self.latched = None
+        self.released_since = None
+
+    def _settings(self, signature):
+        settings = self.settings_for(signature) if self.settings_for else None
+        return settings or self.default
+
+    def _stable_signature(self):
+        # Голоса каждой сигнатуры считаются только в её последних window кадрах:
+        # старая поза или пауза без руки не мешают новой позе набрать голоса
+        items = list(self.history)
+        best, best_votes, best_settings = None, 0, self.default
+        for signature in set(items):
+            settings = self._settings(signature)
+            if settings.window > self.history.maxlen:
+                self.history = deque(self.history, maxlen=settings.window)
+            votes = items[-settings.window:].count(signature)
+            if votes < settings.votes:
+                continue
+            # При равенстве голосов остаётся текущий кандидат
+            if votes > best_votes or (votes == best_votes and signature == self.candidate):
+                best, best_votes, best_settings = signature, votes, settings
+        return best, best_settings
+
+    def update(self, signature, timestamp):
+        self.history.append(signature or '')
+        stable, settings = self._stable_signature()
+
+        if stable != self.candidate:
+            self.candidate = stable
+            self.candidate_since = timestamp
+
+        if self.latched is not None:
+            if stable == self.latched:
+                self.released_since = None
+            else:
+                if self.released_since is None:
+                    self.released_since = timestamp
+                if timestamp - self.released_since >= self._settings(self.latched).release:
+                    self.latched = None
+                    self.released_since = None
+
+        if (self.latched is None and stable
+                and timestamp - self.candidate_since >= settings.hold):
+            self.latched = stable
+            return stable
+        return None
+
+    def feed_landmarks(self, landmarks, timestamp):
+        fingers = GestureRecognizer.fingers_up(landmarks) if landmarks is not None else []
+        return self.update(GestureRecognizer.get_signature(fingers), timestamp)
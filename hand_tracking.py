@@ -0,0 +1,259 @@
+import dataclasses
+import threading
+
+import numpy as np
+
+_solutions = None
+_solutions_lock = threading.Lock()
+
+HAND_LABELS = {"Left": "L", "Right": "R"}
+
+
+def load_mediapipe():
+    # mediapipe тянет за собой matplotlib и TFLite (~1 с), поэтому
+    # загружается при первом обращении, а не при импорте модуля
+    global _solutions
+    with _solutions_lock:
+        if _solutions is None:
+            import mediapipe as mp
+            _solutions = mp.solutions
+        return _solutions
+
+
+class HandDetector:
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_num_hands=2, model_complexity=0,
+                 min_detection_confidence=0.7, min_tracking_confidence=0.7):
+        self.max_num_hands = max_num_hands
+        self.model_complexity = model_complexity
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self._hands = None
+        self._crop = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        # Один детектор на всё приложение: граф MediaPipe грузится один раз
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def close_shared(cls):
+        with cls._shared_lock:
+            if cls._shared is not None:
+                cls._shared.close()
+                cls._shared = None
+
+    def _ensure_open(self):
+        if self._hands is None:
+            # static_image_mode=False - режим видеопотока, детектор ладони
+            # запускается только когда трекер потерял руку
+            self._hands = load_mediapipe().hands.Hands(
+                static_image_mode=False,
+                max_num_hands=self.max_num_hands,
+                model_complexity=self.model_complexity,
+                min_detection_confidence=self.min_detection_confidence,
+                min_tracking_confidence=self.min_tracking_confidence)
+        return self._hands
+
+    def process(self, rgb_frame):
+        with self._lock:
+            hands = self._ensure_open()
+            rgb_frame.flags.writeable = False
+            try:
+                return hands.process(rgb_frame)
+            finally:
+                rgb_frame.flags.writeable = True
+
+    def crop_session(self):
+        # Отдельная сессия MediaPipe на одну руку для RoiHandTracker: трекинг
+        # внутри сессии помнит ландмарки прошлого кадра в его координатах, поэтому
+        # полные кадры и вырезанные области не должны идти через одну сессию
+        with self._lock:
+            if self._crop is None:
+                self._crop = HandDetector(1, self.model_complexity,
+                                          self.min_detection_confidence,
+                                          self.min_tracking_confidence)
+            return self._crop
+
+    def warm_up(self, crop=False):
+        # Загружает граф заранее (из фонового потока при старте приложения)
+        with self._lock:
+            self._ensure_open()
+        if crop:
+            self.crop_session().warm_up()
+
+    def reset(self):
+        # Сбрасывает состояние трекера (например, при смене источника кадров)
+        with self._lock:
+            if self._hands is not None:
+                self._hands.close()
+                self._hands = None
+            crop = self._crop
+        if crop is not None:
+            crop.reset()
+
+    def close(self):
+        self.reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def handedness(results):
+        # Кадр подаётся уже отражённым, поэтому метки MediaPipe совпадают
+        # с руками пользователя
+        return [HAND_LABELS.get(info.classification[0].label, '')
+                for info in (results.multi_handedness or ())]
+
+    _rgb_styles = None
+
+    @staticmethod
+    def _styles(rgb):
+        # Стили MediaPipe заданы в BGR; для RGB-кадра цвета переставляются один раз
+        styles = load_mediapipe().drawing_styles
+        landmarks = styles.get_default_hand_landmarks_style()
+        connections = styles.get_default_hand_connections_style()
+        if not rgb:
+            return landmarks, connections
+        if HandDetector._rgb_styles is None:
+            def swap(specs):
+                return {key: dataclasses.replace(spec, color=tuple(reversed(spec.color)))
+                        for key, spec in specs.items()}
+            HandDetector._rgb_styles = (swap(landmarks), swap(connections))
+        return HandDetector._rgb_styles
+
+    @staticmethod
+    def draw_landmarks(frame, hand_landmarks, rgb=False):
+        landmark_style, connection_style = HandDetector._styles(rgb)
+        solutions = load_mediapipe()
+        solutions.drawing_utils.draw_landmarks(
+            frame,
+            hand_landmarks,
+            solutions.hands.HAND_CONNECTIONS,
+            landmark_style,
+            connection_style
+        )
+
+    @staticmethod
+    def draw_points(frame, points):
+        # Рисует ландмарки из массива (21, 3) нормированных координат на
+        # RGB-кадре, когда объектов MediaPipe нет (воспроизведение записи)
+        import cv2
+
+        h, w = frame.shape[:2]
+        pixels = [(int(x * w), int(y * h)) for x, y, _ in points]
+        for start, end in load_mediapipe().hands.HAND_CONNECTIONS:
+            cv2.line(frame, pixels[start], pixels[end], (255, 255, 255), 2)
+        for pixel in pixels:
+            cv2.circle(frame, pixel, 3, (255, 0, 0), -1)
+
+
+class RoiHandTracker:
+    # Предобработка перед MediaPipe: поиск руки идёт по уменьшенному кадру
+    # (detect_width), а пока в кадре одна рука - по квадратной области вокруг
+    # её ландмарок с предыдущего кадра, уменьшенной до roi_size. Область
+    # обрабатывает отдельная сессия на одну руку (HandDetector.crop_session):
+    # ей не нужен детектор ладони, пока рука отслеживается. Если в области
+    # руки нет, тот же кадр сразу ищется целиком. Две руки отслеживаются по
+    # полному кадру. Ландмарки возвращаются в координатах полного кадра.
+    def __init__(self, detector, detect_width=480, roi_size=256, roi_padding=0.5,
+                 rescan_interval=30):
+        self.detector = detector
+        crop_session = getattr(detector, 'crop_session', None)
+        self.crop_detector = crop_session() if crop_session else detector
+        self.detect_width = detect_width
+        self.roi_size = roi_size
+        self.roi_padding = roi_padding
+        self.rescan_interval = rescan_interval
+        self.reset()
+
+    def reset(self):
+        self._roi = None
+        self._since_full = 0
+        self.stats = {"full": 0, "roi": 0, "fallback": 0}
+
+    def _downscale(self, rgb, width):
+        import cv2
+
+        h, w = rgb.shape[:2]
+        if not width or w <= width:
+            return rgb
+        return cv2.resize(rgb, (width, max(1, round(h * width / w))),
+                          interpolation=cv2.INTER_LINEAR)
+
+    def _next_roi(self, results, w, h):
+        hands = results.multi_hand_landmarks
+        if not hands:
+            return None
+        xs = [lm.x for hand in hands for lm in hand.landmark]
+        ys = [lm.y for hand in hands for lm in hand.landmark]
+        x0, x1 = min(xs) * w, max(xs) * w
+        y0, y1 = min(ys) * h, max(ys) * h
+        side = max(x1 - x0, y1 - y0) * (1 + 2 * self.roi_padding)
+        if side >= min(w, h):
+            return None  # рука занимает почти весь кадр - обрезать нечего
+        side = int(side)
+        left = int(min(max((x0 + x1 - side) / 2, 0), w - side))
+        top = int(min(max((y0 + y1 - side) / 2, 0), h - side))
+        return left, top, side
+
+    def _process_full(self, rgb):
+        self._since_full = 0
+        return self.detector.process(self._downscale(rgb, self.detect_width))
+
+    def _process_roi(self, rgb, roi):
+        import cv2
+
+        left, top, side = roi
+        h, w = rgb.shape[:2]
+        crop = rgb[top:top + side, left:left + side]
+        if self.roi_size and side > self.roi_size:
+            crop = cv2.resize(crop, (self.roi_size, self.roi_size),
+                              interpolation=cv2.INTER_LINEAR)
+        else:
+            crop = np.ascontiguousarray(crop)
+        results = self.crop_detector.process(crop)
+        if results.multi_hand_landmarks:
+            # Координаты области -> нормированные координаты полного кадра
+            for hand in results.multi_hand_landmarks:
+                for lm in hand.landmark:
+                    lm.x = (left + lm.x * side) / w
+                    lm.y = (top + lm.y * side) / h
+                    lm.z = lm.z * side / w
+        return results
+
+    def process(self, rgb):
+        h, w = rgb.shape[:2]
+        roi = self._roi
+        self._since_full += 1
+        if roi is not None and self._since_full < self.rescan_interval:
+            results = self._process_roi(rgb, roi)
+            if results.multi_hand_landmarks:
+                self.stats["roi"] += 1
+            else:
+                # Трекинг потерян - ищем по всему кадру
+                self.stats["fallback"] += 1
+                results = self._process_full(rgb)
+        else:
+            self.stats["full"] += 1
+            results = self._process_full(rgb)
+
+        found = len(results.multi_hand_landmarks or ())
+        if found == 1:
+            roi = self._next_roi(results, w, h)
+            if getattr(self.detector, 'max_num_hands', 1) == 1:
+                self._since_full = 0
+            # иначе вторая рука ищется периодическим полным проходом
+        else:
+            roi = None  # нет руки или две руки - их отслеживает сессия полного кадра
+        self._roi = roi
+        return results
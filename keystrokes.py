@@ -0,0 +1,282 @@
+import shutil
+import subprocess
+import sys
+import time
+
+# Имена специальных клавиш pynput (pynput.keyboard.Key). Аккорды разбираются
+# по этому списку без импорта pynput, сама клавиша берётся при нажатии
+KEY_NAMES = frozenset(
+    ["alt", "alt_gr", "alt_l", "alt_r", "backspace", "caps_lock", "cmd", "cmd_l", "cmd_r",
+     "ctrl", "ctrl_l", "ctrl_r", "delete", "down", "end", "enter", "esc", "home", "insert",
+     "left", "media_next", "media_play_pause", "media_previous", "media_volume_down",
+     "media_volume_mute", "media_volume_up", "menu", "num_lock", "page_down", "page_up",
+     "pause", "print_screen", "right", "scroll_lock", "shift", "shift_l", "shift_r", "space",
+     "tab", "up"] + [f"f{n}" for n in range(1, 21)])
+
+KEY_ALIASES = {
+    "control": "ctrl", "escape": "esc", "return": "enter", "del": "delete", "ins": "insert",
+    "win": "cmd", "super": "cmd", "meta": "cmd", "command": "cmd", "option": "alt",
+    "pgup": "page_up", "pgdn": "page_down", "pageup": "page_up", "pagedown": "page_down",
+    "bksp": "backspace", "prtsc": "print_screen", "caps": "caps_lock",
+}
+
+# Символы, которые pynput.Controller.type нажимает клавишами
+CONTROL_CODES = {"\n": "enter", "\r": "enter", "\t": "tab"}
+
+PASTE_CHORD = ("cmd", "v") if sys.platform == "darwin" else ("ctrl", "v")
+
+
+def parse_chord(text):
+    # "ctrl+shift+esc" -> ("ctrl", "shift", "esc"); символы - строки длины 1,
+    # специальные клавиши - имена из KEY_NAMES. "ctrl++" - Ctrl и плюс
+    text = text.strip()
+    if not text:
+        raise ValueError("не указана клавиша")
+    if text == "+":
+        return ("+",)
+    if text.endswith("++"):
+        parts = text[:-2].split("+") + ["+"]
+    else:
+        parts = text.split("+")
+    chord = []
+    for part in parts:
+        part = part if part == "+" else part.strip()
+        if not part:
+            raise ValueError(f"пустая клавиша в '{text}'")
+        if len(part) == 1:
+            chord.append(part)
+            continue
+        name = part.lower()
+        name = KEY_ALIASES.get(name, name)
+        if name not in KEY_NAMES:
+            raise ValueError(f"неизвестная клавиша '{part}'")
+        chord.append(name)
+    return tuple(chord)
+
+
+class TypingSettings:
+    # Паузы при вводе: key_delay между нажатиями внутри действия, action_delay
+    # после каждого действия макроса. Строки длиннее paste_over символов
+    # вставляются через буфер обмена (0 - всегда печатать)
+    def __init__(self, key_delay=0.0, action_delay=0.0, paste_over=0):
+        key_delay, action_delay, paste_over = float(key_delay), float(action_delay), int(paste_over)
+        if key_delay < 0 or action_delay < 0 or paste_over < 0:
+            raise ValueError("typing: значения не могут быть отрицательными")
+        self.key_delay = key_delay
+        self.action_delay = action_delay
+        self.paste_over = paste_over
+
+    @classmethod
+    def from_dict(cls, data, default=None):
+        default = default or cls()
+        if not isinstance(data, dict):
+            raise ValueError("typing должен быть объектом")
+        unknown = set(data) - {"key_delay", "action_delay", "paste_over"}
+        if unknown:
+            raise ValueError(f"typing: неизвестные параметры {', '.join(sorted(unknown))}")
+        return cls(data.get("key_delay", default.key_delay),
+                   data.get("action_delay", default.action_delay),
+                   data.get("paste_over", default.paste_over))
+
+
+class PynputKeyboard:
+    # Клавиатура ОС через pynput.keyboard.Controller
+    def __init__(self, controller):
+        self.controller = controller
+        self._keys = {}
+
+    def key(self, name):
+        key = self._keys.get(name)
+        if key is None:
+            from pynput.keyboard import Key
+
+            key = getattr(Key, name, None)
+            if key is None:
+                raise ValueError(f"клавиша '{name}' недоступна на этой платформе")
+            self._keys[name] = key
+        return key
+
+    def press(self, key):
+        self.controller.press(key)
+
+    def release(self, key):
+        self.controller.release(key)
+
+    def type(self, text):
+        self.controller.type(text)
+
+
+class MockKeyboard:
+    # Клавиатура и буфер обмена без ОС: только считает события (для тестов и
+    # бенчмарков без дисплея). log=True сохраняет сами события
+    def __init__(self, log=False):
+        self.events = 0
+        self.characters = 0
+        self.log = [] if log else None
+        self.clipboard = None
+
+    def key(self, name):
+        return f"<{name}>"
+
+    def press(self, key):
+        self.events += 1
+        if self.log is not None:
+            self.log.append(("press", key))
+
+    def release(self, key):
+        self.events += 1
+        if self.log is not None:
+            self.log.append(("release", key))
+
+    def type(self, text):
+        # Как pynput.Controller.type: нажатие и отпускание на каждый символ
+        for char in text:
+            key = self.key(CONTROL_CODES[char]) if char in CONTROL_CODES else char
+            self.press(key)
+            self.release(key)
+        self.characters += len(text)
+
+    def copy(self, text):
+        self.clipboard = text
+        return True
+
+    def read(self):
+        return self.clipboard
+
+
+class SystemClipboard:
+    # Буфер обмена: pyperclip, если установлен, иначе утилиты ОС. Читается
+    # только текст: картинку или файлы в буфере read() не вернёт
+    def __init__(self):
+        self._backend = None
+
+    def _backends(self):
+        if self._backend is None:
+            self._backend = self._find_backend()
+        return self._backend
+
+    def copy(self, text):
+        try:
+            return self._backends()[0](text)
+        except Exception as e:
+            print(f"Ошибка буфера обмена: {str(e)}")
+            return False
+
+    def read(self):
+        # Текст из буфера или None, если его не прочитать
+        read = self._backends()[1]
+        if read is None:
+            return None
+        try:
+            return read()
+        except Exception as e:
+            print(f"Ошибка чтения буфера обмена: {str(e)}")
+            return None
+
+    @staticmethod
+    def _find_backend():
+        # (copy, read); read - None, если читать буфер нечем
+        try:
+            import pyperclip
+
+            def copy(text):
+                pyperclip.copy(text)
+                return True
+            return copy, pyperclip.paste
+        except ImportError:
+            pass
+
+        if sys.platform == "win32":
+            command, encoding = ["clip"], "utf-16"
+            reader = ["powershell", "-NoProfile", "-Command",
+                      "[Console]::OutputEncoding = [Text.Encoding]::UTF8; Get-Clipboard -Raw"]
+        elif sys.platform == "darwin":
+            command, encoding = ["pbcopy"], "utf-8"
+            reader = ["pbpaste"]
+        else:
+            command = reader = None
+            encoding = "utf-8"
+            for candidate, output in ((["wl-copy"], ["wl-paste", "--no-newline"]),
+                                      (["xclip", "-selection", "clipboard"],
+                                       ["xclip", "-selection", "clipboard", "-o"]),
+                                      (["xsel", "--clipboard", "--input"],
+                                       ["xsel", "--clipboard", "--output"])):
+                if shutil.which(candidate[0]):
+                    command, reader = candidate, output
+                    break
+        if command is None:
+            return (lambda text: False), None
+
+        def copy(text):
+            subprocess.run(command, input=text.encode(encoding), check=True, timeout=2)
+            return True
+
+        def read():
+            if not shutil.which(reader[0]):
+                return None
+            proc = subprocess.run(reader, capture_output=True, timeout=2)
+            # Пустой буфер или не текст (картинка): утилиты завершаются с ошибкой
+            if proc.returncode != 0:
+                return None
+            text = proc.stdout.decode("utf-8", errors="replace")
+            return text[:-2] if sys.platform == "win32" and text.endswith("\r\n") else text
+        return copy, read
+
+
+class KeystrokeEngine:
+    # Ввод текста и аккордов. При нулевых паузах текст отдаётся клавиатуре
+    # одним вызовом, иначе посимвольно с паузами. sleep передаётся
+    # исполнителем макроса (прерываемое ожидание отмены)
+    restore_delay = 0.3  # через сколько секунд после вставки вернуть буфер обмена
+
+    def __init__(self, keyboard, clipboard=None):
+        self.keyboard = keyboard
+        self.clipboard = clipboard
+        self.defaults = TypingSettings()
+
+    def type_text(self, text, settings=None, sleep=None):
+        settings = settings or self.defaults
+        sleep = sleep or time.sleep
+        if settings.paste_over and len(text) > settings.paste_over and self.paste(text, sleep):
+            return
+        if not settings.key_delay:
+            self.keyboard.type(text)
+            return
+        for char in text:
+            key = self.keyboard.key(CONTROL_CODES[char]) if char in CONTROL_CODES else char
+            self.keyboard.press(key)
+            self.keyboard.release(key)
+            if sleep(settings.key_delay):
+                return  # ожидание прервано отменой макроса
+
+    def press_chord(self, chord, settings=None, sleep=None):
+        # Модификаторы нажимаются по порядку и отпускаются в обратном
+        settings = settings or self.defaults
+        sleep = sleep or time.sleep
+        keyboard = self.keyboard
+        keys = [key if len(key) == 1 else keyboard.key(key) for key in chord]
+        pressed = []
+        try:
+            for key in keys:
+                keyboard.press(key)
+                pressed.append(key)
+                if settings.key_delay:
+                    sleep(settings.key_delay)
+        finally:
+            for key in reversed(pressed):
+                keyboard.release(key)
+
+    def paste(self, text, sleep=None):
+        # Прежний текст буфера возвращается на место после вставки. Приложение
+        # читает буфер, когда обработает Ctrl+V, поэтому - через restore_delay
+        if self.clipboard is None:
+            return False
+        read = getattr(self.clipboard, 'read', None)
+        previous = read() if read is not None else None
+        if not self.clipboard.copy(text):
+            return False
+        self.press_chord(PASTE_CHORD, self.defaults, sleep)
+        if previous is not None and previous != text:
+            (sleep or time.sleep)(self.restore_delay)
+            self.clipboard.copy(previous)
+        return True
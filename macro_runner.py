@@ -0,0 +1,177 @@
+import collections
+import threading
+import time
+
+from macros import (
+    MacroExecutor, POLICY_CANCEL, POLICY_DROP, POLICY_RESTART
+)
+
+# События выполнения, передаются в on_event(событие, макрос, подробности)
+EVENT_STARTED = "started"
+EVENT_DONE = "done"
+EVENT_CANCELLED = "cancelled"
+EVENT_DROPPED = "dropped"
+EVENT_ERROR = "error"
+EVENT_EXITED = "exited"  # завершилась команда CMD: макроса, подробности - код возврата
+
+
+class MacroRunner:
+    # Все макросы выполняет один рабочий поток: нажатия разных макросов не
+    # перемешиваются, а распознавание никогда не ждёт макрос. Что делать с
+    # жестом, пока выполняется другой макрос, решает policy макроса.
+    # on_event вызывается из рабочего потока (GUI пересылает его сигналом Qt)
+    max_queue = 8
+    latency_window = 256  # сколько последних задержек хранить для перцентилей
+    cancel_hotkey = "<ctrl>+<alt>+c"  # формат pynput, "" - без горячей клавиши
+
+    def __init__(self, on_event=None, max_queue=None, metrics=None):
+        self.on_event = on_event
+        self.metrics = metrics  # StageMetrics: задержка пишется как этап dispatch
+        self.max_queue = max_queue or self.max_queue
+        self._queue = collections.deque()  # (макрос, время срабатывания)
+        self._cond = threading.Condition()
+        self._current = None  # (макрос, threading.Event отмены)
+        self._stopped = False
+        self.counters = {EVENT_STARTED: 0, EVENT_DONE: 0, EVENT_CANCELLED: 0,
+                         EVENT_DROPPED: 0, EVENT_ERROR: 0}
+        # Секунды от срабатывания жеста до первого нажатия последних макросов
+        self.latencies = collections.deque(maxlen=self.latency_window)
+        self._thread = threading.Thread(target=self._run, name="MacroRunner", daemon=True)
+        self._thread.start()
+
+    def submit(self, macro, triggered_at=None):
+        # Возвращается сразу; False - макрос не будет выполнен
+        triggered_at = time.monotonic() if triggered_at is None else triggered_at
+        if macro.policy == POLICY_CANCEL:
+            self.cancel()
+            return False
+
+        reason = None
+        with self._cond:
+            if self._stopped:
+                return False
+            busy = self._current is not None or bool(self._queue)
+            if macro.policy == POLICY_RESTART:
+                # Прерываем этот же макрос, если он выполняется, и ставим его первым
+                self._queue = collections.deque(
+                    item for item in self._queue if item[0].signature != macro.signature)
+                current = self._current
+                if current is not None and current[0].signature == macro.signature:
+                    current[1].set()
+                self._queue.appendleft((macro, triggered_at))
+            elif macro.policy == POLICY_DROP and busy:
+                reason = "выполняется другой макрос"
+            elif len(self._queue) >= self.max_queue:
+                reason = "очередь заполнена"
+            else:
+                self._queue.append((macro, triggered_at))
+            if reason is None:
+                self._cond.notify_all()
+            else:
+                self.counters[EVENT_DROPPED] += 1
+
+        if reason is not None:
+            self._emit(EVENT_DROPPED, macro, reason)
+            return False
+        return True
+
+    def cancel(self):
+        # Прерывает текущий макрос и очищает очередь; возвращает число прерванных
+        with self._cond:
+            dropped = list(self._queue)
+            self._queue.clear()
+            self.counters[EVENT_CANCELLED] += len(dropped)
+            current = self._current
+            if current is not None:
+                current[1].set()
+        for macro, _ in dropped:
+            self._emit(EVENT_CANCELLED, macro, "")
+        return len(dropped) + (current is not None)
+
+    def busy(self):
+        with self._cond:
+            return self._current is not None or bool(self._queue)
+
+    def wait(self, timeout=None):
+        # Ждёт, пока очередь опустеет и текущий макрос завершится
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._current is None and not self._queue, timeout)
+
+    def stop(self, timeout=None):
+        self.cancel()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def latency_ms(self, q):
+        # q-й перцентиль задержки до первого нажатия, мс (None - ещё нет данных)
+        values = sorted(self.latencies)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))] * 1000
+
+    def _emit(self, event, macro, detail):
+        if self.on_event is not None:
+            try:
+                self.on_event(event, macro, detail)
+            except Exception as e:
+                print(f"Ошибка обработчика событий макроса: {str(e)}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                macro, triggered_at = self._queue.popleft()
+                cancel = threading.Event()
+                self._current = (macro, cancel)
+                self.counters[EVENT_STARTED] += 1
+            try:
+                self._execute(macro, triggered_at, cancel)
+            finally:
+                with self._cond:
+                    self._current = None
+                    self._cond.notify_all()
+
+    def _execute(self, macro, triggered_at, cancel):
+        self._emit(EVENT_STARTED, macro, "")
+
+        def first_output():
+            latency = time.monotonic() - triggered_at
+            self.latencies.append(latency)
+            if self.metrics is not None:
+                self.metrics.record("dispatch", latency)
+
+        def exited(job):
+            self._emit(EVENT_EXITED, macro, job.describe())
+
+        try:
+            completed = MacroExecutor.execute(macro, cancel, first_output, exited)
+        except Exception as e:
+            event, detail = EVENT_ERROR, str(e) or type(e).__name__
+        else:
+            event, detail = (EVENT_DONE if completed else EVENT_CANCELLED), ""
+        with self._cond:
+            self.counters[event] += 1
+        self._emit(event, macro, detail)
+
+
+def listen_hotkey(hotkey, callback):
+    # Глобальная горячая клавиша через pynput; None, если она недоступна
+    if not hotkey:
+        return None
+    try:
+        from pynput.keyboard import GlobalHotKeys
+
+        listener = GlobalHotKeys({hotkey: callback})
+        listener.daemon = True
+        listener.start()
+        return listener
+    except Exception as e:
+        print(f"Ошибка горячей клавиши {hotkey}: {str(e)}")
+        return None
@@ -0,0 +1,126 @@
+import json
+import sqlite3
+import threading
+import zlib
+
+# Конфиг с таким расширением хранится в SQLite, остальные - в JSON
+STORE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+COMPRESS_FROM = 256  # тела макросов длиннее (байт JSON) сжимаются zlib
+COMPRESS_LEVEL = 1  # длинные STRING: обычно повторяются, выше уровень - медленнее импорт
+
+# Один кодировщик на все записи: json.dumps с параметрами создаёт его заново
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def is_store_path(path):
+    return str(path).lower().endswith(STORE_SUFFIXES)
+
+
+def pack_actions(actions):
+    data = _encode(actions).encode("utf-8")
+    # JSON-массив начинается с "[", поток zlib - с 0x78, так что формат не нужно помечать
+    return zlib.compress(data, COMPRESS_LEVEL) if len(data) >= COMPRESS_FROM else data
+
+
+def unpack_actions(blob):
+    if blob is None:
+        return []
+    blob = bytes(blob)
+    if blob[:1] != b"[":
+        blob = zlib.decompress(blob)
+    return json.loads(blob.decode("utf-8"))
+
+
+class MacroStore:
+    # Библиотека макросов в SQLite: строка на макрос. При загрузке читаются
+    # только заголовки (имя, trigger, motion, policy, ...), тело макроса
+    # (actions) - при первом запуске. Добавление, замена и удаление одного
+    # макроса - одна транзакция, файл целиком не переписывается.
+    # Порядок макросов (rowid) совпадает с порядком ключей в JSON
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # Тела подгружаются из потока MacroRunner, запись идёт из GUI
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS macros (key TEXT PRIMARY KEY, "
+                         "header TEXT NOT NULL, actions BLOB)")
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def version(self):
+        # Меняется, когда базу изменило другое соединение (другой процесс)
+        with self._lock:
+            return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def headers(self):
+        # {ключ: макрос без actions}
+        with self._lock:
+            rows = self._db.execute("SELECT key, header FROM macros ORDER BY rowid").fetchall()
+        return {key: json.loads(header) for key, header in rows}
+
+    def actions(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT actions FROM macros WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return unpack_actions(row[0])
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT header, actions FROM macros WHERE key = ?",
+                                   (key,)).fetchone()
+        if row is None:
+            return None
+        return self._entry(*row)
+
+    def read(self):
+        # Вся библиотека с телами, в формате JSON-конфига
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, header, actions FROM macros ORDER BY rowid").fetchall()
+        return {key: self._entry(header, actions) for key, header, actions in rows}
+
+    def put(self, key, macro):
+        header, actions = self._split(macro)
+        with self._lock, self._db:
+            # UPSERT сохраняет rowid, а с ним и место макроса в списке
+            self._db.execute(
+                "INSERT INTO macros (key, header, actions) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET header = excluded.header, "
+                "actions = excluded.actions", (key, header, actions))
+
+    def delete(self, key):
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM macros WHERE key = ?", (key,)).rowcount > 0
+
+    def write(self, config):
+        # Заменить всю библиотеку одной транзакцией (импорт, save())
+        rows = [(key,) + self._split(macro) for key, macro in config.items()]
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM macros")
+            self._db.executemany("INSERT INTO macros (key, header, actions) VALUES (?, ?, ?)",
+                                 rows)
+        with self._lock:
+            # Журнал после импорта размером с саму базу - переносим его в файл сразу
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def compact(self):
+        with self._lock:
+            self._db.execute("VACUUM")
+
+    @staticmethod
+    def _split(macro):
+        header = {name: value for name, value in macro.items() if name != "actions"}
+        return (_encode(header),
+                pack_actions(list(macro.get("actions", []))))
+
+    @staticmethod
+    def _entry(header, actions):
+        macro = json.loads(header)
+        macro["actions"] = unpack_actions(actions)
+        return macro
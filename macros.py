@@ -0,0 +1,235 @@
+import os
+import shlex
+import time
+import webbrowser
+
+from gesture_recognition import TriggerSettings
+from keystrokes import TypingSettings, parse_chord
+from motion_recognition import MotionTemplate
+
+# pynput при импорте подключается к дисплею, поэтому он загружается лениво
+keyboard = None
+# Ввод нажатий (keystrokes.KeystrokeEngine) поверх keyboard, создаётся при первом вводе
+keystroke_engine = None
+# Процессы команд CMD: (process_manager.ProcessManager), создаются при первом запуске
+processes = None
+
+# Коды операций скомпилированного макроса
+OP_STRING = 0
+OP_KEY = 1
+OP_OPEN = 2
+OP_WAIT = 3
+OP_CMD = 4
+
+# Что делать со сработавшим жестом, пока выполняется другой макрос (см. macro_runner)
+POLICY_DROP = "drop"  # пропустить (по умолчанию)
+POLICY_QUEUE = "queue"  # выполнить после текущих
+POLICY_RESTART = "restart"  # прервать этот же макрос и начать его заново
+POLICY_CANCEL = "cancel"  # жест отмены: прервать текущий макрос и очистить очередь
+POLICIES = (POLICY_DROP, POLICY_QUEUE, POLICY_RESTART, POLICY_CANCEL)
+
+# Символы, при которых CMD: нужно отдавать оболочке, а не запускать argv напрямую
+SHELL_CHARS = set('|&;<>()$`*?[]{}~!%^"\'\n')
+
+
+def get_keyboard():
+    global keyboard
+    if keyboard is None:
+        from pynput.keyboard import Controller
+        keyboard = Controller()
+    return keyboard
+
+
+def get_keystroke_engine():
+    global keystroke_engine
+    if keystroke_engine is None:
+        from keystrokes import KeystrokeEngine, PynputKeyboard, SystemClipboard
+        keystroke_engine = KeystrokeEngine(PynputKeyboard(get_keyboard()), SystemClipboard())
+    return keystroke_engine
+
+
+def get_processes():
+    global processes
+    if processes is None:
+        from process_manager import ProcessManager
+        processes = ProcessManager()
+    return processes
+
+
+class MacroCompileError(ValueError):
+    def __init__(self, line, action, message):
+        if line is None:
+            super().__init__(message)
+        else:
+            super().__init__(f"Строка {line}: {message} ({action})")
+        self.line = line
+        self.action = action
+
+
+class CompiledMacro:
+    __slots__ = ("signature", "name", "actions", "program", "trigger", "motion", "policy",
+                 "timeout", "typing", "loader")
+
+    def __init__(self, signature, name, actions, program, trigger=None, motion=None,
+                 policy=POLICY_DROP, timeout=None, typing=None, loader=None):
+        self.signature = signature
+        self.name = name
+        self.actions = actions
+        self.program = program
+        self.trigger = trigger
+        self.motion = motion  # MotionTemplate для жеста-движения
+        self.policy = policy
+        self.timeout = timeout  # предел времени команд CMD:, секунд (None - без предела)
+        self.typing = typing  # TypingSettings макроса или None - общие настройки ввода
+        self.loader = loader  # callable() -> actions, если тело ещё не загружено
+
+    def load(self):
+        # Тело макроса из хранилища (macro_store) компилируется при первом запуске
+        if self.program is None:
+            actions = self.loader()
+            self.program = MacroCompiler.compile(actions)
+            self.actions = actions
+        return self.program
+
+
+class MacroCompiler:
+    @staticmethod
+    def compile(actions):
+        program = []
+        for line, action in enumerate(actions, 1):
+            action = action.strip()
+            if not action or action.startswith("#"):
+                continue
+
+            if action.startswith("STRING:"):
+                program.append((OP_STRING, action[7:]))
+            elif action.startswith("KEY:"):
+                program.append((OP_KEY, MacroCompiler._resolve_key(line, action, action[4:])))
+            elif action.startswith("OPEN:"):
+                url = action[5:].strip()
+                if url:
+                    program.append((OP_OPEN, url))
+            elif action.startswith("WAIT:"):
+                seconds = MacroCompiler._parse_wait(line, action, action[5:])
+                if seconds:
+                    program.append((OP_WAIT, seconds))
+            elif action.startswith("CMD:"):
+                cmd = action[4:].strip()
+                if cmd:
+                    program.append((OP_CMD, MacroCompiler._split_command(line, action, cmd)))
+            else:
+                program.append((OP_STRING, action))
+        return tuple(program)
+
+    @staticmethod
+    def compile_macro(signature, macro, loader=None):
+        # loader - заголовок макроса без actions: тело загрузится при запуске
+        actions = macro.get("actions", []) if loader is None else None
+        trigger = None
+        if "trigger" in macro:
+            try:
+                trigger = TriggerSettings.from_dict(macro["trigger"])
+            except (TypeError, ValueError) as e:
+                raise MacroCompileError(None, "trigger", str(e)) from None
+        motion = None
+        if "motion" in macro:
+            try:
+                motion = MotionTemplate.from_dict(macro["motion"])
+            except (TypeError, ValueError) as e:
+                raise MacroCompileError(None, "motion", str(e)) from None
+        policy = macro.get("policy", POLICY_DROP)
+        if policy not in POLICIES:
+            raise MacroCompileError(None, "policy", f"неизвестная политика '{policy}'")
+        timeout = macro.get("timeout")
+        if timeout is not None:
+            if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) \
+                    or not timeout > 0:
+                raise MacroCompileError(None, "timeout", "timeout должен быть числом секунд > 0")
+            timeout = float(timeout)
+        typing = None
+        if "typing" in macro:
+            try:
+                typing = TypingSettings.from_dict(macro["typing"])
+            except (TypeError, ValueError) as e:
+                raise MacroCompileError(None, "typing", str(e)) from None
+        program = MacroCompiler.compile(actions) if actions is not None else None
+        return CompiledMacro(signature, macro.get("name", signature), actions, program, trigger,
+                             motion, policy, timeout, typing, loader)
+
+    @staticmethod
+    def _resolve_key(line, action, keyname):
+        # Аккорд разбирается один раз: "ctrl+c" -> ("ctrl", "c")
+        try:
+            return parse_chord(keyname)
+        except ValueError as e:
+            raise MacroCompileError(line, action, str(e)) from None
+
+    @staticmethod
+    def _parse_wait(line, action, value):
+        try:
+            seconds = float(value.strip())
+        except ValueError:
+            raise MacroCompileError(line, action, "WAIT ожидает число секунд") from None
+        if seconds < 0 or seconds != seconds:
+            raise MacroCompileError(line, action, "WAIT не может быть отрицательным")
+        return seconds
+
+    @staticmethod
+    def _split_command(line, action, cmd):
+        # (строка, argv); argv=None - команду нужно выполнить через оболочку
+        if SHELL_CHARS.intersection(cmd):
+            return cmd, None
+        try:
+            return cmd, tuple(shlex.split(cmd, posix=os.name != "nt"))
+        except ValueError as e:
+            raise MacroCompileError(line, action, f"некорректная команда: {e}") from None
+
+
+class MacroExecutor:
+    @staticmethod
+    def execute(actions, cancel=None, on_output=None, on_exit=None):
+        # cancel - threading.Event: WAIT и паузы прерываются им сразу.
+        # on_output вызывается один раз после первого действия с выводом
+        # (нажатие, текст, URL, команда). on_exit(job) - после завершения
+        # каждой команды CMD:. False - выполнение отменено
+        timeout = typing = None
+        if isinstance(actions, CompiledMacro):
+            program = actions.load()
+            timeout, typing = actions.timeout, actions.typing
+        elif isinstance(actions, tuple):
+            program = actions
+        else:
+            program = MacroCompiler.compile(actions)
+
+        engine = keystroke_engine or get_keystroke_engine()
+        typing = typing or engine.defaults
+        sleep = time.sleep if cancel is None else cancel.wait
+        try:
+            for op, arg in program:
+                if cancel is not None and cancel.is_set():
+                    return False
+                if op == OP_WAIT:
+                    sleep(arg)
+                    continue
+                if op == OP_STRING:
+                    engine.type_text(arg, typing, sleep)
+                elif op == OP_KEY:
+                    engine.press_chord(arg, typing, sleep)
+                elif op == OP_OPEN:
+                    webbrowser.open(arg)
+                else:
+                    MacroExecutor._run_command(arg, timeout, on_exit)
+                if on_output is not None:
+                    on_output()
+                    on_output = None
+                if typing.action_delay:
+                    sleep(typing.action_delay)
+        except Exception as e:
+            print(f"Critical error: {str(e)}")
+            raise # Перенаправляем исключение в вызывающий код
+        return cancel is None or not cancel.is_set()
+
+    @staticmethod
+    def _run_command(command, timeout=None, on_exit=None):
+        # Процесс запускается без ожидания, код возврата приходит в on_exit
+        (processes or get_processes()).launch(command, timeout, on_exit)
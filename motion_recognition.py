@@ -0,0 +1,295 @@
+import numpy as np
+
+# Точки MediaPipe, по которым строится траектория
+WRIST = 0
+THUMB_TIP = 4
+INDEX_TIP = 8
+MIDDLE_MCP = 9
+
+# Признаки кадра в буфере: запястье (x, y), кончик указательного (x, y),
+# расстояние между кончиками большого и указательного, размер ладони
+RAW_FEATURES = 6
+# Признаки шаблона: то же без размера ладони, в размерах ладони от начала окна
+FEATURES = 5
+TEMPLATE_LENGTH = 24
+
+# Большое конечное число вместо inf: с inf префиксные суммы в DTW дают nan
+_FAR = 1e6
+
+
+def frame_features(points):
+    # (21, 3) точки руки (после landmarks_to_array) -> вектор RAW_FEATURES
+    wrist = points[WRIST, :2]
+    tip = points[INDEX_TIP, :2]
+    pinch = np.linalg.norm(points[THUMB_TIP, :2] - tip)
+    scale = np.linalg.norm(points[MIDDLE_MCP, :2] - wrist)
+    return np.array([wrist[0], wrist[1], tip[0], tip[1], pinch, scale], dtype=np.float32)
+
+
+def normalize_window(raw):
+    # (..., L, RAW_FEATURES) -> (..., L, FEATURES): смещения от положения
+    # запястья в начале окна в размерах ладони, не зависят от места и дистанции
+    scale = np.maximum(raw[..., 5].mean(axis=-1), 1e-3)[..., None]
+    origin = raw[..., :1, 0:2]
+    out = np.empty(raw.shape[:-1] + (FEATURES,), dtype=np.float32)
+    out[..., 0:2] = (raw[..., 0:2] - origin) / scale[..., None]
+    out[..., 2:4] = (raw[..., 2:4] - origin) / scale[..., None]
+    out[..., 4] = raw[..., 4] / np.maximum(raw[..., 5], 1e-3)
+    return out
+
+
+def path_extent(features):
+    # Размах движения запястья и кончика пальца (в размерах ладони)
+    span = features[..., 0:4].max(axis=-2) - features[..., 0:4].min(axis=-2)
+    return np.maximum(np.hypot(span[..., 0], span[..., 1]), np.hypot(span[..., 2], span[..., 3]))
+
+
+def resample(timestamps, values, times):
+    # Линейная интерполяция значений буфера на моменты times (любой формы)
+    right = np.clip(np.searchsorted(timestamps, times), 1, len(timestamps) - 1)
+    left = right - 1
+    span = timestamps[right] - timestamps[left]
+    weight = np.clip((times - timestamps[left]) / np.where(span > 0, span, 1.0), 0.0, 1.0)
+    return values[left] + (values[right] - values[left]) * weight[..., None]
+
+
+class MotionTemplate:
+    # Записанное движение: траектория (TEMPLATE_LENGTH, FEATURES) и длительность.
+    # threshold - допустимая средняя ошибка DTW на отсчёт (в размерах ладони).
+    # max_duration - чтобы движение с запасом помещалось в буфер MotionMatcher
+    default_threshold = 0.45
+    max_duration = 2.0
+
+    def __init__(self, features, duration, threshold=None):
+        self.features = np.asarray(features, dtype=np.float32)
+        self.duration = float(duration)
+        self.threshold = float(threshold) if threshold is not None else self.default_threshold
+        self.extent = float(path_extent(self.features))
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError("motion должен быть объектом")
+        try:
+            features = np.asarray(data["template"], dtype=np.float32)
+            duration = float(data["duration"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("motion: нужны template (список отсчётов) и duration") from None
+        if features.shape != (TEMPLATE_LENGTH, FEATURES):
+            raise ValueError(f"motion: template должен быть {TEMPLATE_LENGTH}x{FEATURES}")
+        if not 0 < duration <= cls.max_duration:
+            raise ValueError(f"motion: duration должна быть от 0 до {cls.max_duration:g} с")
+        threshold = data.get("threshold")
+        if threshold is not None and not float(threshold) > 0:
+            raise ValueError("motion: threshold должен быть положительным")
+        return cls(features, duration, threshold)
+
+    def to_dict(self):
+        data = {
+            "template": np.round(self.features, 4).tolist(),
+            "duration": round(self.duration, 3),
+        }
+        if self.threshold != self.default_threshold:
+            data["threshold"] = self.threshold
+        return data
+
+    @classmethod
+    def from_recording(cls, timestamps, raw, still=0.15):
+        # Кадры записи (время, RAW_FEATURES) -> шаблон. Неподвижные участки в
+        # начале и в конце (смещение меньше still ладони) отбрасываются
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        raw = np.asarray(raw, dtype=np.float32)
+        if len(raw) < 2:
+            return None
+        scale = max(float(raw[:, 5].mean()), 1e-3)
+        points = raw[:, 0:4]
+        moved_from_start = np.abs(points - points[0]).max(axis=1) / scale > still
+        moved_from_end = np.abs(points - points[-1]).max(axis=1) / scale > still
+        if not moved_from_start.any():
+            return None
+        first = max(int(np.argmax(moved_from_start)) - 1, 0)
+        last = len(raw) - int(np.argmax(moved_from_end[::-1]))
+        timestamps, raw = timestamps[first:last + 1], raw[first:last + 1]
+        duration = float(timestamps[-1] - timestamps[0])
+        if len(raw) < 4 or not 0 < duration <= cls.max_duration:
+            return None
+        times = timestamps[0] + np.linspace(0.0, duration, TEMPLATE_LENGTH)
+        return cls(normalize_window(resample(timestamps, raw, times)), duration)
+
+
+class MotionBuffer:
+    # Кольцевой буфер последних capacity кадров: время + RAW_FEATURES.
+    # Память фиксирована, запись - O(1) без сдвига массивов
+    def __init__(self, capacity=90):
+        self.capacity = capacity
+        self._t = np.zeros(capacity, dtype=np.float64)
+        self._f = np.zeros((capacity, RAW_FEATURES), dtype=np.float32)
+        self.clear()
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, features):
+        self._t[self._next] = timestamp
+        self._f[self._next] = features
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def last_timestamp(self):
+        return self._t[self._next - 1] if self._count else None
+
+    def snapshot(self):
+        # Содержимое в порядке времени (копия, два среза без np.roll)
+        if self._count < self.capacity:
+            return self._t[:self._count].copy(), self._f[:self._count].copy()
+        order = np.r_[self._next:self.capacity, 0:self._next]
+        return self._t[order], self._f[order]
+
+
+class MotionMatcher:
+    # Потоковое распознавание движений. Каждый кадр последние
+    # duration * scale секунд буфера пересэмплируются до TEMPLATE_LENGTH и
+    # сравниваются со всеми шаблонами одним пакетом DTW с полосой band.
+    # Строки DTW считаются векторно, сравнение бросается, как только минимум
+    # строки превысил порог у всех пар, поэтому время на кадр ограничено
+    # числом шаблонов, а не длиной истории. Длительности окон округляются до
+    # window_step, и шаблоны близкой длительности делят одно окно.
+    window_step = 0.05
+
+    def __init__(self, capacity=90, scales=(0.8, 1.0, 1.25), band=4, max_gap=0.25,
+                 cooldown=0.6):
+        self.buffer = MotionBuffer(capacity)
+        self.scales = np.asarray(scales, dtype=np.float64)
+        self.band = band
+        self.max_gap = max_gap
+        self.cooldown = cooldown
+        self._macros = None
+        self._batch = None
+        self._band_cost = self._make_band(TEMPLATE_LENGTH, band)
+        self.reset()
+
+    def reset(self):
+        self.buffer.clear()
+        self._blocked_until = None
+        self.compared = 0
+        self.abandoned = 0
+
+    @staticmethod
+    def _make_band(length, band):
+        i, j = np.indices((length, length))
+        return np.where(np.abs(i - j) > band, _FAR, 0.0)
+
+    def _prepare(self, macros):
+        # Шаблоны складываются в массивы один раз при изменении конфига
+        if macros is self._macros:
+            return self._batch
+        self._macros = macros
+        if not macros:
+            self._batch = None
+            return None
+        templates = np.stack([m.motion.features for m in macros])
+        durations = np.array([m.motion.duration for m in macros])
+        thresholds = np.array([m.motion.threshold for m in macros], dtype=np.float32)
+        extents = np.array([m.motion.extent for m in macros], dtype=np.float32)
+        # Пары (шаблон, масштаб времени) и общие окна для них
+        n, s = len(macros), len(self.scales)
+        spans = np.round((durations[:, None] * self.scales[None, :]).ravel() / self.window_step)
+        spans, window_of = np.unique(np.maximum(spans, 1) * self.window_step, return_inverse=True)
+        self._batch = (
+            np.repeat(np.arange(n), s),
+            np.repeat(templates, s, axis=0),
+            spans,
+            window_of,
+            np.repeat(thresholds, s),
+            np.repeat(extents, s),
+        )
+        return self._batch
+
+    def update(self, points, timestamp, macros):
+        # points - (21, 3) первой руки или None; macros - CompiledMacro с motion.
+        # Возвращает сработавший макрос или None
+        features = frame_features(points) if points is not None else None
+        return self.update_features(features, timestamp, macros)
+
+    def update_features(self, features, timestamp, macros):
+        last = self.buffer.last_timestamp()
+        if last is not None and timestamp - last > self.max_gap:
+            self.buffer.clear()  # рука пропала - движение прервано
+        if features is None:
+            return None
+        self.buffer.append(timestamp, features)
+
+        if self._blocked_until is not None:
+            if timestamp < self._blocked_until:
+                return None
+            self._blocked_until = None
+        batch = self._prepare(macros)
+        if batch is None or len(self.buffer) < 4:
+            return None
+
+        owners, templates, spans, window_of, thresholds, extents = batch
+        timestamps, raw = self.buffer.snapshot()
+        # Окна, на которые хватает истории (spans отсортированы)
+        available = int(np.searchsorted(spans, timestamps[-1] - timestamps[0], side='right'))
+        if not available:
+            return None
+        spans = spans[:available]
+        times = timestamps[-1] - spans[:, None] * (1.0 - np.linspace(0.0, 1.0, TEMPLATE_LENGTH))
+        windows = normalize_window(resample(timestamps, raw, times))
+        window_extents = path_extent(windows)
+
+        # Почти неподвижная рука не может совпасть с размашистым шаблоном
+        pairs = window_of < available
+        pairs[pairs] = window_extents[window_of[pairs]] >= 0.5 * extents[pairs]
+        pairs = np.flatnonzero(pairs)
+        if not len(pairs):
+            return None
+
+        costs = self._dtw(templates[pairs], windows[window_of[pairs]], thresholds[pairs])
+        ratios = costs / thresholds[pairs]
+        best = int(np.argmin(ratios))
+        if ratios[best] >= 1.0:
+            return None
+        self.buffer.clear()
+        self._blocked_until = timestamp + self.cooldown
+        return self._macros[owners[pairs[best]]]
+
+    def _dtw(self, templates, windows, thresholds):
+        # Средняя стоимость пути DTW для каждой пары; inf - сравнение брошено
+        length = TEMPLATE_LENGTH
+        limit = thresholds * length
+        # Нижняя граница по концам (любой путь проходит через первую и последнюю
+        # пару отсчётов): отсекает явно чужие шаблоны без построения матрицы
+        ends = np.linalg.norm(templates[:, [0, -1]] - windows[:, [0, -1]], axis=-1).sum(axis=1)
+        result = np.full(len(templates), np.inf)
+        candidates = np.flatnonzero(ends <= limit)
+        self.compared += len(templates)
+        self.abandoned += len(templates) - len(candidates)
+        if not len(candidates):
+            return result
+        templates, windows, limit = templates[candidates], windows[candidates], limit[candidates]
+
+        diff = templates[:, :, None, :] - windows[:, None, :, :]
+        # float64: префиксные суммы с _FAR во float32 теряют точность
+        cost = np.sqrt(np.einsum('bijk,bijk->bij', diff, diff)) + self._band_cost
+        alive = np.ones(len(templates), dtype=bool)
+        row = np.cumsum(cost[:, 0], axis=1)
+        for i in range(1, length):
+            above = row
+            diagonal = np.concatenate([np.full((len(row), 1), _FAR), row[:, :-1]], axis=1)
+            # Из верхней/диагональной клетки, затем проход по строке:
+            # D[j] = P[j] + min_{k<=j}(A[k] - P[k]), P - префиксные суммы строки
+            arrive = np.minimum(above, diagonal) + cost[:, i]
+            prefix = np.cumsum(cost[:, i], axis=1)
+            row = np.minimum.accumulate(arrive - prefix, axis=1) + prefix
+            # Ранний отказ: любой путь проходит через каждую строку
+            alive &= row.min(axis=1) <= limit
+            if not alive.any():
+                break
+        self.abandoned += int((~alive).sum())
+        result[candidates] = np.where(alive, row[:, -1] / length, np.inf)
+        return result
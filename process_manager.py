@@ -0,0 +1,209 @@
+import collections
+import os
+import signal
+import subprocess
+import threading
+import time
+
+LOG_FILE = "gesture_commands.log"
+
+
+class CommandJob:
+    # Один запуск CMD: от постановки в очередь до завершения процесса
+    def __init__(self, command, argv, timeout=None, on_exit=None):
+        self.command = command
+        self.argv = argv  # None - команда выполняется через оболочку
+        self.timeout = timeout
+        self.on_exit = on_exit  # callable(job) после завершения или отказа
+        self.process = None
+        self.readers = []
+        self.pid = None
+        self.returncode = None
+        self.timed_out = False
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    def describe(self):
+        if self.error is not None:
+            return f"не запущено: {self.error}"
+        elapsed = (self.finished_at or time.monotonic()) - (self.started_at or time.monotonic())
+        if self.timed_out:
+            return f"прервано по таймауту через {elapsed:.1f} с"
+        return f"код {self.returncode} за {elapsed:.1f} с"
+
+
+class ProcessManager:
+    # Запускает команды CMD: без ожидания: argv исполняется напрямую, оболочка -
+    # только для команд с перенаправлениями и т.п. Не больше max_running
+    # процессов сразу, остальные ждут в очереди. Каждый процесс дожидается
+    # отдельный поток (зомби не остаются), вывод построчно пишется в журнал
+    # и передаётся в on_output(job, строка) из потока чтения
+    max_running = 4
+    max_pending = 16
+    kill_grace = 3.0  # секунд между terminate и kill при таймауте
+
+    def __init__(self, log_path=None, on_output=None):
+        self.log_path = log_path
+        self.on_output = on_output
+        self._lock = threading.Lock()
+        self._running = []
+        self._pending = collections.deque()
+        self._log = None
+
+    @staticmethod
+    def path_for(config_path):
+        return os.path.join(os.path.dirname(os.path.abspath(config_path)), LOG_FILE)
+
+    def launch(self, command, timeout=None, on_exit=None):
+        # command - (строка, argv) из MacroCompiler; возвращает CommandJob
+        cmd, argv = command
+        job = CommandJob(cmd, argv, timeout, on_exit)
+        with self._lock:
+            if len(self._running) >= self.max_running:
+                if len(self._pending) >= self.max_pending:
+                    job.error = "слишком много команд в очереди"
+                else:
+                    self._pending.append(job)
+                    return job
+            else:
+                self._running.append(job)
+        if job.error is not None:
+            self._finish(job)
+        else:
+            self._start(job)
+        return job
+
+    def counts(self):
+        with self._lock:
+            return len(self._running), len(self._pending)
+
+    def stop_all(self):
+        # Очередь отбрасывается, запущенные процессы завершаются
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            running = list(self._running)
+        for job in pending:
+            job.error = "отменено"
+            self._finish(job)
+        for job in running:
+            if job.process is not None:
+                self._terminate(job.process, force=False)
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def _start(self, job):
+        kwargs = dict(stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                      universal_newlines=True, errors="replace", bufsize=1)
+        if os.name == "posix":
+            # Своя группа процессов, чтобы таймаут завершал и дочерние процессы
+            kwargs["start_new_session"] = True
+        job.started_at = time.monotonic()
+        try:
+            try:
+                if job.argv:
+                    job.process = subprocess.Popen(job.argv, **kwargs)
+                else:
+                    job.process = subprocess.Popen(job.command, shell=True, **kwargs)
+            except FileNotFoundError:
+                if not job.argv:
+                    raise
+                # Встроенные команды оболочки (dir, echo в Windows) - через оболочку
+                job.argv = None
+                job.process = subprocess.Popen(job.command, shell=True, **kwargs)
+        except Exception as e:
+            job.error = str(e)
+            with self._lock:
+                self._running.remove(job)
+            self._finish(job)
+            self._start_next()
+            return
+
+        job.pid = job.process.pid
+        self._write(job, f"$ {job.command}")
+        for stream, tag in ((job.process.stdout, ""), (job.process.stderr, "! ")):
+            reader = threading.Thread(target=self._read, args=(job, stream, tag), daemon=True)
+            reader.start()
+            job.readers.append(reader)
+        threading.Thread(target=self._watch, args=(job,), daemon=True).start()
+
+    def _read(self, job, stream, tag):
+        try:
+            for line in stream:
+                line = tag + line.rstrip("\r\n")
+                self._write(job, line)
+                if self.on_output is not None:
+                    self.on_output(job, line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            stream.close()
+
+    def _watch(self, job):
+        process = job.process
+        try:
+            process.wait(job.timeout or None)
+        except subprocess.TimeoutExpired:
+            job.timed_out = True
+            self._terminate(process, force=False)
+            try:
+                process.wait(self.kill_grace)
+            except subprocess.TimeoutExpired:
+                self._terminate(process, force=True)
+                process.wait()
+        job.returncode = process.returncode
+        # Дочитываем вывод; если трубу держат процессы-потомки, не ждём их
+        for reader in job.readers:
+            reader.join(1.0)
+        with self._lock:
+            self._running.remove(job)
+        self._write(job, f"завершено: {job.describe()}")
+        self._finish(job)
+        self._start_next()
+
+    def _start_next(self):
+        with self._lock:
+            if not self._pending or len(self._running) >= self.max_running:
+                return
+            job = self._pending.popleft()
+            self._running.append(job)
+        self._start(job)
+
+    @staticmethod
+    def _terminate(process, force):
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+            elif force:
+                process.kill()
+            else:
+                process.terminate()
+        except (OSError, ProcessLookupError):
+            pass
+
+    def _finish(self, job):
+        job.finished_at = time.monotonic()
+        if job.on_exit is not None:
+            try:
+                job.on_exit(job)
+            except Exception as e:
+                print(f"Ошибка обработчика завершения команды: {str(e)}")
+
+    def _write(self, job, line):
+        if not self.log_path:
+            return
+        stamp = time.strftime("%H:%M:%S")
+        with self._lock:
+            try:
+                if self._log is None:
+                    self._log = open(self.log_path, "a", encoding="utf-8")
+                self._log.write(f"{stamp} [{job.pid}] {line}\n")
+                self._log.flush()
+            except OSError as e:
+                print(f"Ошибка записи журнала команд: {str(e)}")
+                self.log_path = None
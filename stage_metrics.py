@@ -0,0 +1,159 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Этапы обработки кадра в порядке конвейера
+STAGES = (
+    "capture",  # чтение кадра из источника
+    "convert",  # отражение и перевод в RGB
+    "inference",  # MediaPipe process
+    "recognize",  # сигнатуры рук
+    "draw",  # отрисовка ландмарок и масштабирование под окно
+    "lookup",  # выбор ключа конфига, стабилизатор, жесты-движения
+    "render",  # вывод кадра на экран
+    "dispatch",  # от срабатывания жеста до первого нажатия макроса
+    "total",  # от захвата кадра до обработки результата
+)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class StageTimer:
+    # Последние window длительностей одного этапа (кольцевой буфер) и
+    # накопленные count/sum. Пишет один поток, читать можно из любого
+    __slots__ = ("samples", "index", "count", "sum", "max")
+
+    def __init__(self, window):
+        self.samples = [0.0] * window
+        self.index = 0
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        samples = self.samples
+        samples[self.index] = seconds
+        self.index = (self.index + 1) % len(samples)
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def recent(self):
+        return sorted(self.samples[:min(self.count, len(self.samples))])
+
+    def summary(self):
+        values = self.recent()
+        if not values:
+            return None
+        pick = lambda q: values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+        result = {"count": self.count, "mean_ms": sum(values) / len(values) * 1000}
+        for q in QUANTILES:
+            result[f"p{int(q * 100)}_ms"] = pick(q) * 1000
+        result["max_ms"] = values[-1] * 1000
+        return result
+
+
+class StageMetrics:
+    # Задержки этапов конвейера со скользящими перцентилями и частота кадров.
+    # Этап меряется как time.perf_counter() до и после, запись - одно
+    # присваивание в кольцевой буфер, перцентили считаются только при чтении
+    def __init__(self, window=512):
+        self.window = window
+        self.started_at = time.monotonic()
+        self._timers = {stage: StageTimer(window) for stage in STAGES}
+        self._frames = [0.0] * 64  # время обработки последних кадров для FPS
+        self._frame_index = 0
+        self._frame_count = 0
+        self._lock = threading.Lock()
+
+    def timer(self, stage):
+        timer = self._timers.get(stage)
+        if timer is None:
+            with self._lock:
+                timer = self._timers.setdefault(stage, StageTimer(self.window))
+        return timer
+
+    def record(self, stage, seconds):
+        self.timer(stage).record(seconds)
+
+    def frame_done(self, now=None):
+        self._frames[self._frame_index] = time.monotonic() if now is None else now
+        self._frame_index = (self._frame_index + 1) % len(self._frames)
+        self._frame_count += 1
+
+    def fps(self):
+        count = min(self._frame_count, len(self._frames))
+        if count < 2:
+            return 0.0
+        newest = self._frames[(self._frame_index - 1) % len(self._frames)]
+        oldest = self._frames[(self._frame_index - count) % len(self._frames)]
+        return (count - 1) / (newest - oldest) if newest > oldest else 0.0
+
+    def snapshot(self):
+        stages = {}
+        for stage, timer in list(self._timers.items()):
+            summary = timer.summary()
+            if summary is not None:
+                stages[stage] = summary
+        return {"uptime_s": time.monotonic() - self.started_at, "frames": self._frame_count,
+                "fps": self.fps(), "stages": stages}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix="gesturemacro"):
+        # Текстовый формат Prometheus: summary по этапам (перцентили за окно)
+        lines = [
+            f"# HELP {prefix}_frames_total Processed frames.",
+            f"# TYPE {prefix}_frames_total counter",
+            f"{prefix}_frames_total {self._frame_count}",
+            f"# HELP {prefix}_fps Recent processing rate, frames per second.",
+            f"# TYPE {prefix}_fps gauge",
+            f"{prefix}_fps {self.fps():.3f}",
+            f"# HELP {prefix}_stage_seconds Pipeline stage latency.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for stage, timer in list(self._timers.items()):
+            values = timer.recent()
+            if not values:
+                continue
+            for q in QUANTILES:
+                value = values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} '
+                             f'{value:.9f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {timer.sum:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {timer.count}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        # .prom/.txt - формат Prometheus (textfile collector), иначе JSON.
+        # Файл подменяется атомарно, чтобы читатель не увидел половину
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        directory = os.path.dirname(os.path.abspath(path))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=".metrics_", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            tmp_path = None
+            return True
+        except Exception as e:
+            print(f"Ошибка записи метрик: {str(e)}")
+            return False
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def overlay_lines(self):
+        # Короткая сводка для наложения на видео
+        lines = [f"{self.fps():5.1f} FPS"]
+        for stage in ("inference", "total"):
+            summary = self._timers[stage].summary()
+            if summary is not None:
+                lines.append(f"{stage} p50 {summary['p50_ms']:.1f} / "
+                             f"p95 {summary['p95_ms']:.1f} ms")
+        return lines
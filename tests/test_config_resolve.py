@@ -0,0 +1,61 @@
+# Порядок ConfigManager.resolve: выученный жест с макросом, аккорд, жест с
+# меткой руки, жест без метки.
+# Запуск: python -m pytest tests
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_manager import ConfigManager
+
+
+class ResolveTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved_path = ConfigManager.path
+
+    def tearDown(self):
+        ConfigManager.path = self.saved_path
+        ConfigManager.invalidate()
+        self.tmp.cleanup()
+
+    def use(self, *keys):
+        path = os.path.join(self.tmp.name, "config.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({key: {"name": key, "actions": ["KEY: a"]} for key in keys}, f)
+        ConfigManager.path = path
+        ConfigManager.invalidate()
+
+    def test_tagged_before_plain_of_other_hand(self):
+        self.use("11000", "R01000")
+        self.assertEqual(ConfigManager.resolve([("L", "11000"), ("R", "01000")]), "R01000")
+
+    def test_chord_first(self):
+        self.use("11000", "R01000", "L11000+R01000")
+        self.assertEqual(ConfigManager.resolve([("L", "11000"), ("R", "01000")]),
+                         "L11000+R01000")
+
+    def test_plain_fallback(self):
+        self.use("01000")
+        self.assertEqual(ConfigManager.resolve([("L", "11000"), ("R", "01000")]), "01000")
+
+    def test_unbound_returns_frame_signature(self):
+        self.use("11111")
+        self.assertEqual(ConfigManager.resolve([("R", "01000")]), "01000")
+        self.assertEqual(ConfigManager.resolve([("L", "11000"), ("R", "01000")]),
+                         "L11000+R01000")
+
+    def test_learned_key_with_macro(self):
+        self.use("11000", "learned-1")
+        self.assertEqual(ConfigManager.resolve([("R", "11000")], "learned-1"), "learned-1")
+
+    def test_learned_key_without_macro_falls_through(self):
+        self.use("11000")
+        self.assertEqual(ConfigManager.resolve([("R", "11000")], "learned-1"), "11000")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# Покадровая классификация пальцев (без NumPy) против пакетной.
+# Запуск: python -m pytest tests
+import os
+import sys
+import unittest
+from collections import namedtuple
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks", "fixtures"))
+
+from gesture_recognition import GestureRecognizer
+from make_fixtures import bends_for, hand
+
+Landmark = namedtuple("Landmark", "x y z")
+
+
+class FingersUpTest(unittest.TestCase):
+    def test_synthetic_poses(self):
+        for code in range(32):
+            signature = format(code, "05b")
+            points = hand(bends_for(signature))
+            landmarks = [Landmark(*p) for p in points.tolist()]
+            self.assertEqual(
+                GestureRecognizer.get_signature(GestureRecognizer.fingers_up(landmarks)),
+                signature)
+
+    def test_matches_batch(self):
+        points = np.random.default_rng(0).random((2000, 21, 3), dtype=np.float32)
+        expected = GestureRecognizer.fingers_up_batch(points).tolist()
+        got = [GestureRecognizer.fingers_up(hand) for hand in points]
+        self.assertEqual(got, expected)
+
+    def test_hand_signatures_small_and_batch(self):
+        points = [hand(bends_for(signature)) for signature in ("11000", "01111", "00001")]
+        hands = GestureRecognizer.hand_signatures(points[:2], ["R", "L"])
+        self.assertEqual(hands, [("L", "01111"), ("R", "11000")])
+        hands = GestureRecognizer.hand_signatures(points, ["", "", ""])
+        self.assertEqual([bits for _, bits in hands], ["11000", "01111", "00001"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+# GestureStabilizer на синтетических последовательностях ландмарок, без камеры.
+# Запуск: python -m pytest tests
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks", "fixtures"))
+
+from gesture_recognition import GestureStabilizer, TriggerSettings
+from make_fixtures import bends_for, hand
+
+FPS = 30
+
+
+def sequence(steps):
+    # [(сигнатура или None, секунд)] -> [(точки руки или None, время кадра)]
+    frames = []
+    for signature, seconds in steps:
+        points = hand(bends_for(signature)) if signature else None
+        frames += [points] * int(round(seconds * FPS))
+    return [(points, i / FPS) for i, points in enumerate(frames)]
+
+
+def fired(stabilizer, frames):
+    # [(время, сигнатура)] срабатываний
+    events = []
+    for points, timestamp in frames:
+        signature = stabilizer.feed_landmarks(points, timestamp)
+        if signature:
+            events.append((timestamp, signature))
+    return events
+
+
+class GestureStabilizerTest(unittest.TestCase):
+    def test_cold_start(self):
+        events = fired(GestureStabilizer(), sequence([("11000", 1.0)]))
+        self.assertEqual([signature for _, signature in events], ["11000"])
+        # 4 кадра на голоса и 0.1 с удержания
+        self.assertLess(events[0][0], 0.3)
+
+    def test_after_idle(self):
+        events = fired(GestureStabilizer(), sequence([(None, 2.0), ("11000", 1.0)]))
+        self.assertEqual([signature for _, signature in events], ["11000"])
+        self.assertLess(events[0][0] - 2.0, 0.3)
+
+    def test_after_other_pose(self):
+        events = fired(GestureStabilizer(), sequence([("01000", 2.0), ("11111", 1.0)]))
+        self.assertEqual([signature for _, signature in events], ["01000", "11111"])
+        self.assertLess(events[1][0] - 2.0, 0.3)
+
+    def test_held_pose_fires_once(self):
+        events = fired(GestureStabilizer(), sequence([("11000", 3.0)]))
+        self.assertEqual(len(events), 1)
+
+    def test_fires_again_after_release(self):
+        events = fired(GestureStabilizer(),
+                       sequence([("11000", 1.0), (None, 0.5), ("11000", 1.0)]))
+        self.assertEqual([signature for _, signature in events], ["11000", "11000"])
+        self.assertLess(events[1][0] - 1.5, 0.3)
+
+    def test_short_release_does_not_refire(self):
+        # Рука пропала на 3 кадра (меньше votes из window) - жест не отпущен
+        events = fired(GestureStabilizer(),
+                       sequence([("11000", 1.0), (None, 0.1), ("11000", 1.0)]))
+        self.assertEqual(len(events), 1)
+
+    def test_single_frame_glitch_ignored(self):
+        stabilizer = GestureStabilizer()
+        frames = sequence([("01000", 1.0)])
+        frames[10] = (hand(bends_for("11111")), frames[10][1])
+        events = fired(stabilizer, frames)
+        self.assertEqual([signature for _, signature in events], ["01000"])
+
+    def test_per_macro_window(self):
+        # Окно макроса больше окна по умолчанию: история растёт под него
+        slow = TriggerSettings(votes=10, window=12, hold=0.0)
+        stabilizer = GestureStabilizer(lambda signature: slow if signature == "11000" else None)
+        timestamps = [i / FPS for i in range(30)]
+        results = [stabilizer.update("11000", t) for t in timestamps]
+        self.assertEqual(results.index("11000"), 9)
+        self.assertEqual(stabilizer.history.maxlen, 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# Вставка через буфер обмена (paste_over) на MockKeyboard.
+# Запуск: python -m pytest tests
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keystrokes import KeystrokeEngine, MockKeyboard, TypingSettings
+
+
+class WriteOnlyClipboard:
+    # Буфер, который нечем прочитать
+    def __init__(self):
+        self.text = None
+
+    def copy(self, text):
+        self.text = text
+        return True
+
+
+class PasteTest(unittest.TestCase):
+    def engine(self, clipboard):
+        keyboard = MockKeyboard(log=True)
+        engine = KeystrokeEngine(keyboard, clipboard or keyboard)
+        engine.restore_delay = 0
+        return engine, keyboard
+
+    def test_clipboard_restored(self):
+        engine, keyboard = self.engine(None)
+        keyboard.clipboard = "copied by user"
+        engine.type_text("long macro text", TypingSettings(paste_over=5))
+        self.assertIn(("press", "v"), keyboard.log)
+        self.assertEqual(keyboard.clipboard, "copied by user")
+
+    def test_unreadable_clipboard_keeps_pasted_text(self):
+        clipboard = WriteOnlyClipboard()
+        engine, keyboard = self.engine(clipboard)
+        engine.type_text("long macro text", TypingSettings(paste_over=5))
+        self.assertEqual(clipboard.text, "long macro text")
+        self.assertEqual(keyboard.characters, 0)
+
+    def test_short_text_typed(self):
+        engine, keyboard = self.engine(None)
+        engine.type_text("abc", TypingSettings(paste_over=5))
+        self.assertEqual(keyboard.characters, 3)
+        self.assertIsNone(keyboard.clipboard)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+# Выученный жест не должен перехватывать позы с другими пальцами: после
+# обучения одного жеста остальные позы находят свои макросы по битам.
+# Запуск: python -m pytest tests
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks", "fixtures"))
+
+from config_manager import ConfigManager
+from gesture_learning import LearnedGestures
+from gesture_recognition import GestureRecognizer
+from make_fixtures import bends_for, hand
+
+SIGNATURES = [format(code, "05b") for code in range(32)]
+
+
+def samples(signature, count, rng):
+    # Как при записи с камеры: небольшой поворот, сдвиг и дрожание
+    return np.stack([hand(bends_for(signature), angle=rng.uniform(-0.15, 0.15),
+                          shift=rng.uniform(-0.03, 0.03, 2)) + rng.normal(0, 0.003, (21, 3))
+                     for _ in range(count)]).astype(np.float32)
+
+
+class LearnedGesturesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved_path = ConfigManager.path
+        path = os.path.join(self.tmp.name, "config.json")
+        keys = SIGNATURES + ["learned-1"]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({key: {"name": key, "actions": ["KEY: a"]} for key in keys}, f)
+        ConfigManager.path = path
+        ConfigManager.invalidate()
+        self.rng = np.random.default_rng(0)
+        self.learned = LearnedGestures()
+        self.learned.add("learned-1", samples("11000", 40, self.rng), ["R"] * 40)
+
+    def tearDown(self):
+        ConfigManager.path = self.saved_path
+        ConfigManager.invalidate()
+        self.tmp.cleanup()
+
+    def resolve(self, points):
+        key, _ = self.learned.classify(points, "R")
+        bits = GestureRecognizer.get_signature(GestureRecognizer.fingers_up(points))
+        return ConfigManager.resolve([("R", bits)], key)
+
+    def test_learned_pose(self):
+        for points in samples("11000", 10, self.rng):
+            self.assertEqual(self.resolve(points), "learned-1")
+
+    def test_other_poses_keep_their_macros(self):
+        for signature in SIGNATURES:
+            if signature == "11000":
+                continue
+            for points in samples(signature, 3, self.rng):
+                self.assertEqual(self.resolve(points), signature)
+
+
+if __name__ == "__main__":
+    unittest.main()